@@ -0,0 +1,324 @@
+# Bitmap assets kept out of the heap until drawn: a compact binary format, optionally
+# compressed, read from the flash filesystem or used in place from frozen `bytes`.
+# `mkasset.py` produces the files on the desktop.
+
+from matter import *
+
+import gc
+import struct
+
+###############################################################################
+ASSET_MAGIC = b'MPBM'
+ASSET_VERSION = 1
+ASSET_RLE = 0x01
+
+# magic, version, flags, width, height, bytes of the stored pixels
+_HEADER_FORMAT = '<4sBBHHH'
+_HEADER_SIZE = 12
+
+###############################################################################
+class BitmapAsset(object):
+    '''
+    A 1-bpp bitmap in the layout `Bitmap` draws: rows of `(width + 7) // 8` bytes,
+    the most significant bit on the left. Creating it only reads the header.
+
+    :param source: the path of an asset file, or the whole asset as `bytes`, say, from a frozen module,
+                   whose pixels are then used in place unless they are compressed
+    '''
+
+    def __init__(self, source):
+        super(BitmapAsset, self).__init__()
+
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                header = f.read(_HEADER_SIZE)
+        else:
+            header = bytes(source[0:_HEADER_SIZE])
+
+        if len(header) < _HEADER_SIZE:
+            raise ValueError("truncated bitmap asset")
+
+        magic, version, flags, width, height, stored = struct.unpack(_HEADER_FORMAT, header)
+
+        if magic != ASSET_MAGIC or version != ASSET_VERSION:
+            raise ValueError("not a bitmap asset")
+
+        self.source = source
+        self.width, self.height = width, height
+        self.compressed = (flags & ASSET_RLE) != 0
+        self.stored_size = stored
+        self.size = ((width + 7) // 8) * height
+
+# public
+    def in_place(self):
+        ''' Tell whether the pixels can be used without loading, that is, uncompressed `bytes` '''
+        return not (self.compressed or isinstance(self.source, str))
+
+    def pixels(self):
+        ''' :return: a view of the pixels in the source, only for assets `in_place` '''
+        return memoryview(self.source)[_HEADER_SIZE:_HEADER_SIZE + self.size]
+
+    def load(self, buffer, scratch = None):
+        '''
+        Read the pixels into `buffer`, of at least `size` bytes
+
+        :param scratch: a small buffer for streaming compressed files, allocated if not given
+        '''
+
+        if isinstance(self.source, str):
+            with open(self.source, 'rb') as f:
+                f.seek(_HEADER_SIZE)
+
+                if self.compressed:
+                    unpacker = _PackBitsUnpacker(buffer, self.size)
+                    scratch = scratch if scratch is not None else bytearray(64)
+                    n = f.readinto(scratch)
+
+                    while n and not unpacker.done():
+                        unpacker.feed(scratch, n)
+                        n = f.readinto(scratch)
+                else:
+                    f.readinto(memoryview(buffer)[0:self.size])
+        else:
+            payload = memoryview(self.source)[_HEADER_SIZE:_HEADER_SIZE + self.stored_size]
+
+            if self.compressed:
+                _PackBitsUnpacker(buffer, self.size).feed(payload, len(payload))
+            else:
+                buffer[0:self.size] = payload
+
+        return buffer
+
+class AssetCache(object):
+    '''
+    The pixels of the assets drawn lately. The least recently used ones are evicted once they
+    take more bytes than the budget, or once the free heap drops below the reserve.
+    Evicted buffers are kept for the next asset of the same size, unless the heap is short.
+
+    :param budget: bytes of loaded pixels
+    :param reserve: bytes of free heap to keep, only checked where `gc.mem_free` exists
+    '''
+
+    def __init__(self, budget = 4096, reserve = 8192, spares = 2):
+        super(AssetCache, self).__init__()
+        self.budget, self.reserve = budget, reserve
+        self.loads, self.hits, self.evictions = 0, 0, 0
+        self.__max_spares = spares
+        self.__entries = {}
+        self.__spares = []
+        self.__size = 0
+        self.__clock = 0
+        self.__scratch = bytearray(64)
+
+# public
+    def acquire(self, asset):
+        ''' :return: the pixels of the asset, loaded if they are not cached '''
+        if asset.in_place():
+            pixels = asset.pixels()
+        else:
+            self.__clock += 1
+            entry = self.__entries.get(asset)
+
+            if entry:
+                self.hits += 1
+                entry[0] = self.__clock
+            else:
+                self.__make_room(asset.size)
+                entry = [self.__clock, asset.load(self.__take_spare(asset.size), self.__scratch)]
+                self.__entries[asset] = entry
+                self.__size += asset.size
+                self.loads += 1
+
+            pixels = entry[1]
+
+        return pixels
+
+    def release(self, asset):
+        entry = self.__entries.pop(asset, None)
+
+        if entry:
+            self.__size -= asset.size
+            self.__keep_spare(entry[1])
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.__make_room(0)
+
+    def clear(self):
+        self.__entries = {}
+        self.__spares = []
+        self.__size = 0
+
+    def stats(self):
+        '''
+        :return: loads, hits, evictions, cached assets, cached bytes
+        '''
+        return self.loads, self.hits, self.evictions, len(self.__entries), self.__size
+
+# private
+    def __make_room(self, nbytes):
+        short = self.__heap_short()
+
+        if short:
+            self.__spares = []
+
+        while self.__entries and (short or self.__size + nbytes > self.budget):
+            lru_asset, lru_stamp = None, self.__clock + 1
+
+            for asset in self.__entries:
+                stamp = self.__entries[asset][0]
+
+                if stamp < lru_stamp:
+                    lru_asset, lru_stamp = asset, stamp
+
+            buffer = self.__entries.pop(lru_asset)[1]
+            self.__size -= lru_asset.size
+            self.evictions += 1
+
+            if short:
+                del buffer
+                gc.collect()
+                short = self.__heap_short()
+            else:
+                self.__keep_spare(buffer)
+
+    def __heap_short(self):
+        return hasattr(gc, 'mem_free') and gc.mem_free() < self.reserve
+
+    def __take_spare(self, nbytes):
+        buffer = None
+
+        for i in range(len(self.__spares)):
+            if len(self.__spares[i]) == nbytes:
+                buffer = self.__spares.pop(i)
+                break
+
+        if buffer is None:
+            buffer = bytearray(nbytes)
+
+        return buffer
+
+    def __keep_spare(self, buffer):
+        if self.__max_spares > 0:
+            if len(self.__spares) >= self.__max_spares:
+                self.__spares.pop(0)
+
+            self.__spares.append(buffer)
+
+asset_cache = AssetCache()
+
+###############################################################################
+class Bitmaplet(IMovable):
+    '''
+    A bitmap asset as a matter, its pixels are loaded on the first draw and shared via the cache.
+
+    :param asset: a `BitmapAsset`, or the path or the bytes of one
+    :param c: the color that `Bitmap` draws the set bits in
+    :param cache: `asset_cache` by default
+    '''
+
+    def __init__(self, asset, c = 1, cache = None):
+        super(Bitmaplet, self).__init__()
+        self.enable_resizing(False)
+        self.__asset = asset if isinstance(asset, BitmapAsset) else BitmapAsset(asset)
+        self.__c = c
+        self.__cache = cache if cache is not None else asset_cache
+
+    def get_extent(self, x, y):
+        return float(self.__asset.width), float(self.__asset.height)
+
+    def get_asset(self):
+        return self.__asset
+
+    def draw(self, ledscr, flx, fly, flWidth, flHeight):
+        ledscr.Bitmap(round(flx), round(fly), self.__cache.acquire(self.__asset),
+                      self.__asset.width, self.__asset.height, self.__c)
+
+###############################################################################
+def encode_asset(pixels, width, height, rle = False):
+    '''
+    :param pixels: rows of `(width + 7) // 8` bytes, as `Bitmap` takes
+    :param rle: compress the pixels, which is kept only if it saves bytes
+    :return: the asset as `bytes`
+    '''
+
+    size = ((width + 7) // 8) * height
+    stored = bytes(pixels[0:size])
+    flags = 0
+
+    if rle:
+        packed = pack_bits(stored)
+
+        if len(packed) < len(stored):
+            stored, flags = bytes(packed), ASSET_RLE
+
+    return struct.pack(_HEADER_FORMAT, ASSET_MAGIC, ASSET_VERSION, flags, width, height, len(stored)) + stored
+
+def pack_bits(data):
+    '''
+    PackBits: a control byte n < 128 is followed by n + 1 literal bytes,
+    n > 128 is followed by one byte repeated 257 - n times
+    '''
+
+    packed = bytearray()
+    i, n = 0, len(data)
+
+    while i < n:
+        run = 1
+
+        while i + run < n and run < 128 and data[i + run] == data[i]:
+            run += 1
+
+        if run > 1:
+            packed.append(257 - run)
+            packed.append(data[i])
+            i += run
+        else:
+            start = i
+            i += 1
+
+            # literals stop before a run of three, a run of two costs as much as two literals
+            while i < n and i - start < 128 and not (i + 2 < n and data[i] == data[i + 1] == data[i + 2]):
+                i += 1
+
+            packed.append(i - start - 1)
+            packed.extend(data[start:i])
+
+    return packed
+
+class _PackBitsUnpacker(object):
+    # unpacks chunk by chunk, so that files can be streamed through a small buffer
+    def __init__(self, out, size):
+        self.out, self.size = out, size
+        self.pos = 0
+        self.__literal, self.__repeat = 0, 0
+
+    def done(self):
+        return self.pos >= self.size
+
+    def feed(self, chunk, n):
+        out, pos, size = self.out, self.pos, self.size
+        literal, repeat = self.__literal, self.__repeat
+        i = 0
+
+        while i < n and pos < size:
+            b = chunk[i]
+            i += 1
+
+            if literal > 0:
+                out[pos] = b
+                pos += 1
+                literal -= 1
+            elif repeat > 0:
+                for _ in range(min(repeat, size - pos)):
+                    out[pos] = b
+                    pos += 1
+
+                repeat = 0
+            elif b < 128:
+                literal = b + 1
+            elif b > 128:
+                repeat = 257 - b
+
+        self.pos = pos
+        self.__literal, self.__repeat = literal, repeat
@@ -0,0 +1,356 @@
+# Benchmarks for Cosmos and the shipped demos, run on a desktop Python with the simulator
+#
+#   python benchmark.py                     # all scenes and all demos
+#   python benchmark.py scenes 10 100 500   # selected scene sizes
+#   python benchmark.py demos               # all demos
+#   python benchmark.py demo ghost_football # one demo, in this process
+#   python benchmark.py profile water_circulation # one demo, with the frame profiler
+#   python benchmark.py alloc 100           # garbage per steady-state tick on CPython, fails above the budget
+#   python benchmark.py particles 4000      # a particle fountain of up to 4000 particles
+
+import simulator
+sim = simulator.install()
+
+from cosmos import *
+
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+###############################################################################
+SCENE_SIZES = (10, 100, 500, 2000)
+# bytes per tick above an empty scene, a guard against costs growing with the matters:
+# the numbers of the motion pass are boxed, by CPython here and by the board as well
+ALLOCATION_BUDGET = 256
+DEMOS = ('ghost_football', 'water_circulation', 'mycorrhizal_network')
+
+###############################################################################
+class BenchCosmos(Cosmos):
+    '''
+    A scene of mixed shapes, every third shape is moving and bounces off the borders.
+
+    :param population: the number of matters
+    :param seed: makes the scene, and hence the numbers, reproducible
+    '''
+
+    def __init__(self, population, seed = 1):
+        self.population, self.seed = population, seed
+        super(BenchCosmos, self).__init__(24)
+
+    def load(self, width, height):
+        rng = random.Random(self.seed)
+
+        for i in range(self.population):
+            m = make_matter(rng, i)
+            self.insert(m, rng.randint(0, width - 8), rng.randint(0, height - 8))
+
+            if i % 3 == 0:
+                m.set_border_strategy(BorderStrategy.BOUNCE)
+                m.set_speed(rng.uniform(0.5, 3.0), rng.uniform(0.0, 360.0))
+
+class ParticleCosmos(Cosmos):
+    ''' A fountain: particles spawn at the bottom center, fly up, fall back and die on leaving the screen '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        super(ParticleCosmos, self).__init__(24)
+
+    def load(self, width, height):
+        self.particles = ParticleSystem(width, height, self.capacity)
+        self.particles.add_emitter(RectEmitter(width // 2 - 4, height - 2, 8, 2, self.capacity * 8, 0.0, -3.0, 1.0))
+        self.particles.add_force(Gravity(0.0, 0.12))
+        self.particles.add_force(Drag(0.99))
+        self.insert(self.particles, 0, 0)
+
+def make_matter(rng, i):
+    kind = i % 4
+
+    if kind == 0:
+        m = Circlet(rng.randint(2, 6), rng.random() < 0.5)
+    elif kind == 1:
+        m = Rectanglet(rng.randint(2, 12), rng.randint(2, 12), rng.random() < 0.5)
+    elif kind == 2:
+        m = Linelet(rng.randint(-10, 10), rng.randint(-10, 10))
+    else:
+        m = Labellet(str(i % 100))
+
+    return m
+
+###############################################################################
+class Stopwatch(object):
+    ''' Collects wall-clock samples in milliseconds '''
+
+    def __init__(self):
+        super(Stopwatch, self).__init__()
+        self.samples = []
+
+    def time(self, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        self.samples.append((time.perf_counter() - t0) * 1000.0)
+
+        return result
+
+    def mean(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, p):
+        value = 0.0
+
+        if self.samples:
+            ordered = sorted(self.samples)
+            value = ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+        return value
+
+class AllocationMeter(object):
+    '''
+    Bytes allocated while running a function, the tracemalloc peak above the starting point,
+    i.e. the transient garbage.
+
+    This is the heap of CPython, not the one of the board: freelists hide recycled floats
+    and tuples, so the numbers track regressions rather than prove that nothing is allocated.
+    '''
+
+    def __init__(self):
+        super(AllocationMeter, self).__init__()
+        self.total, self.calls = 0, 0
+
+    def measure(self, fn, *args):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        fn(*args)
+        self.total += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        self.calls += 1
+
+    def per_call(self):
+        return self.total / self.calls if self.calls else 0.0
+
+###############################################################################
+def bench_scene(population, ticks):
+    universe = BenchCosmos(population)
+    universe.enable_frame_coalescing(True)
+    universe.big_bang()
+    universe.cancel_timer()
+
+    width, height = universe.get_extent()
+    rng = random.Random(population)
+    interval = 1000 // 24
+    elapse, render, frame = Stopwatch(), Stopwatch(), Stopwatch()
+    finding, bounding, rescanning, churning = Stopwatch(), Stopwatch(), Stopwatch(), Stopwatch()
+    allocations = AllocationMeter()
+
+    for count in range(1, ticks + 1):
+        t0 = time.perf_counter()
+        elapse.time(universe._on_elapse, interval, count, count * interval)
+        render.time(universe.refresh)
+        frame.samples.append((time.perf_counter() - t0) * 1000.0)
+
+    for count in range(ticks + 1, ticks + 1 + min(ticks, 20)):
+        allocations.measure(universe._on_elapse, interval, count, count * interval)
+
+    for _ in range(ticks):
+        finding.time(universe.find_matter, rng.uniform(0, width), rng.uniform(0, height))
+        bounding.time(universe.get_matters_boundary)
+        universe.size_cache_invalid()
+        rescanning.time(universe.get_matters_boundary)
+
+        m = Circlet(3, True)
+        churning.time(churn, universe, m, rng.uniform(0, width), rng.uniform(0, height))
+
+    report = (population, 1000.0 / frame.mean() if frame.mean() > 0.0 else 0.0,
+              elapse.mean(), render.mean(), frame.percentile(50), frame.percentile(90), frame.percentile(99),
+              finding.mean(), bounding.mean(), rescanning.mean(), churning.mean(), allocations.per_call())
+
+    universe.erase()
+
+    return report
+
+def churn(universe, m, x, y):
+    universe.insert(m, x, y)
+    universe.remove(m)
+
+def run_particles(capacities, ticks):
+    print("%9s %9s %9s %9s %9s" % ('capacity', 'alive', 'ticks/s', 'elapse', 'draw'))
+
+    for capacity in capacities:
+        universe = ParticleCosmos(capacity)
+        universe.big_bang()
+        universe.cancel_timer()
+
+        interval = 1000 // 24
+        elapse, render = Stopwatch(), Stopwatch()
+
+        for count in range(1, ticks + 1):
+            elapse.time(universe._on_elapse, interval, count, count * interval)
+            render.time(universe.refresh)
+
+        frame = elapse.mean() + render.mean()
+        print("%9d %9d %9.1f %9.3f %9.3f" % (capacity, universe.particles.count,
+                                           1000.0 / frame if frame > 0.0 else 0.0, elapse.mean(), render.mean()))
+        universe.erase()
+
+    print("(times in ms)")
+
+def run_scenes(sizes, ticks):
+    print("%6s %9s %9s %9s %9s %9s %9s %9s %9s %9s %10s %10s" %
+          ('matters', 'ticks/s', 'elapse', 'draw', 'p50', 'p90', 'p99',
+           'find', 'bbox', 'bbox-full', 'ins+rm', 'alloc/tick'))
+
+    for population in sizes:
+        steps = ticks if ticks > 0 else max(10, 20000 // max(population, 1))
+        print("%6d %9.1f %9.3f %9.3f %9.3f %9.3f %9.3f %9.4f %9.4f %9.4f %10.4f %10.0f" % bench_scene(population, steps))
+
+    print("(times in ms, alloc in bytes)")
+
+def steady_ticks(universe, first, ticks, interval):
+    for count in range(first, first + ticks):
+        universe._on_elapse(interval, count, count * interval)
+        universe.refresh()
+
+def run_allocations(population, budget, ticks = 50):
+    '''
+    Measure the garbage of a tick, `elapse` and `refresh`, once the scene has warmed up.
+
+    The garbage of an empty scene is taken off, what remains is what the matters cost,
+    which also takes off the frames and the boxed numbers of the interpreter itself.
+    The boxed floats of the motion pass remain, a tick is not free of allocations.
+
+    :param budget: bytes per tick, the process exits with 1 above it
+    :return: the bytes per tick
+    '''
+
+    baseline = measure_ticks(0, ticks)
+    per_tick = max(0.0, measure_ticks(population, ticks) - baseline)
+
+    print("%6d matters: %.1f bytes/tick above an empty scene of %.1f (budget %d)" % (population, per_tick, baseline, budget))
+
+    return per_tick
+
+def measure_ticks(population, ticks):
+    universe = BenchCosmos(population)
+    universe.enable_dirty_rendering(True)
+    universe.big_bang()
+    universe.cancel_timer()
+
+    interval = 1000 // 24
+    allocations = AllocationMeter()
+
+    # caches, sprites and the motion engine settle down in the first ticks,
+    # the snapshots of the simulated panel are not garbage of the board
+    steady_ticks(universe, 1, ticks, interval)
+    sim.oled.snapshots = False
+
+    for count in range(ticks + 1, ticks + 1 + ticks):
+        allocations.measure(steady_ticks, universe, count, 1, interval)
+
+    sim.oled.snapshots = True
+    universe.erase()
+
+    return allocations.per_call()
+
+###############################################################################
+def replay_ghost_football(seconds):
+    from ghost_football import FootballShot
+
+    universe = FootballShot(24)
+    universe.big_bang()
+
+    for i in range(seconds):
+        angle = i * 0.7
+        sim.at(i * 1000 + 500, lambda a = angle: sim.tilt(0.3 * (a % 2.0 - 1.0), 0.3 * ((a * 1.3) % 2.0 - 1.0)))
+
+    return universe
+
+def replay_water_circulation(seconds):
+    from water_circulation import WaterCirculation
+
+    universe = WaterCirculation(24)
+    universe.big_bang()
+
+    for i in range(seconds * 4):
+        pad = 'PYTHON'[i % 6]
+        sim.at(i * 250, lambda p = pad: sim.touch(p))
+        sim.at(i * 250 + 120, lambda p = pad: sim.touch(p, False))
+
+    sim.at(seconds * 600, lambda: sim.press('A'))
+    sim.at(seconds * 600 + 100, lambda: sim.release('A'))
+
+    return universe
+
+def replay_mycorrhizal_network(seconds):
+    import mycorrhizal_network
+
+    mycorrhizal_network.main()
+    sim.at(200, lambda: sim.press('A'))
+    sim.at(300, lambda: sim.release('A'))
+    sim.light.value = lambda ms: 50 if (ms // 2000) % 2 else 500
+
+    # not a universe, nothing to profile
+    return None
+
+def run_demo(name, seconds, profiling = False):
+    shows = Stopwatch()
+    last = [time.perf_counter()]
+
+    def on_show(oled):
+        now = time.perf_counter()
+        shows.samples.append((now - last[0]) * 1000.0)
+        last[0] = now
+
+    sim.oled.on_show = on_show
+    universe = globals()['replay_' + name](seconds)
+
+    if profiling and universe is not None:
+        sim.clock.wall_us = True
+        universe.enable_profiling(True)
+
+    t0 = time.perf_counter()
+    last[0] = t0
+    sim.run(seconds * 1000)
+    wall = time.perf_counter() - t0
+
+    print("%-20s %6d %8.2f %9.1f %9.3f %9.3f %9.3f %11d" %
+          (name, sim.oled.shows, wall, seconds / wall if wall > 0.0 else 0.0,
+           shows.percentile(50), shows.percentile(90), shows.percentile(99), sim.oled.i2c.bytes_written))
+
+    if profiling and universe is not None:
+        print()
+        universe.dump_profile()
+
+def run_demos(names, seconds):
+    print("%-20s %6s %8s %9s %9s %9s %9s %11s" %
+          ('demo', 'frames', 'wall(s)', 'x realtime', 'p50', 'p90', 'p99', 'i2c bytes'))
+    sys.stdout.flush()
+
+    for name in names:
+        # every demo gets a fresh board: module state, timers and the clock
+        subprocess.call([sys.executable, __file__, 'demo', name, str(seconds)])
+
+    print("(frame times in wall-clock ms)")
+
+###############################################################################
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'all'
+
+    if command == 'scenes':
+        run_scenes([int(n) for n in sys.argv[2:]] or SCENE_SIZES, 0)
+    elif command == 'demos':
+        run_demos(DEMOS, 20)
+    elif command == 'demo':
+        run_demo(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    elif command == 'profile':
+        run_demo(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 20, True)
+    elif command == 'particles':
+        run_particles([int(n) for n in sys.argv[2:]] or (256, 1000, 4000), 100)
+    elif command == 'alloc':
+        budget = int(sys.argv[3]) if len(sys.argv) > 3 else ALLOCATION_BUDGET
+        sys.exit(1 if run_allocations(int(sys.argv[2]) if len(sys.argv) > 2 else 100, budget) > budget else 0)
+    else:
+        run_scenes(SCENE_SIZES, 0)
+        print()
+        run_demos(DEMOS, 20)
@@ -3,6 +3,19 @@
 from universe import *
 from matter import *
 
+from array import array
+
+import framebuf
+import sys
+
+if sys.implementation.name == "cpython":
+    try:
+        import numpy as _numpy
+    except ImportError:
+        _numpy = None
+else:
+    _numpy = None
+
 ###############################################################################
 class Cosmos(Universe):
     def __init__(self, fps = 24, background = None, width = 128, height = 64):
@@ -11,6 +24,28 @@ class Cosmos(Universe):
         self.__head_matter = None
         self.__translate_x, self.__translate_y = 0.0, 0.0
         self.__scale_x, self.__scale_y = 1.0, 1.0
+        self.__hovering_matter = None
+        self.__matter_index = None
+        self.__matter_serial = 0
+        self.__motion = _MotionEngine()
+        self.__colliders = None
+        self.__collision_pairs, self.__collision_active = [], []
+        self.__narrowphase = True
+        self.__layers = None
+        self.__layer_order = None
+        self.__scratch = None
+        self.__dirty_rendering = False
+        self.__dleft, self.__dtop, self.__dright, self.__dbottom = 0, 0, -1, -1
+        self.__damaged_fully = True
+        # a subclass drawing on its own cannot be clipped to the damaged region,
+        # nor can its background unless it restores regions as well
+        cls = type(self)
+        self.__custom_drawing = cls.draw is not Cosmos.draw or \
+            (cls._on_refresh is not Cosmos._on_refresh and cls._on_refresh_region is Cosmos._on_refresh_region)
+        self.__updating_us = 0
+        self.__updaters = []
+        self.__integrating, self.__motion_pruning = False, False
+        self.__updating, self.__updater_pruning = False, False
         self.size_cache_invalid()
         
     def __del__(self):
@@ -26,25 +61,42 @@ class Cosmos(Universe):
         pass
 
     def draw(self, ledscr, X, Y, Width, Height):
-        dsX, dsY = max(0.0, X), max(0.0, Y)
-        dsWidth, dsHeight = X + Width, Y + Height
-
-        if self.__head_matter:
-            child = self.__head_matter
-
-            while True:
-                info = child.info
-                mwidth, mheight = child.get_extent(info.x, info.y)
+        self.__draw_matters(ledscr, X, Y, max(0.0, X), max(0.0, Y), X + Width, Y + Height)
+
+    def refresh(self):
+        if self.__dirty_rendering:
+            if self.__damaged_fully or self.__custom_drawing:
+                super(Cosmos, self).refresh()
+            elif self.__dright >= self.__dleft:
+                width, height = self.get_extent()
+                self.__expand_damage(width, height)
+                x, y = self.__dleft, self.__dtop
+                w, h = self.__dright - x, self.__dbottom - y
+
+                if self._profiler is not None:
+                    t0 = time.ticks_us()
+                    restored = self._on_refresh_region(oled, x, y, w, h)
+                    self._profiler.record(ProfilePhase.BACKGROUND, t0)
+                else:
+                    restored = self._on_refresh_region(oled, x, y, w, h)
 
-                mx = (info.x + self.__translate_x) * self.__scale_x + X
-                my = (info.y + self.__translate_y) * self.__scale_y + Y
+                if restored:
+                    if self._profiler is not None:
+                        t0 = time.ticks_us()
+                        self.__draw_matters(oled, 0.0, 0.0, x, y, x + w, y + h, True)
+                        self._profiler.record(ProfilePhase.DRAW, t0)
+                    else:
+                        self.__draw_matters(oled, 0.0, 0.0, x, y, x + w, y + h, True)
 
-                if rectangle_overlay(mx, my, mx + mwidth, my + mheight, dsX, dsY, dsWidth, dsHeight):
-                    child.draw(ledscr, mx, my, mwidth, mheight)
+                    self.show()
+                else:
+                    super(Cosmos, self).refresh()
 
-                child = info.next
-                if child == self.__head_matter:
-                    break
+            self.__damaged_fully = False
+            self.__dleft, self.__dtop = 0, 0
+            self.__dright, self.__dbottom = -1, -1
+        else:
+            super(Cosmos, self).refresh()
     
     def can_exit(self): return False
 
@@ -52,23 +104,66 @@ class Cosmos(Universe):
     def find_matter(self, x, y):
         found = None
 
-        if self.__head_matter:
+        if self.__matter_index:
+            lx, ly = self.__local_point(x, y)
+            
+            for child in self.__matter_index.matters_at(lx, ly):
+                if found is None or child.info.z > found.info.z:
+                    if self.__matter_hit(child, x, y):
+                        found = child
+        elif self.__head_matter:
             head_info = self.__head_matter.info
             child = head_info.prev
 
             while True:
                 info = child.info
 
+                if self.__matter_hit(child, x, y):
+                    found = child
+                    break
+
+                child = info.prev
+
+                if child == head_info.prev:
+                    break
+
+        return found
+
+    def find_matters(self, x, y, width, height):
+        '''
+        Find all findable game objects overlapping the rectangle, the topmost comes first
+
+        :param x: the left of the rectangle in screen coordinates
+        :param y: the top of the rectangle in screen coordinates
+        :param width: the width of the rectangle
+        :param height: the height of the rectangle
+        '''
+        
+        found = []
+        lx, ly = self.__local_point(x, y)
+        rx, by = lx + width, ly + height
+
+        if self.__matter_index:
+            for child in self.__matter_index.matters_in(lx, ly, rx, by):
                 if not child.concealled():
-                    sx, sy, sw, sh = _unsafe_get_matter_bound(child, info)
+                    sx, sy, sw, sh = _unsafe_get_matter_bound(child, child.info)
+
+                    if rectangle_overlay(sx, sy, sx + sw, sy + sh, lx, ly, rx, by):
+                        found.append(child)
+
+            found.sort(key = _matter_zorder, reverse = True)
+        elif self.__head_matter:
+            head_info = self.__head_matter.info
+            child = head_info.prev
 
-                    sx += (self.__translate_x * self.__scale_x)
-                    sy += (self.__translate_y * self.__scale_y)
+            while True:
+                info = child.info
 
-                    if flin(sx, x, sx + sw) and flin(sy, y, sy + sh):
-                        if child.is_colliding_with_mouse(x - sx, y - sy):
-                            found = child
-                            break
+                if not child.concealled():
+                    sx, sy, sw, sh = _unsafe_get_matter_bound(child, info)
+
+                    if rectangle_overlay(sx, sy, sx + sw, sy + sh, lx, ly, rx, by):
+                        found.append(child)
 
                 child = info.prev
 
@@ -77,6 +172,146 @@ class Cosmos(Universe):
 
         return found
 
+    def enable_dirty_rendering(self, yes_or_no):
+        '''
+        Only clear and redraw the region damaged by moving, resizing, restyling, inserting
+        or removing game objects, instead of the whole screen, when refreshing.
+        A subclass overriding `draw` is always refreshed fully, since its own drawing cannot be clipped,
+        so is one overriding `_on_refresh` unless it overrides `_on_refresh_region` as well
+
+        :param yes_or_no: whether to track the damaged region
+        '''
+
+        self.__dirty_rendering = yes_or_no
+        self.damage_fully()
+
+    def damage_fully(self):
+        self.__damaged_fully = True
+
+    def damage(self, x, y, width, height):
+        sw, sh = self.get_extent()
+        l, t = max(int(x) - 1, 0), max(int(y) - 1, 0)
+        r, b = min(int(x + width) + 2, sw), min(int(y + height) + 2, sh)
+
+        if l < r and t < b:
+            if self.__dright < self.__dleft:
+                self.__dleft, self.__dtop = l, t
+                self.__dright, self.__dbottom = r, b
+            else:
+                self.__dleft, self.__dtop = min(self.__dleft, l), min(self.__dtop, t)
+                self.__dright, self.__dbottom = max(self.__dright, r), max(self.__dbottom, b)
+
+    def set_matter_layer(self, m, layer):
+        '''
+        Assign the game object to a render layer, layers are drawn from the lowest to the highest,
+        and the game objects in the same layer are drawn in their inserting order
+
+        :param m: the game object
+        :param layer: the layer, an integer, all game objects are in layer 0 by default
+        '''
+
+        info = _cosmos_matter_info(self, m)
+
+        if info and info.layer != layer:
+            self.__ensure_layer(layer)
+            self.__invalidate_layer(info.layer)
+            info.layer = layer
+            self.__invalidate_layer(layer)
+            self.damage_fully()
+            self.notify_updated()
+
+    def set_background(self, background):
+        base = self.__base_static_layer()
+
+        if base is not None:
+            # the base static layer caches the background too
+            base.valid = False
+
+        self.damage_fully()
+        super(Cosmos, self).set_background(background)
+
+    def set_layer_static(self, layer, yes_or_no = True):
+        '''
+        Mark the layer as static, whose game objects are rendered once into an off-screen buffer,
+        and then the buffer is composited every frame until one of them changes.
+        If the lowest layer is static, it caches the background too, and is restored by a buffer copy.
+        A static layer above it also records the pixels its objects clear, at the cost of a second buffer;
+        objects inverting pixels are composited as if drawn over cleared pixels
+
+        :param layer: the layer
+        :param yes_or_no: whether the layer is static
+        '''
+
+        rlayer = self.__ensure_layer(layer)
+
+        if rlayer.static != yes_or_no:
+            rlayer.static = yes_or_no
+            rlayer.valid = False
+            self.damage_fully()
+            self.notify_updated()
+
+    def enable_collision_detection(self, yes_or_no, narrowphase = True):
+        '''
+        Detect collisions among the game objects that enabled collision after every motion pass,
+        and deliver `on_collision(other)` to both objects of each colliding pair
+
+        :param yes_or_no: whether to detect collisions
+        :param narrowphase: whether to check the shapes of `Circlet`, `Rectanglet`, `Trianglet` and `Linelet`
+                            after their bounds overlap, otherwise overlapping bounds are collisions
+        '''
+
+        self.__narrowphase = narrowphase
+
+        if yes_or_no:
+            self.__colliders = []
+
+            if self.__head_matter:
+                child = self.__head_matter
+
+                while True:
+                    if child.collidable():
+                        self.__colliders.append(child)
+
+                    child = child.info.next
+                    if child == self.__head_matter:
+                        break
+        else:
+            self.__colliders = None
+
+    def enable_matter_index(self, yes_or_no, cell_size = 16):
+        '''
+        Maintain a uniform grid over the game objects to speed up `find_matter` and `find_matters`
+
+        :param yes_or_no: whether to maintain the index
+        :param cell_size: the edge size of the grid cells, in pixels
+        '''
+        
+        if self.__head_matter:
+            child = self.__head_matter
+
+            while True:
+                info = child.info
+                info.cells = None
+                
+                child = info.next
+                if child == self.__head_matter:
+                    break
+
+        if yes_or_no:
+            self.__matter_index = _MatterGrid(cell_size)
+
+            if self.__head_matter:
+                child = self.__head_matter
+
+                while True:
+                    self.__matter_index.update(child, *_unsafe_get_matter_bound(child, child.info))
+
+                    child = child.info.next
+                    if child == self.__head_matter:
+                        break
+        else:
+            self.__matter_index = None
+
     def get_matter_location(self, m, anchor):
         info = _cosmos_matter_info(self, m)
         x, y = False, 0.0
@@ -111,7 +346,11 @@ class Cosmos(Universe):
             fx, fy = _matter_anchor_fraction(anchor)
             
             info = _bind_matter_owership(self, m)
+            info.z = self.__matter_serial
+            self.__matter_serial += 1
+            
             if not self.__head_matter:
+                self.size_cache_invalid()
                 self.__head_matter = m
                 info.prev = self.__head_matter
             else:
@@ -123,11 +362,22 @@ class Cosmos(Universe):
                 head_info.prev = m
             info.next = self.__head_matter
 
+            if type(m).update is not IMatter.update:
+                self.__updaters.append(m)
+
+            if isinstance(m, IMovable) and _matter_moving(m):
+                self.__motion.attach(m, info)
+
+            if self.__colliders is not None and m.collidable():
+                self.__colliders.append(m)
+
             self.begin_update_sequence()
             m.pre_construct()
             m.construct()
             m.post_construct()
-            _unsafe_move_matter_via_info(self, m, info, x, y, fx, fy, dx, dy)
+            
+            if not _unsafe_move_matter_via_info(self, m, info, x, y, fx, fy, dx, dy):
+                self.notify_matter_bound_changed(m)
             
             if m.ready():
                 if self.__scale_x != 1.0 or self.__scale_y != 1.0:
@@ -146,7 +396,7 @@ class Cosmos(Universe):
         info = _cosmos_matter_info(self, m)
 
         if info:
-            if _unsafe_do_moving_via_info(self, info, x, y, False):
+            if _unsafe_do_moving_via_info(self, m, info, x, y, False):
                 self.notify_updated()
         elif self.__head_matter:
             child = self.__head_matter
@@ -155,13 +405,13 @@ class Cosmos(Universe):
                 info = child.info
 
                 if info.selected:
-                    _unsafe_do_moving_via_info(self, info, x, y, False)
+                    _unsafe_do_moving_via_info(self, child, info, x, y, False)
 
                 child = info.next
                 if child == self.__head_matter:
                     break
             
-            self.notify_update()
+            self.notify_updated()
     
     def move_to(self, matter, target, anchor = MatterAnchor.LT, dx = 0.0, dy = 0.0):
         '''
@@ -224,8 +474,8 @@ class Cosmos(Universe):
         info = _cosmos_matter_info(self, m)
 
         if info:
-            prev_info = info.prev
-            next_info = info.next
+            prev_info = info.prev.info
+            next_info = info.next.info
 
             prev_info.next = info.next
             next_info.prev = info.prev
@@ -238,14 +488,80 @@ class Cosmos(Universe):
 
             if self.__hovering_matter == m:
                 self.__hovering_matter = None
+
+            if self.__matter_index:
+                self.__matter_index.remove(m, info)
+
+            self.__detach_motion(m, info)
+
+            if m in self.__updaters:
+                if self.__updating:
+                    # the pass in progress keeps its indices, the gap is closed after the pass
+                    self.__updaters[self.__updaters.index(m)] = None
+                    self.__updater_pruning = True
+                else:
+                    self.__updaters.remove(m)
+
+            if self.__colliders is not None and m in self.__colliders:
+                self.__colliders.remove(m)
+
+            if self.__layers is not None:
+                self.__invalidate_layer(info.layer)
+
+            if self.__dirty_rendering:
+                self.__damage_drawn(info)
+
+            if self.__head_matter is None or self.__matter_on_boundary(info):
+                self.size_cache_invalid()
+
+            # no longer a matter of this cosmos, say, for a callback later in the same pass
+            info.prev, info.next = None, None
             
             self.notify_updated()
-            self.size_cache_invalid()
     
     def erase(self):
+        head = child = self.__head_matter
+
+        # no longer matters of this cosmos, as if each were removed
+        while child is not None:
+            info = child.info
+            child = info.next if info.next is not head else None
+            info.prev, info.next = None, None
+
         self.__head_matter = None
+
+        if self.__integrating:
+            # the slots of the pass in progress must stay where they are, release them after the pass
+            for m in self.__motion.matters:
+                if m is not None:
+                    self.__motion.retire(m.info)
+
+            self.__motion_pruning = True
+        else:
+            self.__motion.clear()
+
+        if self.__updating:
+            for i in range(len(self.__updaters)):
+                self.__updaters[i] = None
+
+            self.__updater_pruning = True
+        else:
+            self.__updaters = []
+
         self.size_cache_invalid()
 
+        if self.__colliders is not None:
+            self.__colliders = []
+
+        if self.__layers is not None:
+            for layer in self.__layer_order:
+                self.__layers[layer].valid = False
+
+        if self.__matter_index:
+            self.__matter_index.clear()
+
+        self.damage_fully()
+
     def size_cache_invalid(self):
         self.__mright = self.__mleft - 1.0
 
@@ -253,10 +569,40 @@ class Cosmos(Universe):
     def _on_big_bang(self, width, height):
         self.load(width, height)
 
+    def _on_refresh(self, ledscr, width, height):
+        base = self.__base_static_layer()
+
+        if base is None:
+            super(Cosmos, self)._on_refresh(ledscr, width, height)
+        elif base.valid:
+            ledscr.buffer[:] = base.cache
+        else:
+            self.__render_static_layer(ledscr, base, self.__layer_order[0], True)
+
+    def _on_refresh_region(self, ledscr, x, y, width, height):
+        base = self.__base_static_layer()
+        restored = False
+
+        if base is None:
+            restored = super(Cosmos, self)._on_refresh_region(ledscr, x, y, width, height)
+        elif base.valid:
+            base.restore(ledscr.buffer, x, y, width, height)
+            restored = True
+
+        return restored
+
     def _on_elapse(self, interval, count, uptime):
         self.begin_update_sequence()
         self.__on_elapse(count, interval, uptime)
-        self.update(count, interval, uptime)
+
+        if self._profiler is None:
+            self.update(count, interval, uptime)
+        else:
+            t0 = time.ticks_us()
+            self.update(count, interval, uptime)
+            # plus the time spent in updating matters, measured in `__on_elapse`
+            self._profiler.add(ProfilePhase.UPDATE, time.ticks_diff(time.ticks_us(), t0) + self.__updating_us)
+
         self.end_update_sequence()
     
     def notify_matter_ready(self, m):
@@ -275,7 +621,230 @@ class Cosmos(Universe):
 
     def on_matter_ready(self, m): pass
 
+    def notify_matter_bound_changed(self, m):
+        info = _cosmos_matter_info(self, m)
+
+        if info:
+            width, height = m.get_extent(info.x, info.y)
+            self.__update_matter_bound(m, info, info.x, info.y, width, height)
+
+    def notify_matter_motion_changed(self, m):
+        info = _cosmos_matter_info(self, m)
+
+        if info:
+            if _matter_moving(m):
+                if info.slot < 0:
+                    self.__motion.attach(m, info)
+                else:
+                    self.__motion.sync_motion(m, info)
+            elif info.slot >= 0:
+                if self.__integrating:
+                    # the slots of the pass in progress must stay where they are, detach after the pass
+                    self.__motion.sync_motion(m, info)
+                    self.__motion_pruning = True
+                else:
+                    self.__motion.detach(m, info)
+
+    def notify_matter_collision_changed(self, m):
+        info = _cosmos_matter_info(self, m)
+
+        if info and self.__colliders is not None:
+            if m.collidable():
+                if m not in self.__colliders:
+                    self.__colliders.append(m)
+            elif m in self.__colliders:
+                self.__colliders.remove(m)
+
 # private
+    def __detach_motion(self, m, info):
+        if self.__integrating:
+            # the slots of the pass in progress must stay where they are, release it after the pass
+            self.__motion.retire(info)
+            self.__motion_pruning = True
+        else:
+            self.__motion.detach(m, info)
+
+    def __draw_matters(self, ledscr, X, Y, left, top, right, bottom, partial = False):
+        if self.__layers is None:
+            self.__draw_layer(ledscr, X, Y, left, top, right, bottom, None)
+        else:
+            base = self.__layer_order[0]
+
+            for layer in self.__layer_order:
+                rlayer = self.__layers[layer]
+
+                if not rlayer.static:
+                    self.__draw_layer(ledscr, X, Y, left, top, right, bottom, layer)
+                elif layer != base:
+                    # the base static layer has been restored along with the background
+                    if not rlayer.valid:
+                        self.__render_static_layer(ledscr, rlayer, layer, False)
+
+                    if partial:
+                        # the region is aligned to pages, see `__expand_damage`
+                        rlayer.composite(ledscr.buffer, left, top, right - left, bottom - top)
+                    else:
+                        if rlayer.mask is not None:
+                            # the cleared pixels first, then the set ones
+                            ledscr.blit(rlayer.mask_surface, 0, 0, 1)
+
+                        ledscr.blit(rlayer.surface, 0, 0, 0)
+
+    def __draw_layer(self, ledscr, X, Y, left, top, right, bottom, layer):
+        if self.__head_matter:
+            child = self.__head_matter
+
+            while True:
+                info = child.info
+
+                if layer is None or info.layer == layer:
+                    # kept up to date by `notify_matter_bound_changed`
+                    mwidth, mheight = info.bw, info.bh
+
+                    mx = (info.x + self.__translate_x) * self.__scale_x + X
+                    my = (info.y + self.__translate_y) * self.__scale_y + Y
+
+                    if rectangle_overlay(mx, my, mx + mwidth, my + mheight, left, top, right, bottom):
+                        if self._profiler is None:
+                            child.draw(ledscr, mx, my, mwidth, mheight)
+                        else:
+                            t0 = time.ticks_us()
+                            child.draw(ledscr, mx, my, mwidth, mheight)
+                            self._profiler.record_matter(ProfilePhase.DRAW, child, t0)
+
+                        if self.__dirty_rendering:
+                            # the extent might be corrected by drawing, say, a label measuring its text
+                            mwidth, mheight = child.get_extent(info.x, info.y)
+                        
+                        info.lx, info.ly = mx, my
+                        info.lw, info.lh = mwidth, mheight
+
+                child = info.next
+                if child == self.__head_matter:
+                    break
+
+    def __render_static_layer(self, ledscr, rlayer, layer, with_background):
+        width, height = self.get_extent()
+        buffer = ledscr.buffer
+
+        if with_background:
+            super(Cosmos, self)._on_refresh(ledscr, width, height)
+        else:
+            if self.__scratch is None or len(self.__scratch) != len(buffer):
+                self.__scratch = bytearray(len(buffer))
+
+            self.__scratch[:] = buffer
+            ledscr.fill(0)
+
+        self.__draw_layer(ledscr, 0.0, 0.0, 0.0, 0.0, width, height, layer)
+        rlayer.snapshot(buffer, width, height)
+
+        if not with_background:
+            # drawn again over set pixels, what is left cleared is what the layer clears
+            ledscr.fill(1)
+            self.__draw_layer(ledscr, 0.0, 0.0, 0.0, 0.0, width, height, layer)
+            rlayer.snapshot_mask(buffer, width, height)
+            buffer[:] = self.__scratch
+
+    def __base_static_layer(self):
+        rlayer = None
+
+        if self.__layers is not None:
+            rlayer = self.__layers[self.__layer_order[0]]
+
+            if not rlayer.static:
+                rlayer = None
+
+        return rlayer
+
+    def __ensure_layer(self, layer):
+        if self.__layers is None:
+            self.__layers = { 0: _RenderLayer() }
+        
+        if layer not in self.__layers:
+            self.__layers[layer] = _RenderLayer()
+
+        self.__layer_order = sorted(self.__layers.keys())
+
+        return self.__layers[layer]
+
+    def __invalidate_layer(self, layer):
+        if self.__layers is not None:
+            rlayer = self.__layers.get(layer)
+
+            if rlayer and rlayer.static:
+                rlayer.valid = False
+                self.damage_fully()
+
+    def __damage_drawn(self, info):
+        if info.lw >= 0.0:
+            self.damage(info.lx, info.ly, info.lw, info.lh)
+
+    def __expand_damage(self, width, height):
+        # every matter touching the region gets redrawn as a whole, so the region
+        # has to cover them all lest they overdraw the untouched pixels outside,
+        # the region is also aligned to display pages, so that it can be restored by copying bytes
+        self.__dtop = self.__dtop & ~0x07
+        self.__dbottom = min((self.__dbottom + 7) & ~0x07, height)
+        expanded = True
+
+        while expanded and self.__head_matter:
+            child = self.__head_matter
+            expanded = False
+
+            while True:
+                info = child.info
+                x = (info.x + self.__translate_x) * self.__scale_x
+                y = (info.y + self.__translate_y) * self.__scale_y
+                w, h = info.bw, info.bh
+
+                if rectangle_overlay(x, y, x + w, y + h, self.__dleft, self.__dtop, self.__dright, self.__dbottom):
+                    l, t = self.__dleft, self.__dtop
+                    r, b = self.__dright, self.__dbottom
+                    self.damage(x, y, w, h)
+                    self.__dtop = self.__dtop & ~0x07
+                    self.__dbottom = min((self.__dbottom + 7) & ~0x07, height)
+                    
+                    if l != self.__dleft or t != self.__dtop or r != self.__dright or b != self.__dbottom:
+                        expanded = True
+
+                child = info.next
+                if child == self.__head_matter:
+                    break
+
+    def __matter_on_boundary(self, info, x = 0.0, y = 0.0, width = -1.0, height = -1.0):
+        # tells whether the last known bound supports an edge of the matters extent that
+        # the new bound, if any, no longer reaches, in which case the extent might shrink
+        on_boundary = False
+        
+        if info.bw >= 0.0:
+            if width < 0.0:
+                x, y, width, height = math.inf, math.inf, -math.inf, -math.inf
+
+            on_boundary = (info.bx == self.__mleft and x > self.__mleft) \
+                or (info.by == self.__mtop and y > self.__mtop) \
+                or (info.bx + info.bw == self.__mright and x + width < self.__mright) \
+                or (info.by + info.bh == self.__mbottom and y + height < self.__mbottom)
+
+        return on_boundary
+
+    def __local_point(self, x, y):
+        return x - self.__translate_x * self.__scale_x, y - self.__translate_y * self.__scale_y
+
+    def __matter_hit(self, child, x, y):
+        hit = False
+
+        if not child.concealled():
+            sx, sy, sw, sh = _unsafe_get_matter_bound(child, child.info)
+
+            sx += (self.__translate_x * self.__scale_x)
+            sy += (self.__translate_y * self.__scale_y)
+
+            if flin(sx, x, sx + sw) and flin(sy, y, sy + sh):
+                hit = child.is_colliding_with_mouse(x - sx, y - sy)
+
+        return hit
+
     def __recalculate_matters_extent_when_invalid(self):
         if self.__mright < self.__mleft:
             if self.__head_matter:
@@ -287,6 +856,8 @@ class Cosmos(Universe):
                     info = child.info
 
                     x, y, w, h = _unsafe_get_matter_bound(child, info)
+                    info.bx, info.by = x, y
+                    info.bw, info.bh = w, h
                     self.__mleft = min(self.__mleft, x)
                     self.__mright = max(self.__mright, x + w)
                     self.__mtop = min(self.__mtop, y)
@@ -299,58 +870,538 @@ class Cosmos(Universe):
                 self.__mleft, self.__mtop = 0.0, 0.0
                 self.__mright, self.__mbottom = 0.0, 0.0
 
-    def __on_elapse(self, count, interval, uptime):
-        if self.__head_matter:
-            child = self.__head_matter
+    def __update_matter_bound(self, m, info, x, y, width, height):
+        if self.__mright >= self.__mleft:
+            if self.__matter_on_boundary(info, x, y, width, height):
+                self.size_cache_invalid()
+            else:
+                self.__mleft, self.__mtop = min(self.__mleft, x), min(self.__mtop, y)
+                self.__mright, self.__mbottom = max(self.__mright, x + width), max(self.__mbottom, y + height)
 
-            while True:
-                dwidth, dheight = self.get_extent()
-                info = child.info
-                
+        info.bx, info.by = x, y
+        info.bw, info.bh = width, height
+
+        if info.slot >= 0:
+            self.__motion.sync_bound(info.slot, x, y, width, height)
+            
+        if self.__matter_index:
+            self.__matter_index.update(m, x, y, width, height)
+
+        if self.__layers is not None:
+            self.__invalidate_layer(info.layer)
+
+        if self.__dirty_rendering:
+            self.__damage_drawn(info)
+            self.damage((x + self.__translate_x) * self.__scale_x, (y + self.__translate_y) * self.__scale_y, width, height)
+
+    def __on_elapse(self, count, interval, uptime):
+        # only matters overriding `update` and matters in motion cost anything here
+        profiler = self._profiler
+        updaters = self.__updaters
+        motion = self.__motion
+        self.__updating_us = 0
+
+        if profiler is not None:
+            t0 = time.ticks_us()
+
+        # matters inserted during the pass are updated in the same pass
+        self.__updating = True
+        i = 0
+        while i < len(updaters):
+            child = updaters[i]
+            i += 1
+
+            # unless removed earlier in this pass
+            if child is None:
+                continue
+
+            if profiler is None:
+                child.update(count, interval, uptime)
+            else:
+                t1 = time.ticks_us()
                 child.update(count, interval, uptime)
+                profiler.record_matter(ProfilePhase.UPDATE, child, t1)
 
-                if isinstance(child, IMovable):
-                    xspd, yspd = child.x_speed(), child.y_speed()
-                    hdist, vdist = 0.0, 0.0
+        self.__updating = False
 
-                    if xspd != 0.0 or yspd != 0.0:
-                        info.x += xspd
-                        info.y += yspd
+        if self.__updater_pruning:
+            self.__updater_pruning = False
+            _compact(updaters)
 
-                        cwidth, cheight = child.get_extent(info.x, info.y)
-                            
-                        if info.x < 0:
-                            hdist = info.x
-                        elif info.x + cwidth > dwidth:
-                            hdist = info.x + cwidth - dwidth
+        if profiler is not None:
+            self.__updating_us = time.ticks_diff(time.ticks_us(), t0)
+            t0 = time.ticks_us()
 
-                        if info.y < 0:
-                            vdist = info.y
-                        elif info.y + cheight > dheight:
-                            vdist = info.y + cheight - dheight
+        if motion.count > 0:
+            dwidth, dheight = self.get_extent()
+            self.__integrating = True
 
-                        if hdist != 0.0 or vdist != 0.0:
-                            child.on_border(hdist, vdist)
-                            xspd = child.x_speed()
-                            yspd = child.y_speed()
+            for i in range(motion.integrate(dwidth, dheight)):
+                slot = motion.moved[i]
+                child = motion.matters[slot]
 
-                            if xspd == 0.0 or yspd == 0.0:
-                                if info.x < 0.0:
-                                    info.x = 0.0
-                                elif info.x + cwidth > dwidth:
-                                    info.x = dwidth - cwidth
+                # unless removed earlier in this pass
+                if child is not None:
+                    info = child.info
+                    hdist, vdist = motion.hdists[i], motion.vdists[i]
 
-                                if info.y < 0.0:
-                                    info.y = 0.0
-                                elif info.y + cheight > dheight:
-                                    info.y = dheight - cheight
+                    info.x, info.y = motion.xs[slot], motion.ys[slot]
+
+                    if hdist != 0.0 or vdist != 0.0:
+                        if motion.needs_border_callback(slot, hdist, vdist):
+                            child.on_border(hdist, vdist)
 
+                        if motion.matters[slot] is child and (motion.vxs[slot] == 0.0 or motion.vys[slot] == 0.0):
+                            cwidth, cheight = motion.ws[slot], motion.hs[slot]
+                            
+                            if info.x < 0.0:
+                                info.x = 0.0
+                            elif info.x + cwidth > dwidth:
+                                info.x = dwidth - cwidth
+
+                            if info.y < 0.0:
+                                info.y = 0.0
+                            elif info.y + cheight > dheight:
+                                info.y = dheight - cheight
+
+                    # `on_border` may have removed the matter
+                    if motion.matters[slot] is child:
+                        # the engine knows the extent, the matter needs not be asked
+                        self.__update_matter_bound(child, info, info.x, info.y, motion.ws[slot], motion.hs[slot])
                         self.notify_updated()
-                
-                child = info.next
 
-                if child == self.__head_matter:
-                    break
+            self.__integrating = False
+
+            if self.__motion_pruning:
+                self.__motion_pruning = False
+                motion.prune()
+
+        if profiler is not None:
+            profiler.record(ProfilePhase.MOTION, t0)
+
+        if self.__colliders:
+            if profiler is None:
+                self.__detect_collisions()
+            else:
+                t0 = time.ticks_us()
+                self.__detect_collisions()
+                profiler.record(ProfilePhase.COLLISION, t0)
+
+    def __detect_collisions(self):
+        # sweep and prune along x, the colliders are kept sorted by their left edges,
+        # which barely change between ticks, so the insertion sort is nearly linear
+        colliders = self.__colliders
+        motion = self.__motion
+        # kept from pass to pass and only grown, so that a steady pass allocates nothing
+        pairs, active = self.__collision_pairs, self.__collision_active
+        npairs, nactive = 0, 0
+
+        for i in range(1, len(colliders)):
+            m = colliders[i]
+            left = m.info.bx
+            j = i - 1
+
+            while j >= 0 and colliders[j].info.bx > left:
+                colliders[j + 1] = colliders[j]
+                j -= 1
+
+            colliders[j + 1] = m
+
+        for m in colliders:
+            info = m.info
+            left, top, bottom = info.bx, info.by, info.by + info.bh
+            moving = motion.moving(info.slot)
+            
+            k = 0
+            for a in range(nactive):
+                other = active[a]
+                oinfo = other.info
+
+                if oinfo.bx + oinfo.bw >= left:
+                    active[k] = other
+                    k += 1
+
+                    if moving or motion.moving(oinfo.slot):
+                        if flin(oinfo.by, top, oinfo.by + oinfo.bh) or flin(top, oinfo.by, bottom):
+                            if not self.__narrowphase or _matters_collided(m, info, other, oinfo):
+                                if npairs == len(pairs):
+                                    pairs.append(None)
+                                    pairs.append(None)
+
+                                pairs[npairs], pairs[npairs + 1] = other, m
+                                npairs += 2
+
+            if k == len(active):
+                active.append(m)
+            else:
+                active[k] = m
+
+            nactive = k + 1
+
+        for i in range(0, npairs, 2):
+            pairs[i].on_collision(pairs[i + 1])
+            pairs[i + 1].on_collision(pairs[i])
+
+        # the buffers hold on to no matter, removed ones included
+        for i in range(npairs):
+            pairs[i] = None
+
+        for i in range(nactive):
+            active[i] = None
+
+###################################################################################################
+class _MotionEngine(object):
+    '''
+    Positions, velocities, extents and border strategies of movable matters, packed in arrays
+    so that they are integrated in one batched pass. The integration leaves the moved slots
+    and how far they go beyond the borders in `moved`, `hdists` and `vdists`.
+    '''
+
+    def __init__(self, capacity = 16):
+        super(_MotionEngine, self).__init__()
+        self.count = 0
+        self.matters = []
+        self.capacity = 0
+        self.__reserve(capacity)
+
+# public
+    def attach(self, m, info):
+        if info.slot < 0:
+            if self.count == self.capacity:
+                self.__reserve(self.capacity * 2)
+
+            slot = self.count
+            self.count += 1
+            self.matters.append(m)
+            info.slot = slot
+
+            self.xs[slot], self.ys[slot] = info.x, info.y
+            self.ws[slot], self.hs[slot] = max(info.bw, 0.0), max(info.bh, 0.0)
+            self.handlers[slot] = 1 if type(m).on_border is not IMovable.on_border else 0
+            self.sync_motion(m, info)
+
+    def detach(self, m, info):
+        slot = info.slot
+
+        if slot >= 0:
+            self.__release(slot)
+            info.slot = -1
+
+    def retire(self, info):
+        ''' Leave the slot to `prune`, so that the slots of a pass in progress stay where they are '''
+        slot = info.slot
+
+        if slot >= 0:
+            self.matters[slot] = None
+            self.vxs[slot], self.vys[slot] = 0.0, 0.0
+            info.slot = -1
+
+    def prune(self):
+        ''' Detach the matters that have stopped, and release the retired slots '''
+        slot = self.count - 1
+
+        while slot >= 0:
+            if self.vxs[slot] == 0.0 and self.vys[slot] == 0.0:
+                m = self.matters[slot]
+                self.__release(slot)
+
+                if m is not None:
+                    m.info.slot = -1
+
+            slot -= 1
+
+    def clear(self):
+        for m in self.matters:
+            m.info.slot = -1
+
+        self.matters = []
+        self.count = 0
+
+    def sync_bound(self, slot, x, y, width, height):
+        self.xs[slot], self.ys[slot] = x, y
+        self.ws[slot], self.hs[slot] = width, height
+
+    def sync_motion(self, m, info):
+        slot = info.slot
+
+        if slot >= 0:
+            strategies = m.get_border_strategies()
+            
+            self.vxs[slot], self.vys[slot] = m.x_speed(), m.y_speed()
+
+            for i in range(4):
+                self.strategies[slot * 4 + i] = _border_strategy_code(strategies[i])
+
+    def integrate(self, width, height):
+        if _numpy is not None:
+            return self.__integrate_vectorized(width, height)
+        
+        xs, ys, vxs, vys, ws, hs = self.xs, self.ys, self.vxs, self.vys, self.ws, self.hs
+        moved, hdists, vdists = self.moved, self.hdists, self.vdists
+        n = 0
+
+        for slot in range(self.count):
+            xspd, yspd = vxs[slot], vys[slot]
+
+            if xspd != 0.0 or yspd != 0.0:
+                x = xs[slot] + xspd
+                y = ys[slot] + yspd
+                xs[slot], ys[slot] = x, y
+                hdist, vdist = 0.0, 0.0
+
+                if x < 0.0:
+                    hdist = x
+                elif x + ws[slot] > width:
+                    hdist = x + ws[slot] - width
+
+                if y < 0.0:
+                    vdist = y
+                elif y + hs[slot] > height:
+                    vdist = y + hs[slot] - height
+
+                moved[n], hdists[n], vdists[n] = slot, hdist, vdist
+                n += 1
+
+        return n
+
+    def moving(self, slot):
+        return slot >= 0 and (self.vxs[slot] != 0.0 or self.vys[slot] != 0.0)
+
+    def needs_border_callback(self, slot, hdist, vdist):
+        needed = self.handlers[slot] != 0
+
+        if not needed:
+            if hdist < 0.0:
+                needed = self.strategies[slot * 4 + 3] != _BORDER_IGNORE
+            elif hdist > 0.0:
+                needed = self.strategies[slot * 4 + 1] != _BORDER_IGNORE
+
+        if not needed:
+            if vdist < 0.0:
+                needed = self.strategies[slot * 4 + 0] != _BORDER_IGNORE
+            elif vdist > 0.0:
+                needed = self.strategies[slot * 4 + 2] != _BORDER_IGNORE
+
+        return needed
+
+# private
+    def __release(self, slot):
+        last = self.count - 1
+
+        if slot != last:
+            tail = self.matters[last]
+            self.matters[slot] = tail
+
+            if tail is not None:
+                tail.info.slot = slot
+
+            self.xs[slot], self.ys[slot] = self.xs[last], self.ys[last]
+            self.vxs[slot], self.vys[slot] = self.vxs[last], self.vys[last]
+            self.ws[slot], self.hs[slot] = self.ws[last], self.hs[last]
+            self.handlers[slot] = self.handlers[last]
+
+            for i in range(4):
+                self.strategies[slot * 4 + i] = self.strategies[last * 4 + i]
+
+        self.matters.pop()
+        self.count = last
+
+    def __reserve(self, capacity):
+        n = self.count
+        for name in ('xs', 'ys', 'vxs', 'vys', 'ws', 'hs', 'hdists', 'vdists'):
+            a = array('f', bytes(4 * capacity))
+
+            if n > 0:
+                a[0:n] = getattr(self, name)[0:n]
+
+            setattr(self, name, a)
+
+        handlers = array('b', bytes(capacity))
+        strategies = array('b', bytes(capacity * 4))
+        moved = array('h', bytes(capacity * 2))
+
+        if n > 0:
+            handlers[0:n] = self.handlers[0:n]
+            strategies[0:n * 4] = self.strategies[0:n * 4]
+            # a matter attached during a pass must not lose the slots the pass has yet to visit
+            moved[0:n] = self.moved[0:n]
+
+        self.handlers, self.strategies, self.moved = handlers, strategies, moved
+        self.capacity = capacity
+
+        if _numpy is not None:
+            self.__views = [_numpy.frombuffer(getattr(self, name), dtype = _numpy.float32)
+                            for name in ('xs', 'ys', 'vxs', 'vys', 'ws', 'hs', 'hdists', 'vdists')]
+            self.__views.append(_numpy.frombuffer(self.moved, dtype = _numpy.int16))
+
+    def __integrate_vectorized(self, width, height):
+        n = self.count
+        xs, ys, vxs, vys, ws, hs, hdists, vdists, moved = [v[0:n] for v in self.__views]
+        slots = _numpy.flatnonzero((vxs != 0.0) | (vys != 0.0))
+        k = len(slots)
+
+        if k > 0:
+            x = xs[slots] + vxs[slots]
+            y = ys[slots] + vys[slots]
+            xs[slots], ys[slots] = x, y
+            xover = x + ws[slots] - width
+            yover = y + hs[slots] - height
+
+            moved[0:k] = slots
+            hdists[0:k] = _numpy.where(x < 0.0, x, _numpy.where(xover > 0.0, xover, 0.0))
+            vdists[0:k] = _numpy.where(y < 0.0, y, _numpy.where(yover > 0.0, yover, 0.0))
+
+        return k
+
+def _matter_moving(m):
+    return m.x_speed() != 0.0 or m.y_speed() != 0.0
+
+def _compact(items):
+    # drops the None left by removals in place, keeping the order
+    count = 0
+
+    for item in items:
+        if item is not None:
+            items[count] = item
+            count += 1
+
+    del items[count:]
+
+_BORDER_IGNORE = BorderStrategy.IGNORE
+_BORDER_STOP = BorderStrategy.STOP
+_BORDER_BOUNCE = BorderStrategy.BOUNCE
+
+def _border_strategy_code(strategy):
+    code = _BORDER_IGNORE
+
+    if strategy == BorderStrategy.STOP or strategy == BorderStrategy.BOUNCE:
+        code = strategy
+
+    return code
+
+###################################################################################################
+class _RenderLayer(object):
+    def __init__(self):
+        self.static = False
+        self.valid = False
+        self.cache = None
+        self.surface = None
+        self.mask = None
+        self.mask_surface = None
+        self.width = 0
+
+    def snapshot(self, buffer, width, height):
+        if self.cache is None or len(self.cache) != len(buffer):
+            self.cache = bytearray(len(buffer))
+            self.surface = framebuf.FrameBuffer(self.cache, width, height, framebuf.MONO_VLSB)
+            self.width = width
+
+        self.cache[:] = buffer
+        self.valid = True
+
+    def snapshot_mask(self, buffer, width, height):
+        # no mask at all if nothing is cleared
+        if min(buffer) == 0xFF:
+            self.mask, self.mask_surface = None, None
+        else:
+            if self.mask is None or len(self.mask) != len(buffer):
+                self.mask = bytearray(len(buffer))
+                self.mask_surface = framebuf.FrameBuffer(self.mask, width, height, framebuf.MONO_VLSB)
+
+            self.mask[:] = buffer
+
+    def restore(self, buffer, x, y, width, height):
+        # `y` and `height` are aligned to pages
+        for page in range(y // 8, (y + height) // 8):
+            base = page * self.width
+            buffer[base + x:base + x + width] = self.cache[base + x:base + x + width]
+
+    def composite(self, buffer, x, y, width, height):
+        # the cleared pixels, then the set ones, as the two blits do, `y` and `height` are aligned to pages
+        cache, mask = self.cache, self.mask
+
+        for page in range(y // 8, (y + height) // 8):
+            base = page * self.width
+
+            if mask is None:
+                for i in range(base + x, base + x + width):
+                    buffer[i] |= cache[i]
+            else:
+                for i in range(base + x, base + x + width):
+                    buffer[i] = (buffer[i] & mask[i]) | cache[i]
+
+###################################################################################################
+class _MatterGrid(object):
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.__cells = {}
+
+# public
+    def update(self, m, x, y, width, height):
+        info = m.info
+        size = self.cell_size
+        cx0, cy0 = int(x // size), int(y // size)
+        cx1, cy1 = int((x + width) // size), int((y + height) // size)
+        cells = info.cells
+
+        if cells is None or cells[0] != cx0 or cells[1] != cy0 or cells[2] != cx1 or cells[3] != cy1:
+            self.remove(m, info)
+
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    key = _grid_key(cx, cy)
+                    bucket = self.__cells.get(key)
+
+                    if bucket is None:
+                        self.__cells[key] = [m]
+                    else:
+                        bucket.append(m)
+
+            info.cells = (cx0, cy0, cx1, cy1)
+
+    def remove(self, m, info):
+        cells = info.cells
+
+        if cells is not None:
+            for cy in range(cells[1], cells[3] + 1):
+                for cx in range(cells[0], cells[2] + 1):
+                    key = _grid_key(cx, cy)
+                    bucket = self.__cells.get(key)
+
+                    if bucket is not None:
+                        if m in bucket:
+                            bucket.remove(m)
+
+                        if not bucket:
+                            del self.__cells[key]
+
+            info.cells = None
+
+    def clear(self):
+        self.__cells = {}
+
+    def matters_at(self, x, y):
+        size = self.cell_size
+
+        return self.__cells.get(_grid_key(int(x // size), int(y // size)), ())
+
+    def matters_in(self, left, top, right, bottom):
+        size = self.cell_size
+        found = {}
+
+        for cy in range(int(top // size), int(bottom // size) + 1):
+            for cx in range(int(left // size), int(right // size) + 1):
+                bucket = self.__cells.get(_grid_key(cx, cy))
+
+                if bucket:
+                    for m in bucket:
+                        found[id(m)] = m
+
+        return found.values()
+
+def _grid_key(cx, cy):
+    # cells out of range just share the bucket, candidates are always checked against their bounds
+    return (cy << 16) ^ (cx & 0xFFFF)
 
 ###################################################################################################
 class _MatterInfo(IMatterInfo):
@@ -359,7 +1410,14 @@ class _MatterInfo(IMatterInfo):
         
         self.x, self.y = 0.0, 0.0
         self.selected = False
-        self.iasync = None
+        self.iasync = False
+        self.ax0, self.ay0, self.afx0, self.afy0, self.adx0, self.ady0 = 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        self.z = 0
+        self.cells = None
+        self.lx, self.ly, self.lw, self.lh = 0.0, 0.0, -1.0, -1.0
+        self.bx, self.by, self.bw, self.bh = 0.0, 0.0, -1.0, -1.0
+        self.slot = -1
+        self.layer = 0
         
         self.next, self.prev = None, None
 
@@ -371,33 +1429,34 @@ def _bind_matter_owership(master, m):
 def _cosmos_matter_info(master, m):
     info = None
 
-    if m.info and m.info.master == master:
+    # removed matters keep their info, but are unlinked
+    if m.info and m.info.master == master and m.info.next is not None:
         info = m.info
     
     return info
 
+def _matter_zorder(m):
+    return m.info.z
+
 def _unsafe_get_matter_bound(m, info):
     width, height = m.get_extent(info.x, info.y)
 
     return info.x, info.y, width, height
 
+# indexed by `MatterAnchor`, LT, CT, RT, LC, CC, RC, LB, CB, RB
+_ANCHOR_FRACTIONS = ((0.0, 0.0), (0.5, 0.0), (1.0, 0.0),
+                     (0.0, 0.5), (0.5, 0.5), (1.0, 0.5),
+                     (0.0, 1.0), (0.5, 1.0), (1.0, 1.0))
+
 def _matter_anchor_fraction(a):
     if isinstance(a, int): 
-        if   a == MatterAnchor.LT: fx, fy = 0.0, 0.0
-        elif a == MatterAnchor.LC: fx, fy = 0.0, 0.5
-        elif a == MatterAnchor.LB: fx, fy = 0.0, 1.0
-        elif a == MatterAnchor.CT: fx, fy = 0.5, 0.0          
-        elif a == MatterAnchor.CC: fx, fy = 0.5, 0.5
-        elif a == MatterAnchor.CB: fx, fy = 0.5, 1.0
-        elif a == MatterAnchor.RT: fx, fy = 1.0, 0.0
-        elif a == MatterAnchor.RC: fx, fy = 1.0, 0.5
-        elif a == MatterAnchor.RB: fx, fy = 1.0, 1.0
+        fx, fy = _ANCHOR_FRACTIONS[a]
     else:
         fx, fy = a[0], a[1]
 
     return fx, fy
 
-def _unsafe_do_moving_via_info(master, info, x, y, absolute):
+def _unsafe_do_moving_via_info(master, m, info, x, y, absolute):
     moved = False
 
     if not absolute:
@@ -408,7 +1467,7 @@ def _unsafe_do_moving_via_info(master, info, x, y, absolute):
         info.x = x
         info.y = y
 
-        master.size_cache_invalid()
+        master.notify_matter_bound_changed(m)
         moved = True
 
     return moved
@@ -421,21 +1480,17 @@ def _unsafe_move_matter_via_info(master, m, info, x, y, fx, fy, dx, dy):
         ax = sw * fx
         ay = sh * fy
     else:
-        info.iasync = {}
-        info.iasync['x0'] = x
-        info.iasync['y0'] = y
-        info.iasync['fx0'] = fx
-        info.iasync['fy0'] = fy
-        info.iasync['dx0'] = dx
-        info.iasync['dy0'] = dy
+        info.iasync = True
+        info.ax0, info.ay0 = x, y
+        info.afx0, info.afy0 = fx, fy
+        info.adx0, info.ady0 = dx, dy
 
-    return _unsafe_do_moving_via_info(master, info, x - ax + dx, y - ay + dy, True)
+    return _unsafe_do_moving_via_info(master, m, info, x - ax + dx, y - ay + dy, True)
 
 def _unsafe_move_async_matter_when_ready(master, m, info):
-    asi = info.iasync
-    info.iasync = None
+    info.iasync = False
 
-    return _unsafe_move_matter_via_info(master, m, info, asi['x0'], asi['y0'], asi['fx0'], asi['fy0'], asi['dx0'], asi['dy0'])
+    return _unsafe_move_matter_via_info(master, m, info, info.ax0, info.ay0, info.afx0, info.afy0, info.adx0, info.ady0)
 
 def _do_resize(master, m, info, scale_x, scale_y, prev_scale_x = 1.0, prev_scale_y = 1.0):
     resizable, resize_anchor = m.resizable()
@@ -450,7 +1505,109 @@ def _do_resize(master, m, info, scale_x, scale_y, prev_scale_x = 1.0, prev_scale
         nx = sx + (sw - nw) * fx
         ny = sy + (sh - nh) * fy
 
-        _unsafe_do_moving_via_info(master, info, nx, ny, True)
+        if not _unsafe_do_moving_via_info(master, m, info, nx, ny, True):
+            master.notify_matter_bound_changed(m)
+
+###################################################################################################
+def _matters_collided(m1, info1, m2, info2):
+    if isinstance(m1, Circlet):
+        if isinstance(m2, Circlet):
+            r1, r2 = m1.get_radius(), m2.get_radius()
+            dx = (info1.x + r1) - (info2.x + r2)
+            dy = (info1.y + r1) - (info2.y + r2)
+            
+            collided = dx * dx + dy * dy <= (r1 + r2) * (r1 + r2)
+        else:
+            collided = _circle_polygon_overlay(m1, info1, _matter_polygon(m2, info2))
+    elif isinstance(m2, Circlet):
+        collided = _circle_polygon_overlay(m2, info2, _matter_polygon(m1, info1))
+    else:
+        collided = _polygons_overlay(_matter_polygon(m1, info1), _matter_polygon(m2, info2))
+
+    return collided
+
+def _matter_polygon(m, info):
+    if isinstance(m, Trianglet):
+        polygon = m.get_vertices(info.x, info.y)
+    elif isinstance(m, Linelet):
+        polygon = m.get_endpoints(info.x, info.y)
+    else:
+        x, y, w, h = info.x, info.y, info.bw, info.bh
+        polygon = (x, y, x + w, y, x + w, y + h, x, y + h)
+
+    return polygon
+
+def _polygon_projection(polygon, ax, ay):
+    pmin = pmax = polygon[0] * ax + polygon[1] * ay
+
+    for i in range(2, len(polygon), 2):
+        p = polygon[i] * ax + polygon[i + 1] * ay
+        
+        if p < pmin:
+            pmin = p
+        elif p > pmax:
+            pmax = p
+
+    return pmin, pmax
+
+def _polygon_separated(polygon, others):
+    # separating axis theorem, the axes are the normals of the edges of `polygon`
+    n = len(polygon)
+    separated = False
+
+    for i in range(0, n, 2):
+        j = (i + 2) % n
+        ax, ay = polygon[i + 1] - polygon[j + 1], polygon[j] - polygon[i]
+
+        if ax != 0.0 or ay != 0.0:
+            pmin, pmax = _polygon_projection(polygon, ax, ay)
+            omin, omax = _polygon_projection(others, ax, ay)
+
+            if pmax < omin or omax < pmin:
+                separated = True
+                break
+
+    return separated
+
+def _polygons_overlay(polygon1, polygon2):
+    return not (_polygon_separated(polygon1, polygon2) or _polygon_separated(polygon2, polygon1))
+
+def _circle_polygon_overlay(circle, info, polygon):
+    # separating axis theorem, the axes are the normals of the edges of `polygon`,
+    # along with the one through the nearest vertex, which handles the corners
+    r = circle.get_radius()
+    cx, cy = info.x + r, info.y + r
+    nx, ny, dist = 0.0, 0.0, math.inf
+    n = len(polygon)
+    overlay = True
+
+    for i in range(0, n, 2):
+        j = (i + 2) % n
+        dx, dy = polygon[i] - cx, polygon[i + 1] - cy
+        d = dx * dx + dy * dy
+
+        if d < dist:
+            nx, ny, dist = dx, dy, d
+
+        if overlay:
+            overlay = not _circle_separated(polygon, cx, cy, r, polygon[i + 1] - polygon[j + 1], polygon[j] - polygon[i])
+
+    if overlay:
+        overlay = not _circle_separated(polygon, cx, cy, r, nx, ny)
+
+    return overlay
+
+def _circle_separated(polygon, cx, cy, r, ax, ay):
+    separated = False
+
+    if ax != 0.0 or ay != 0.0:
+        pmin, pmax = _polygon_projection(polygon, ax, ay)
+        c = cx * ax + cy * ay
+        reach = r * math.sqrt(ax * ax + ay * ay)
+
+        separated = pmax < c - reach or c + reach < pmin
+
+    return separated
 
 # Physics
 ###################################################################################################
@@ -0,0 +1,110 @@
+# Display flushing for the SSD1306/SH1106 family
+
+###############################################################################
+class DisplayAddressing(object):
+    PAGE = 0
+    HORIZONTAL = 1
+
+###############################################################################
+class PageFlusher(object):
+    '''
+    Push only the changed windows of a page-layout framebuffer to the display.
+
+    A shadow copy of the last flushed frame is compared with the framebuffer page by page,
+    for each changed page, only the columns between the first and the last changed bytes
+    are sent over I2C.
+
+    :param ledscr: the display, which provides `buffer`, and `i2c` and `addr` unless given
+    :param addressing: `DisplayAddressing.PAGE` works with both SSD1306 and SH1106,
+                       `DisplayAddressing.HORIZONTAL` requires a SSD1306 in horizontal or vertical mode
+    :param column_offset: the first visible column in the display RAM, SH1106 panels usually use 2
+    '''
+
+    def __init__(self, ledscr, width = 128, height = 64, i2c = None, addr = None,
+                 addressing = DisplayAddressing.PAGE, column_offset = 0):
+        super(PageFlusher, self).__init__()
+
+        self.__frame = ledscr.buffer
+        self.__buffer = memoryview(ledscr.buffer)
+        self.__i2c = i2c if i2c is not None else ledscr.i2c
+        self.__addr = addr if addr is not None else ledscr.addr
+        self.__width, self.__pages = width, height // 8
+        self.__addressing, self.__offset = addressing, column_offset
+        self.__shadow = bytearray(len(self.__buffer))
+        self.__cmd = bytearray(8)
+        self.__data = bytearray(width + 1)
+        self.__data[0] = 0x40
+        self.__frames, self.__last_bytes, self.__total_bytes, self.__last_windows = 0, 0, 0, 0
+        self.invalidate()
+
+# public
+    def flush(self):
+        buf, shadow = self.__frame, self.__shadow
+        width = self.__width
+        sent, windows = 0, 0
+
+        for page in range(self.__pages):
+            base = page * width
+
+            if self.__stale:
+                c0, c1 = 0, width
+            elif buf[base:base + width] == shadow[base:base + width]:
+                continue
+            else:
+                c0, c1 = base, base + width - 1
+
+                while buf[c0] == shadow[c0]:
+                    c0 += 1
+
+                while buf[c1] == shadow[c1]:
+                    c1 -= 1
+
+                c0, c1 = c0 - base, c1 - base + 1
+
+            shadow[base + c0:base + c1] = self.__buffer[base + c0:base + c1]
+            sent += self.__send_window(page, c0, c1)
+            windows += 1
+
+        self.__stale = False
+        self.__frames += 1
+        self.__last_bytes, self.__last_windows = sent, windows
+        self.__total_bytes += sent
+
+        return sent
+
+    def invalidate(self):
+        self.__stale = True
+
+    def stats(self):
+        '''
+        :return: bytes sent by the last flush, windows sent by the last flush, total bytes, flushed frames
+        '''
+
+        return self.__last_bytes, self.__last_windows, self.__total_bytes, self.__frames
+
+    def reset_stats(self):
+        self.__frames, self.__last_bytes, self.__total_bytes, self.__last_windows = 0, 0, 0, 0
+
+# private
+    def __send_window(self, page, c0, c1):
+        cmd = self.__cmd
+        data = self.__data
+        count = c1 - c0
+        base = page * self.__width
+        col = c0 + self.__offset
+
+        cmd[0] = 0x00
+        if self.__addressing == DisplayAddressing.HORIZONTAL:
+            cmd[1], cmd[2], cmd[3] = 0x21, col, col + count - 1
+            cmd[4], cmd[5], cmd[6] = 0x22, page, page
+            ncmd = 7
+        else:
+            cmd[1], cmd[2], cmd[3] = 0xB0 | page, 0x00 | (col & 0x0F), 0x10 | (col >> 4)
+            ncmd = 4
+
+        data[1:count + 1] = self.__buffer[base + c0:base + c1]
+
+        self.__i2c.writeto(self.__addr, memoryview(cmd)[0:ncmd])
+        self.__i2c.writeto(self.__addr, memoryview(data)[0:count + 1])
+
+        return ncmd + count + 1
@@ -18,6 +18,11 @@ class FootballShot(Cosmos):
         self.l_door = self.insert(VLinelet(7.32 / 68.0 * height))
         self.r_door = self.insert(VLinelet(7.32 / 68.0 * height))
         self.ball = self.insert(Circlet(2, True))
+
+        for field in (self.midline, self.circle, self.l_door, self.r_door):
+            self.set_matter_layer(field, -1)
+
+        self.set_layer_static(-1)
         
         self.__startover()
 
@@ -1,28 +1,39 @@
+from text import *
+from plotting import *
+from array import array
+
+import framebuf
 import math
 
 ###############################################################################
+# small ints, which are not heap objects on MicroPython, and double as table indices
 class MatterAnchor(object):
-    LT = 0x4983917e165afce8
-    CT = 0x45469ade8ed1ff0e
-    RT = 0x43fa3ada0199d0ed
-    LC = 0x45be256177a1bacb
-    CC = 0x4d3b7e0e5d4bf118
-    RC = 0x4a89be34d21896a6
-    LB = 0x49071ea39c89fc24
-    CB = 0x40774aafb4b0d0ae
-    RB = 0x4208392ecc81b775
+    LT = 0
+    CT = 1
+    RT = 2
+    LC = 3
+    CC = 4
+    RC = 5
+    LB = 6
+    CB = 7
+    RB = 8
 
 class BorderEdge(object):
-    TOP = 0x4d52cf9d2eeb506f
-    RIGHT = 0x488d2013b5d8f2ad
-    BOTTOM = 0x463b469498d6f36a
-    LEFT = 0x45c62f50ae7e873d
-    NONE = 0x4151ac35cfedfb3d
+    TOP = 0
+    RIGHT = 1
+    BOTTOM = 2
+    LEFT = 3
+    NONE = 4
 
 class BorderStrategy(object):
-    IGNORE = 0x402f7a5172c81a41
-    STOP = 0x407c35437235f05f
-    BOUNCE = 0x4fcc175c111c2d94
+    IGNORE = 0
+    STOP = 1
+    BOUNCE = 2
+
+class ParticleShape(object):
+    DOT = 0
+    STREAK = 1 # a vertical line of `size` pixels
+    PLUS = 2   # a dot and its four neighbours
 
 ###############################################################################
 class IMatterInfo(object):
@@ -37,6 +48,7 @@ class IMatter(object):
         self.__anchor, self.__anchor_x, self.__anchor_y = MatterAnchor.LT, 0.0, 0.0
         self.__deal_with_events = False
         self.__findable = True
+        self.__collidable = False
 
     def __del__(self):
         self.info = None
@@ -59,6 +71,8 @@ class IMatter(object):
     def update(self, count, interval, uptime): pass
     def draw(self, ledscr, X, Y, Width, Height): pass
     def ready(self): return True
+    def is_colliding_with_mouse(self, local_x, local_y): return True
+    def on_collision(self, other): pass
 
 # public
     def enable_events(self, yes_or_no, low_level = False):
@@ -74,6 +88,16 @@ class IMatter(object):
     def events_allowed(self):
         return self.__deal_with_events
 
+    def enable_collision(self, yes_or_no):
+        if self.__collidable != yes_or_no:
+            self.__collidable = yes_or_no
+
+            if self.info:
+                self.info.master.notify_matter_collision_changed(self)
+
+    def collidable(self):
+        return self.__collidable
+
 # public
     def get_location(self, anchor = MatterAnchor.LT):
         sx = 0.0
@@ -99,6 +123,7 @@ class IMatter(object):
                 self.info.master.move_to(self, (self.__anchor_x, self.__anchor_y), self.__anchor)
                 self.clear_moor()
             
+            self.info.master.notify_matter_bound_changed(self)
             self.info.master.notify_updated()
 
     def resize(self, w, h):
@@ -127,7 +152,7 @@ class IMovable(IMatter):
     def __init__(self):
         super(IMovable, self).__init__()
 
-        self.__border_strategies = {}
+        self.__border_strategies = [BorderStrategy.IGNORE] * 4
         self.set_border_strategy(BorderStrategy.IGNORE)
         self.__xspeed = 0.0
         self.__yspeed = 0.0
@@ -157,6 +182,8 @@ class IMovable(IMatter):
             if vstrategy == BorderStrategy.BOUNCE:
                 self.__yspeed *= -1.0
 
+        self.__notify_motion_changed()
+
     def set_border_strategy(self, strategy):
         if isinstance(strategy, int):
             self.__set_border_strategy(strategy, strategy, strategy, strategy)
@@ -167,6 +194,12 @@ class IMovable(IMatter):
                 self.__set_border_strategy(strategy[0], strategy[1], strategy[0], strategy[1])
             else:
                 self.__set_border_strategy(strategy[0], strategy[1], strategy[2], strategy[3])
+
+        self.__notify_motion_changed()
+
+    def get_border_strategies(self):
+        return self.__border_strategies[BorderEdge.TOP], self.__border_strategies[BorderEdge.RIGHT], \
+            self.__border_strategies[BorderEdge.BOTTOM], self.__border_strategies[BorderEdge.LEFT]
     
 # public
     def set_speed(self, speed, direction, is_radian = False):
@@ -177,6 +210,7 @@ class IMovable(IMatter):
 
         self.__xspeed = speed * math.cos(rad)
         self.__yspeed = speed * math.sin(rad)
+        self.__notify_motion_changed()
 
     def x_speed(self):
         return self.__xspeed
@@ -192,6 +226,8 @@ class IMovable(IMatter):
         if vertical:
             self.__yspeed = 0.0
 
+        self.__notify_motion_changed()
+
     def motion_bounce(self, horizon, vertical):
         if horizon:
             self.__xspeed *= -1.0
@@ -199,7 +235,13 @@ class IMovable(IMatter):
         if vertical:
             self.__yspeed *= -1.0
 
+        self.__notify_motion_changed()
+
 #private
+    def __notify_motion_changed(self):
+        if self.info:
+            self.info.master.notify_matter_motion_changed(self)
+
     def __set_border_strategy(self, ts, rs, bs, ls):
         self.__border_strategies[BorderEdge.TOP] = ts
         self.__border_strategies[BorderEdge.RIGHT] = rs
@@ -214,22 +256,46 @@ class IShapelet(IMovable):
         self._dirty_cached_position()
         self.__filled = filled
         self.__c = c
+        self.__sprite_cached = False
+        self.__sprite_key, self.__sprite_width, self.__sprite_height = None, -1, -1
+        # bound once, so that drawing a cached sprite allocates no bound method
+        self.__rasterize = self.__draw_shapelet
             
 # public
     def draw(self, ledscr, flx, fly, flWidth, flHeight):
         x, y = round(flx), round(fly)
         width, height = round(flWidth), round(flHeight)
         
-        if self.__last_pos[0] != flx or (self.__last_pos[1]) != fly:
-            self.__last_pos = (flx, fly)
+        if self.__last_x != flx or self.__last_y != fly:
+            self.__last_x, self.__last_y = flx, fly
             self._on_moved(flx, fly)
+
+        if self.__sprite_cached and (self.__c == 0 or self.__c == 1):
+            if self.__sprite_width != width or self.__sprite_height != height:
+                # the key is kept as long as the size holds, so that drawing a sprite allocates nothing
+                self.__sprite_width, self.__sprite_height = width, height
+                self.__sprite_key = self._sprite_shape(width, height)
+
+                if self.__sprite_key:
+                    key, swidth, sheight = self.__sprite_key
+                    self.__sprite_key = ((key, self.__filled, self.__c), swidth, sheight)
+
+            if self.__sprite_key:
+                key, swidth, sheight = self.__sprite_key
+                sprite = sprite_cache.sprite(ledscr, key, swidth, sheight, 1 - self.__c, self.__rasterize, width, height)
+
+                if sprite is not None:
+                    ledscr.blit(sprite, x, y, 1 - self.__c)
+                    return
         
-        if self.__filled:
-            self._fill_shape(ledscr, x, y, width, height, self.__c)
-        else:
-            self._draw_shape(ledscr, x, y, width, height, self.__c)
+        self.__draw_shapelet(ledscr, x, y, width, height)
                 
 # public
+    def notify_updated(self):
+        # the geometry might have changed
+        self.__sprite_width = -1
+        super(IShapelet, self).notify_updated()
+
     def set_filled(self, filled):
         if self.__filled != filled:
             self.__filled = filled
@@ -246,15 +312,40 @@ class IShapelet(IMovable):
     def get_draw_mode(self):
         return self.__c
 
+    def enable_sprite_cache(self, yes_or_no):
+        '''
+        Draw the shape by blitting a mask rasterized once and shared via `sprite_cache`,
+        which only works with the draw mode 0 or 1. The mask is drawn by the screen itself,
+        so that it holds the same pixels as a direct draw
+        '''
+        
+        self.__sprite_cached = yes_or_no
+
 # protected
     def _on_moved(self, new_x, new_y): pass
     def _draw_shape(self, ledscr, x, y, width, height, c): pass
     def _fill_shape(self, ledscr, x, y, width, height, c): pass
 
+# protected
+    def _sprite_shape(self, width, height):
+        '''
+        :return: (key, sprite_width, sprite_height), the key identifies the geometry,
+                 or None if the shape cannot be cached
+        '''
+        return None
+
+# private
+    def __draw_shapelet(self, ledscr, x, y, width, height):
+        if self.__filled:
+            self._fill_shape(ledscr, x, y, width, height, self.__c)
+        else:
+            self._draw_shape(ledscr, x, y, width, height, self.__c)
+
 # protected
     def _dirty_cached_position(self):
         # mpython doesn't have `math.nan`
-        self.__last_pos = (False, False)
+        self.__last_x, self.__last_y = False, False
+        self.__sprite_width = -1
 
 ###################################################################################################
 class Linelet(IShapelet):
@@ -266,6 +357,15 @@ class Linelet(IShapelet):
     def get_extent(self, x, y):
         return max(abs(self.__epx), 1.0), max(abs(self.__epy), 1.0)
 
+    def get_endpoints(self, x, y):
+        if self.__epx < 0.0:
+            x -= self.__epx
+        
+        if self.__epy < 0.0:
+            y -= self.__epy
+
+        return x, y, x + self.__epx, y + self.__epy
+
     def _on_resize(self, w, h, width, height):
         self.__epx *= w / width
         self.__epy *= h / height
@@ -289,6 +389,107 @@ class VLinelet(Linelet):
     def __init__(self, height, c = 1):
         super(VLinelet, self).__init__(0.0, height, c)
 
+class Polylinet(IShapelet):
+    '''
+    An append-only path on a `width` x `height` canvas, the points are in the local coordinates of the canvas.
+
+    The points are kept in a compact `array('h')`, and each appended segment is rasterized once
+    onto a retained layer, so a frame costs a single blit however long the path grows.
+    The marker, a dot on one of the points, is drawn over the layer and never touches it.
+    The layer is only retained with the draw mode 0 or 1, other modes redraw every segment.
+
+    :param capacity: the initial number of points, the array grows beyond it
+    :param marker_radius: the radius of the marker dot
+    '''
+
+    def __init__(self, width, height, capacity = 16, c = 1, marker_radius = 2):
+        super(Polylinet, self).__init__(True, c)
+        self.enable_resizing(False)
+        self.__width, self.__height = width, height
+        self.__points = array('h', [0] * (capacity * 2))
+        self.__count = 0
+        self.__marker, self.__marker_radius = -1, marker_radius
+        self.__layer, self.__layer_c = None, -1
+
+    def get_extent(self, x, y):
+        return float(self.__width), float(self.__height)
+
+    def append(self, x, y):
+        x, y = round(x), round(y)
+        idx = self.__count * 2
+
+        if idx == len(self.__points):
+            self.__points.extend(array('h', [0] * idx))
+
+        self.__points[idx], self.__points[idx + 1] = x, y
+        self.__count += 1
+
+        if self.__layer_c >= 0:
+            if self.__count > 1:
+                self.__layer.line(self.__points[idx - 2], self.__points[idx - 1], x, y, self.__layer_c)
+            else:
+                self.__layer.pixel(x, y, self.__layer_c)
+
+        self.notify_updated()
+
+    def count(self):
+        return self.__count
+
+    def get_point(self, idx):
+        return self.__points[idx * 2], self.__points[idx * 2 + 1]
+
+    def clear(self):
+        self.__count = 0
+        self.__marker = -1
+        self.__layer_c = -1
+        self.notify_updated()
+
+    def set_marker(self, idx):
+        ''' :param idx: the index of the point to mark, negative to hide the marker '''
+        if idx >= self.__count:
+            idx = -1
+
+        if self.__marker != idx:
+            self.__marker = idx
+            self.notify_updated()
+
+    def get_marker(self):
+        return self.__marker
+
+    def _fill_shape(self, ledscr, x, y, width, height, c):
+        if c == 0 or c == 1:
+            if self.__layer_c != c:
+                self.__rebuild_layer(c)
+
+            ledscr.blit(self.__layer, x, y, 1 - c)
+        else:
+            if self.__count == 1:
+                ledscr.pixel(x + self.__points[0], y + self.__points[1], c)
+
+            for i in range(1, self.__count):
+                ledscr.line(x + self.__points[i * 2 - 2], y + self.__points[i * 2 - 1],
+                            x + self.__points[i * 2], y + self.__points[i * 2 + 1], c)
+
+        if self.__marker >= 0:
+            ledscr.fill_circle(x + self.__points[self.__marker * 2], y + self.__points[self.__marker * 2 + 1],
+                               self.__marker_radius, c)
+
+    def __rebuild_layer(self, c):
+        # the layer is transparent where it has the opposite color of the draw mode
+        if self.__layer is None:
+            self.__layer = framebuf.FrameBuffer(bytearray(self.__width * ((self.__height + 7) // 8)),
+                                                self.__width, self.__height, framebuf.MONO_VLSB)
+
+        self.__layer_c = c
+        self.__layer.fill(1 - c)
+
+        if self.__count == 1:
+            self.__layer.pixel(self.__points[0], self.__points[1], c)
+
+        for i in range(1, self.__count):
+            self.__layer.line(self.__points[i * 2 - 2], self.__points[i * 2 - 1],
+                              self.__points[i * 2], self.__points[i * 2 + 1], c)
+
 ###################################################################################################
 class Rectanglet(IShapelet):
     def __init__(self, width, height, filled = True, c = 1):
@@ -308,6 +509,9 @@ class Rectanglet(IShapelet):
     def _fill_shape(self, ledscr, x, y, width, height, c):
         ledscr.fill_rect(x, y, width, height, c)
 
+    def _sprite_shape(self, width, height):
+        return ('R', width, height), width, height
+
 class Squarelet(Rectanglet):
     def __init__(self, edge_size, filled, c = 1):
         super(Squarelet, self).__init__(edge_size, edge_size, filled, c)
@@ -326,6 +530,12 @@ class Trianglet(IShapelet):
 
         return xmax - xmin + 1.0, ymax - ymin + 1.0
 
+    def get_vertices(self, x, y):
+        x -= min(0.0, self.__x2, self.__x3)
+        y -= min(0.0, self.__y2, self.__y3)
+
+        return x, y, x + self.__x2, y + self.__y2, x + self.__x3, y + self.__y3
+
     def _on_resize(self, w, h, width, height):
         xratio = w / width
         yratio = h / height
@@ -355,6 +565,17 @@ class Trianglet(IShapelet):
 
         ledscr.fill_triangle(x, y, x2, y2, x3, y3, c)
 
+    def _sprite_shape(self, width, height):
+        x0, y0, x2, y2, x3, y3 = self.__rounded_vertices()
+
+        return ('T', x2 - x0, y2 - y0, x3 - x0, y3 - y0), max(x0, x2, x3) + 1, max(y0, y2, y3) + 1
+
+    def __rounded_vertices(self):
+        x = -round(min(0.0, self.__x2, self.__x3))
+        y = -round(min(0.0, self.__y2, self.__y3))
+
+        return x, y, round(self.__x2) + x, round(self.__y2) + y, round(self.__x3) + x, round(self.__y3) + y
+
 class Circlet(IShapelet):
     def __init__(self, radius, filled, c = 1):
         super(Circlet, self).__init__(filled, c)
@@ -363,6 +584,9 @@ class Circlet(IShapelet):
     def get_extent(self, x, y):
         return self.__radius * 2.0, self.__radius * 2.0
 
+    def get_radius(self):
+        return self.__radius
+
     def _on_resize(self, w, h, width, height):
         self.__radius = min(w, h) * 0.5
     
@@ -374,6 +598,11 @@ class Circlet(IShapelet):
         r = round(self.__radius) - 1
         ledscr.fill_circle(x + r, y + r, r, c)
 
+    def _sprite_shape(self, width, height):
+        r = round(self.__radius) - 1
+        
+        return ('C', r), r * 2 + 1, r * 2 + 1
+
 class Labellet(IShapelet):
     def __init__(self, text, mode = 3):
         super(Labellet, self).__init__(True, mode)
@@ -392,14 +621,369 @@ class Labellet(IShapelet):
             self.notify_updated()
 
     def get_extent(self, x, y):
-        w = self.__width
-        h = self.__height
-
-        if not w:
-            w = len(self.__text) * 8.0
+        if self.__width is False:
+            # measured by the glyph advances, not by drawing
+            self.__width = float(text_engine.measure(self.__text)[0])
 
-        return w, h
+        return self.__width, self.__height
 
     def _fill_shape(self, ledscr, x, y, width, height, c):
-        rtuple = ledscr.DispChar(self.__text, x, y, c, True)
-        self.__width = rtuple[0]
+        xend = text_engine.draw(ledscr, self.__text, x, y, c, True)
+
+        if self.__width != xend - x:
+            self.__width = float(xend - x)
+
+            if self.info:
+                self.info.master.notify_matter_bound_changed(self)
+
+###################################################################################################
+class IParticleEmitter(object):
+    ''' Spawns particles into a `ParticleSystem` on every tick '''
+
+    def emit(self, system, count, interval): pass
+
+class IParticleForce(object):
+    ''' Changes the velocities or the positions of the first `n` particles of a `ParticleSystem` on every tick '''
+
+    def apply(self, system, n): pass
+
+class ParticleSystem(IMatter):
+    '''
+    A swarm of particles living in a `width` x `height` region, the location of the matter.
+
+    Positions, velocities and remaining lives are kept in fixed-capacity arrays, the live particles
+    always occupy the first `count` slots: a dead particle is replaced by the last one, so that
+    spawning and dying allocate nothing. On every tick, the emitters spawn, the forces push,
+    then the particles move one step and age by one tick. Drawing sets the bits of the framebuffer
+    directly, which should be in the MONO_VLSB layout of the SSD1306 family.
+
+    :param capacity: spawning fails once this many particles are alive
+    :param shape: a `ParticleShape`
+    :param size: the length of a `ParticleShape.STREAK`
+    :param c: 1 sets the pixels, 0 clears them, 2 inverts them
+    :param bounded: particles leaving the region die, otherwise they are just not drawn
+    '''
+
+    def __init__(self, width, height, capacity = 256, shape = ParticleShape.DOT, size = 1, c = 1, bounded = True, seed = 1):
+        super(ParticleSystem, self).__init__()
+
+        self.width, self.height = float(width), float(height)
+        self.capacity, self.count = capacity, 0
+        self.xs, self.ys = array('f', [0.0] * capacity), array('f', [0.0] * capacity)
+        self.vxs, self.vys = array('f', [0.0] * capacity), array('f', [0.0] * capacity)
+        self.lives = array('h', [0] * capacity)
+
+        self.__shape, self.__size, self.__c = shape, size, c
+        self.__bounded = bounded
+        self.__seed = (seed & 0xFFFF) or 1
+        self.__emitters, self.__forces = [], []
+        self.__drawn = 0
+        self.__reporting = type(self).on_particle_expired is not ParticleSystem.on_particle_expired
+
+# public
+    def get_extent(self, x, y):
+        return self.width, self.height
+
+    def update(self, count, interval, uptime):
+        for emitter in self.__emitters:
+            emitter.emit(self, count, interval)
+
+        if self.count > 0:
+            for force in self.__forces:
+                force.apply(self, self.count)
+
+            self.__step()
+
+        if self.count > 0 or self.__drawn > 0:
+            self.notify_updated()
+
+    def draw(self, ledscr, flx, fly, flWidth, flHeight):
+        # the region passed in is the one of the matter, the pages are laid out as wide as the screen
+        swidth, sheight = ledscr.width, ledscr.height
+        ox, oy = round(flx), round(fly)
+
+        if self.__shape == ParticleShape.DOT:
+            vlsb_points(ledscr.buffer, swidth, sheight, self.xs, self.ys, self.count, self.__c, ox, oy)
+        elif self.__shape == ParticleShape.STREAK:
+            vlsb_vspans(ledscr.buffer, swidth, sheight, self.xs, self.ys, self.count, self.__size, self.__c, ox, oy)
+        else:
+            vlsb_dots(ledscr.buffer, swidth, sheight, self.xs, self.ys, self.count, 1, self.__c, ox, oy)
+
+        self.__drawn = self.count
+
+    def on_particle_expired(self, x, y, outside):
+        ''' Called for each particle dying of age, or leaving the region of a bounded system '''
+        pass
+
+    def spawn(self, x, y, vx = 0.0, vy = 0.0, life = -1):
+        '''
+        :param life: in ticks, negative for particles living until they leave the region
+        :return: the slot of the particle, or -1 if the system is full
+        '''
+        slot = -1
+
+        if self.count < self.capacity:
+            slot = self.count
+            self.count += 1
+            self.xs[slot], self.ys[slot] = x, y
+            self.vxs[slot], self.vys[slot] = vx, vy
+            self.lives[slot] = life
+
+        return slot
+
+    def kill(self, slot):
+        last = self.count - 1
+
+        if slot != last:
+            self.xs[slot], self.ys[slot] = self.xs[last], self.ys[last]
+            self.vxs[slot], self.vys[slot] = self.vxs[last], self.vys[last]
+            self.lives[slot] = self.lives[last]
+
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+        self.notify_updated()
+
+    def add_emitter(self, emitter):
+        self.__emitters.append(emitter)
+
+    def remove_emitter(self, emitter):
+        if emitter in self.__emitters:
+            self.__emitters.remove(emitter)
+
+    def add_force(self, force):
+        self.__forces.append(force)
+
+    def remove_force(self, force):
+        if force in self.__forces:
+            self.__forces.remove(force)
+
+    def random(self, n):
+        ''' :return: an int in [0, n), from a 16-bit xorshift that stays within small ints '''
+        x = self.__seed
+        x ^= (x << 7) & 0xFFFF
+        x ^= x >> 9
+        x ^= (x << 8) & 0xFFFF
+        self.__seed = x
+
+        return x % n
+
+# private
+    def __step(self):
+        xs, ys, vxs, vys, lives = self.xs, self.ys, self.vxs, self.vys, self.lives
+        width, height = self.width, self.height
+        slot = self.count - 1
+
+        # backwards, so that the particle moved into a dead slot has been stepped already
+        while slot >= 0:
+            x = xs[slot] + vxs[slot]
+            y = ys[slot] + vys[slot]
+            xs[slot], ys[slot] = x, y
+            life = lives[slot]
+            outside = x < 0.0 or y < 0.0 or x >= width or y >= height
+
+            if life > 0:
+                life -= 1
+                lives[slot] = life
+
+            if life == 0 or (outside and self.__bounded):
+                if self.__reporting:
+                    self.on_particle_expired(x, y, outside)
+
+                self.kill(slot)
+
+            slot -= 1
+
+class RectEmitter(IParticleEmitter):
+    '''
+    Spawns particles at random places of a rectangle of the region of the system.
+
+    :param rate: particles per second
+    :param vx: the horizontal speed, in pixels per tick, give or take `spread`
+    :param total: the particles to spawn before the emitter goes quiet, negative for no limit
+    '''
+
+    def __init__(self, x, y, width, height, rate, vx = 0.0, vy = 0.0, spread = 0.0, life = -1, total = -1):
+        super(RectEmitter, self).__init__()
+        self.x, self.y, self.width, self.height = x, y, max(int(width), 1), max(int(height), 1)
+        self.rate, self.total = rate, total
+        self.vx, self.vy, self.life = vx, vy, life
+        self.__spread = max(int(spread * 16.0), 0)
+        self.__due = 0.0
+
+    def emit(self, system, count, interval):
+        self.__due += self.rate * interval / 1000.0
+
+        while self.__due >= 1.0 and self.total != 0:
+            vx, vy = self.vx, self.vy
+
+            if self.__spread > 0:
+                vx += (system.random(self.__spread * 2 + 1) - self.__spread) / 16.0
+                vy += (system.random(self.__spread * 2 + 1) - self.__spread) / 16.0
+
+            if system.spawn(self.x + system.random(self.width), self.y + system.random(self.height), vx, vy, self.life) < 0:
+                # full, the backlog is dropped instead of bursting out later
+                self.__due = 0.0
+            else:
+                self.__due -= 1.0
+                
+                if self.total > 0:
+                    self.total -= 1
+
+class Gravity(IParticleForce):
+    ''' Accelerates every particle by (`ax`, `ay`) pixels per tick per tick '''
+
+    def __init__(self, ax, ay):
+        super(Gravity, self).__init__()
+        self.ax, self.ay = ax, ay
+
+    def apply(self, system, n):
+        vxs, vys = system.vxs, system.vys
+        ax, ay = self.ax, self.ay
+
+        for i in range(n):
+            vxs[i] += ax
+            vys[i] += ay
+
+class Drag(IParticleForce):
+    ''' Keeps `factor` of the velocity of every particle on every tick '''
+
+    def __init__(self, factor):
+        super(Drag, self).__init__()
+        self.factor = factor
+
+    def apply(self, system, n):
+        vxs, vys = system.vxs, system.vys
+        k = self.factor
+
+        for i in range(n):
+            vxs[i] *= k
+            vys[i] *= k
+
+class Jitter(IParticleForce):
+    ''' Displaces every particle by whole pixels, at random within [-`dx`, `dx`] and [-`dy`, `dy`] '''
+
+    def __init__(self, dx, dy):
+        super(Jitter, self).__init__()
+        self.dx, self.dy = int(dx), int(dy)
+
+    def apply(self, system, n):
+        xs, ys = system.xs, system.ys
+        dx, dy = self.dx, self.dy
+
+        for i in range(n):
+            if dx > 0:
+                xs[i] += system.random(dx * 2 + 1) - dx
+
+            if dy > 0:
+                ys[i] += system.random(dy * 2 + 1) - dy
+
+###################################################################################################
+class SpriteCache(object):
+    '''
+    Packed 1-bpp masks shared by all shapelets, the least recently used ones are evicted
+    once the masks take more bytes than the budget.
+
+    A mask is drawn by the screen into its first pages, which are restored afterwards,
+    so that cached and direct draws agree whatever the firmware rasterizes.
+    The masks are kept in a circular list from the least to the most recently used one.
+    '''
+
+    def __init__(self, budget = 2048):
+        super(SpriteCache, self).__init__()
+        self.budget = budget
+        self.hits, self.misses, self.evictions = 0, 0, 0
+        self.__scratch = None
+        self.clear()
+
+# public
+    def sprite(self, ledscr, key, width, height, background, rasterize, rwidth, rheight):
+        '''
+        :param background: the color of the transparent pixels, the opposite of the draw mode
+        :param rasterize: draws the shape as `rasterize(ledscr, 0, 0, rwidth, rheight)`
+        :return: the mask, or None if it is larger than the screen
+        '''
+        fb = None
+        entry = self.__sprites.get(key)
+
+        if entry:
+            self.hits += 1
+            self.__unlink(entry)
+            self.__link(entry)
+            fb = entry.fb
+        elif width <= ledscr.width and height <= ledscr.height:
+            self.misses += 1
+            fb = self.__draw_aside(ledscr, width, height, background, rasterize, rwidth, rheight)
+
+            entry = _Sprite(key, fb, width * ((height + 7) // 8))
+            self.__sprites[key] = entry
+            self.__size += entry.nbytes
+            self.__link(entry)
+            self.__evict()
+
+        return fb
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.__evict()
+
+    def clear(self):
+        self.__sprites = {}
+        self.__size = 0
+        self.__head = _Sprite(None, None, 0)
+        self.__head.prev, self.__head.next = self.__head, self.__head
+
+    def stats(self):
+        '''
+        :return: hits, misses, evictions, cached sprites, cached bytes
+        '''
+        return self.hits, self.misses, self.evictions, len(self.__sprites), self.__size
+
+# private
+    def __draw_aside(self, ledscr, width, height, background, rasterize, rwidth, rheight):
+        # the first pages are saved, drawn into and copied out, then restored
+        buffer, stride = ledscr.buffer, ledscr.width
+        pages = (height + 7) // 8
+        pixels = bytearray(width * pages)
+
+        if self.__scratch is None or len(self.__scratch) < stride * pages:
+            self.__scratch = bytearray(stride * pages)
+
+        self.__scratch[0:stride * pages] = buffer[0:stride * pages]
+        ledscr.fill_rect(0, 0, width, pages * 8, background)
+        rasterize(ledscr, 0, 0, rwidth, rheight)
+
+        for p in range(pages):
+            pixels[p * width:(p + 1) * width] = buffer[p * stride:p * stride + width]
+
+        buffer[0:stride * pages] = self.__scratch[0:stride * pages]
+
+        return framebuf.FrameBuffer(pixels, width, height, framebuf.MONO_VLSB)
+
+    def __link(self, entry):
+        # as the most recently used one
+        head = self.__head
+        entry.prev, entry.next = head.prev, head
+        head.prev.next = entry
+        head.prev = entry
+
+    def __unlink(self, entry):
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+    def __evict(self):
+        while self.__size > self.budget and len(self.__sprites) > 1:
+            lru = self.__head.next
+            self.__unlink(lru)
+            del self.__sprites[lru.key]
+            self.__size -= lru.nbytes
+            self.evictions += 1
+
+class _Sprite(object):
+    def __init__(self, key, fb, nbytes):
+        super(_Sprite, self).__init__()
+        self.key, self.fb, self.nbytes = key, fb, nbytes
+        self.prev, self.next = None, None
+
+sprite_cache = SpriteCache()
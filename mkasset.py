@@ -0,0 +1,120 @@
+# Make bitmap assets on the desktop, see `assets.py`
+#
+#   python mkasset.py convert tree.pbm tree.mpb rle              # a PBM image, P1 or P4, to an asset file
+#   python mkasset.py extract water_circulation background 128 64 background.mpb rle
+#                                                                # a bitmap embedded in a module to an asset file
+#   python mkasset.py freeze tree.mpb tree_asset.py TREE         # an asset file to a module holding it as `bytes`,
+#                                                                # which stays in flash once the module is frozen
+#   python mkasset.py show tree.mpb                              # the header and the pixels, as text
+
+import simulator
+simulator.install()
+
+from assets import *
+
+import importlib
+import sys
+
+###############################################################################
+def read_pbm(path, invert = False):
+    '''
+    :return: pixels in the layout of `Bitmap`, width, height; black pixels of the image are the set bits
+    '''
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    tokens, pos = [], 0
+
+    # the magic number, the width and the height, skipping whitespaces and comments
+    while len(tokens) < 3:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+
+        if data[pos:pos + 1] == b'#':
+            while data[pos:pos + 1] not in (b'\n', b''):
+                pos += 1
+        else:
+            start = pos
+
+            while pos < len(data) and not data[pos:pos + 1].isspace():
+                pos += 1
+
+            tokens.append(data[start:pos])
+
+    magic, width, height = tokens[0], int(tokens[1]), int(tokens[2])
+    stride = (width + 7) // 8
+
+    if magic == b'P4':
+        pixels = bytearray(data[pos + 1:pos + 1 + stride * height])
+    elif magic == b'P1':
+        bits = [ch for ch in data[pos:].decode('ascii') if ch in '01']
+        pixels = bytearray(stride * height)
+
+        for j in range(height):
+            for i in range(width):
+                if bits[j * width + i] == '1':
+                    pixels[j * stride + (i >> 3)] |= 0x80 >> (i & 7)
+    else:
+        raise ValueError("only P1 and P4 images are supported")
+
+    if invert:
+        for k in range(len(pixels)):
+            pixels[k] ^= 0xFF
+
+    return pixels, width, height
+
+def write_asset(path, pixels, width, height, rle):
+    asset = encode_asset(pixels, width, height, rle)
+
+    with open(path, 'wb') as f:
+        f.write(asset)
+
+    print("%s: %dx%d, %d bytes of pixels stored in %d bytes%s" %
+          (path, width, height, ((width + 7) // 8) * height, len(asset), ", compressed" if asset[5] & ASSET_RLE else ""))
+
+def freeze_asset(path, module_path, name):
+    with open(path, 'rb') as f:
+        asset = f.read()
+
+    with open(module_path, 'w') as f:
+        f.write("# generated by mkasset.py from %s, draw it with `Bitmaplet(%s)`\n\n" % (path, name))
+        f.write("%s = %r\n" % (name, asset))
+
+def show_asset(path):
+    asset = BitmapAsset(path)
+    pixels = asset.load(bytearray(asset.size))
+    stride = (asset.width + 7) // 8
+
+    print("%dx%d, %s, %d bytes stored" % (asset.width, asset.height,
+                                          "compressed" if asset.compressed else "raw", asset.stored_size))
+
+    for j in range(asset.height):
+        print(''.join('#' if pixels[j * stride + (i >> 3)] & (0x80 >> (i & 7)) else '.' for i in range(asset.width)))
+
+###############################################################################
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'help'
+    args = sys.argv[2:]
+
+    if command == 'convert' and len(args) >= 2:
+        pixels, width, height = read_pbm(args[0], 'invert' in args[2:])
+        write_asset(args[1], pixels, width, height, 'rle' in args[2:])
+    elif command == 'extract' and len(args) >= 5:
+        pixels = getattr(importlib.import_module(args[0]), args[1])
+
+        # say, `trees[0]`
+        if len(args) > 5 and args[5].isdigit():
+            pixels = pixels[int(args[5])]
+
+        write_asset(args[4], pixels, int(args[2]), int(args[3]), 'rle' in args[5:])
+    elif command == 'freeze' and len(args) == 3:
+        freeze_asset(args[0], args[1], args[2])
+    elif command == 'show' and len(args) == 1:
+        show_asset(args[0])
+    else:
+        print("usage: python mkasset.py convert <image.pbm> <asset.mpb> [rle] [invert]")
+        print("       python mkasset.py extract <module> <variable> <width> <height> <asset.mpb> [index] [rle]")
+        print("       python mkasset.py freeze <asset.mpb> <module.py> <name>")
+        print("       python mkasset.py show <asset.mpb>")
+        sys.exit(1)
@@ -3,6 +3,7 @@
 
 from mpython import *
 from machine import Timer
+from matter import Polylinet
 
 from random import randint
 
@@ -12,13 +13,19 @@ import time
 class Hypha(object):
   def __init__(self, y0):
     self.okay = False
-    self.ys = []
+    # the first point is (x0, y0), then one point per step, then (xn, y0) once okay
+    self.path = Polylinet(oled_width, oled_height, oled_width // 2 + 4, 0)
+    self.steps = 0
     self.dx = 0
     self.x0 = 0
     self.xn = 0
     self.y0 = y0
     self.signal = -1
 
+class Scenery(object):
+  def __init__(self):
+    self.frame = None
+
 ###############################################
 trees = [bytearray([0xff,0xff,0xff,0xff,0xff,0xff,0xc0,0xff,0xff,0xff,0xff,0xff,0xff,0xc0,0xff,0xff,0xff,0xff,0xff,0xff,0xc0,0xff,0xff,0xff,0xf5,0xff,0xff,0xc0,0xff,0xff,0xff,0xe1,0xff,0xff,0xc0,0xff,0xff,0xf9,0xc9,0xff,0xff,0xc0,0xff,0xff,0xc0,0x82,0x7f,0xff,0xc0,0xff,0xff,0x80,0x40,0x3f,0xff,0xc0,0xff,0xff,0x0,0x0,0xf,0xff,0xc0,0xff,0xff,0x0,0x0,0xf,0xff,0xc0,0xff,0xfc,0x0,0x0,0x7,0xff,0xc0,0xff,0xfc,0x0,0x0,0x7,0xff,0xc0,0xff,0xf8,0x0,0x0,0x7,0xff,0xc0,0xff,0xf0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x3,0xff,0xc0,0xff,0xe0,0x0,0x0,0x1,0xff,0xc0,0xff,0xe0,0x0,0x0,0x1,0xff,0xc0,0xff,0xd0,0x0,0x0,0x0,0xff,0xc0,0xff,0x80,0x0,0x0,0x0,0xff,0xc0,0xff,0x80,0x0,0x0,0x0,0xff,0xc0,0xff,0x80,0x0,0x0,0x0,0x7f,0xc0,0xff,0x80,0x0,0x0,0x0,0x3f,0xc0,0xff,0x80,0x0,0x0,0x0,0x3f,0xc0,0xfe,0x0,0x0,0x0,0x0,0x3f,0xc0,0xfe,0x0,0x0,0x0,0x0,0x1f,0xc0,0xfc,0x0,0x0,0x0,0x0,0x1f,0xc0,0xfc,0x0,0x0,0x0,0x0,0x1f,0xc0,0xfc,0x0,0x0,0x0,0x0,0x1f,0xc0,0xff,0x0,0x0,0x0,0x0,0xf,0xc0,0xff,0x0,0x2,0x0,0x0,0x1f,0xc0,0xff,0x72,0x82,0x84,0xc0,0x3f,0xc0,0xff,0xf5,0x82,0x1,0xe0,0x3f,0xc0,0xff,0xff,0x15,0x2f,0xe0,0x3f,0xc0,0xff,0xff,0xfe,0x2f,0xe5,0x3f,0xc0,0xff,0xff,0xff,0x3f,0xcd,0xff,0xc0,0xff,0xff,0xff,0x1f,0xdf,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xff,0xff,0xff,0xff,0xc0]),
           bytearray([0xff,0xff,0xff,0xff,0xff,0xff,0xc0,0xff,0xff,0xff,0xbf,0xff,0xff,0xc0,0xff,0xff,0xff,0x3f,0xff,0xff,0xc0,0xff,0xff,0xfe,0x3f,0xff,0xff,0xc0,0xff,0xff,0xfc,0xf,0xff,0xff,0xc0,0xff,0xff,0xf8,0x8d,0xff,0xff,0xc0,0xff,0xff,0x30,0x9,0xff,0xff,0xc0,0xff,0xff,0x0,0x0,0xff,0xff,0xc0,0xff,0xff,0x0,0x0,0xff,0xff,0xc0,0xff,0xfe,0x0,0x81,0xff,0xff,0xc0,0xff,0xfe,0x0,0x7,0xff,0xff,0xc0,0xff,0xfe,0x0,0x3,0xff,0xff,0xc0,0xff,0xff,0x80,0x0,0x3f,0xff,0xc0,0xff,0xff,0xc0,0x0,0xf,0x7f,0xc0,0xff,0xfc,0xc0,0x0,0x0,0x7f,0xc0,0xff,0xf8,0x0,0x0,0x0,0x3f,0xc0,0xff,0xf8,0x0,0x0,0x0,0x3f,0xc0,0xff,0xf0,0x0,0x0,0x0,0x7f,0xc0,0xff,0xf0,0x0,0x1,0x83,0xff,0xc0,0xff,0xf0,0x0,0x0,0x7,0xf1,0xc0,0xff,0xf0,0x0,0x0,0xf,0xe3,0xc0,0xff,0xf8,0x0,0x1,0x87,0x87,0xc0,0xff,0xf0,0x0,0x0,0x86,0x43,0xc0,0xff,0xf0,0x0,0x0,0x0,0x3,0xc0,0xff,0xe0,0x0,0x0,0x0,0x23,0xc0,0xff,0x80,0x0,0x0,0x0,0xf,0xc0,0xfe,0x0,0x0,0x0,0x0,0xf,0xc0,0xfe,0x0,0x0,0x0,0x0,0xf,0xc0,0xfc,0x0,0x0,0x0,0x0,0x27,0xc0,0xfc,0x0,0x0,0x0,0x0,0x7,0xc0,0xfe,0x0,0x0,0x0,0x0,0x1f,0xc0,0xf0,0x0,0x0,0x0,0x0,0x1f,0xc0,0xc0,0x0,0x8,0x0,0x0,0x4f,0xc0,0xf0,0x0,0x0,0x0,0x0,0x7,0xc0,0xf0,0x0,0x0,0x0,0x0,0x3,0xc0,0xc0,0x1,0x0,0x0,0x0,0xc0,0xc0,0xc0,0x3,0x0,0x0,0x0,0x3,0xc0,0xf8,0x12,0x18,0x0,0x0,0x47,0xc0,0xf8,0x0,0x6,0x80,0x0,0x7,0xc0,0xfc,0x0,0xf,0xc0,0x0,0x7,0xc0,0xff,0xc0,0xf,0xc0,0x4,0x7,0xc0,0xff,0xc3,0x1f,0xce,0x1f,0xc1,0xc0,0xff,0xff,0xff,0xdf,0xff,0xfb,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0xdf,0xff,0xff,0xc0,0xff,0xff,0xff,0x8f,0xff,0xff,0xc0])]
@@ -31,6 +38,7 @@ surface_y = 54
 # but can modify values in a global dictionary
 #   or members of a global object,
 hypha = Hypha(surface_y)
+scenery = Scenery()
 
 ###############################################
 def light_led(rgb_obj):
@@ -52,28 +60,23 @@ def display_tree():
   oled.line(0, surface_y, oled_width, surface_y, 0)
   
 def display_hypha():
-  size = len(hypha.ys)
+  # the path keeps its own layer, only the new segment is rasterized when it grows
+  if 0 <= hypha.signal < hypha.steps:
+    hypha.path.set_marker(hypha.signal + 1)
+  else:
+    hypha.path.set_marker(-1)
   
-  if size > 0:
-    px = hypha.x0
-    py = hypha.y0
-    
-    for i in range(0, size):
-      nx = px + hypha.dx
-      ny = hypha.ys[i]
-      oled.line(px, py, nx, ny, 0)
-      px = nx
-      py = ny
-      
-      if i == hypha.signal:
-        oled.fill_circle(nx, ny, 2, 0)
-      
-    if hypha.okay:
-      oled.line(px, py, hypha.xn, hypha.y0, 0)
+  hypha.path.draw(oled, 0, 0, oled_width, oled_height)
   
 def oled_refresh():
-  oled.fill(255)
-  display_tree()
+  # the trees never change, they are drawn once and then copied back
+  if scenery.frame is None:
+    oled.fill(255)
+    display_tree()
+    scenery.frame = bytearray(oled.buffer)
+  else:
+    oled.buffer[:] = scenery.frame
+  
   display_hypha()
   oled.show()
 
@@ -81,28 +84,27 @@ def oled_refresh():
 def on_tick(_):
   if not hypha.okay:
     if hypha.x0 > 0:
-      size = len(hypha.ys)
+      size = hypha.steps
 
       if size % 2 == 0:
         light_led((0, 0, 255))
       else:
         light_led((0, 0, 0))
 
-      if size > 0:
-        py = hypha.ys[-1]
-      else:
-        py = hypha.y0
-      
+      px, py = hypha.path.get_point(size)
       ny = py + randint(-1, 1)
       
       if (ny >= oled_height) or (ny <= surface_y):
-        hypha.ys.append(py)
+        hypha.path.append(px + hypha.dx, py)
       else:
-        hypha.ys.append(ny)
+        hypha.path.append(px + hypha.dx, ny)
+      
+      hypha.steps += 1
       
       if size > (oled_width // 2):
         light_led((0, 255, 0))
         hypha.okay = True
+        hypha.path.append(hypha.xn, hypha.y0)
         
       oled_refresh()
   else:
@@ -114,7 +116,7 @@ def on_tick(_):
       light_led((0, 0, 0))
     
     if hypha.signal >= 0:
-      if hypha.signal >= len(hypha.ys):
+      if hypha.signal >= hypha.steps:
         hypha.signal = -1
         light_led((0, 255, 0))
       else:
@@ -129,6 +131,7 @@ def on_A_pressed(_):
         hypha.x0 = oled_width // 4
         hypha.xn = oled_width // 2 + hypha.x0
         hypha.dx = 1
+        hypha.path.append(hypha.x0, hypha.y0)
 
 def on_B_pressed(_):
   if not button_b.value() == 1:
@@ -137,6 +140,7 @@ def on_B_pressed(_):
         hypha.x0 = 3 * oled_width // 4
         hypha.xn = hypha.x0 - oled_width // 2
         hypha.dx = -1
+        hypha.path.append(hypha.x0, hypha.y0)
     
 ###############################################
 def timer_start():
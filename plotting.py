@@ -0,0 +1,161 @@
+# Batch plotting straight into a MONO_VLSB framebuffer, the page layout of the SSD1306 family:
+# byte `(y >> 3) * width + x` holds 8 vertical pixels, the least significant bit on top
+
+import sys
+
+if sys.implementation.name == "cpython":
+    try:
+        import numpy as _numpy
+    except ImportError:
+        _numpy = None
+else:
+    _numpy = None
+
+###############################################################################
+# below this many items, numpy costs more than it saves
+_NUMPY_THRESHOLD = 64
+
+# radius -> (dxs, dys, hs), the columns of a filled dot
+_dot_spans = {}
+
+###############################################################################
+def vlsb_points(buffer, width, height, xs, ys, n, c = 1, ox = 0, oy = 0):
+    '''
+    Plot `n` points, those off the screen are clipped
+
+    :param xs: x coordinates, an `array`, a `memoryview` or a list, floats are truncated
+    :param c: 1 sets the pixels, 0 clears them, 2 inverts them
+    :param ox: added to every x, and `oy` to every y
+    '''
+
+    if _numpy is not None and n >= _NUMPY_THRESHOLD:
+        _numpy_points(buffer, width, height, _numpy.asarray(xs)[0:n], _numpy.asarray(ys)[0:n], c, ox, oy)
+    elif c == 1:
+        for i in range(n):
+            x, y = int(xs[i]) + ox, int(ys[i]) + oy
+
+            if 0 <= x < width and 0 <= y < height:
+                buffer[(y >> 3) * width + x] |= 1 << (y & 7)
+    elif c == 0:
+        for i in range(n):
+            x, y = int(xs[i]) + ox, int(ys[i]) + oy
+
+            if 0 <= x < width and 0 <= y < height:
+                buffer[(y >> 3) * width + x] &= ~(1 << (y & 7))
+    else:
+        for i in range(n):
+            x, y = int(xs[i]) + ox, int(ys[i]) + oy
+
+            if 0 <= x < width and 0 <= y < height:
+                buffer[(y >> 3) * width + x] ^= 1 << (y & 7)
+
+def vlsb_vspans(buffer, width, height, xs, ys, n, hs, c = 1, ox = 0, oy = 0):
+    '''
+    Plot `n` vertical spans, from (x, y) downwards, whole bytes are written where the spans cover them
+
+    :param hs: the heights of the spans, or one height for all
+    '''
+
+    same = isinstance(hs, int)
+
+    if _numpy is not None and n >= _NUMPY_THRESHOLD:
+        nxs, nys = _numpy.asarray(xs)[0:n].astype(int), _numpy.asarray(ys)[0:n].astype(int)
+        nhs = _numpy.full(n, hs) if same else _numpy.asarray(hs)[0:n].astype(int)
+        nhs = _numpy.maximum(nhs, 0)
+        owners = _numpy.repeat(_numpy.arange(n), nhs)
+        steps = _numpy.arange(len(owners)) - _numpy.repeat(_numpy.cumsum(nhs) - nhs, nhs)
+        _numpy_points(buffer, width, height, nxs[owners], nys[owners] + steps, c, ox, oy)
+    else:
+        for i in range(n):
+            _vspan(buffer, width, height, int(xs[i]) + ox, int(ys[i]) + oy, hs if same else int(hs[i]), c)
+
+def vlsb_dots(buffer, width, height, xs, ys, n, radius = 1, c = 1, ox = 0, oy = 0):
+    '''
+    Plot `n` filled dots centered on the points, shaped like `fill_circle` draws them,
+    a dot of radius 1 is a plus sign
+    '''
+
+    spans = _dot_spans.get(radius)
+
+    if spans is None:
+        spans = _make_dot_spans(radius)
+        _dot_spans[radius] = spans
+
+    dxs, dys, hs = spans
+
+    if _numpy is not None and n >= _NUMPY_THRESHOLD:
+        nxs, nys = _numpy.asarray(xs)[0:n].astype(int), _numpy.asarray(ys)[0:n].astype(int)
+
+        for k in range(len(dxs)):
+            vlsb_vspans(buffer, width, height, nxs, nys, n, hs[k], c, ox + dxs[k], oy + dys[k])
+    else:
+        for i in range(n):
+            x, y = int(xs[i]) + ox, int(ys[i]) + oy
+
+            for k in range(len(dxs)):
+                _vspan(buffer, width, height, x + dxs[k], y + dys[k], hs[k], c)
+
+###############################################################################
+def _vspan(buffer, width, height, x, y, h, c):
+    if 0 <= x < width:
+        y0, y1 = max(y, 0), min(y + h, height)
+
+        while y0 < y1:
+            page = y0 >> 3
+            bottom = min(y1, (page + 1) << 3)
+            mask = ((1 << (bottom - y0)) - 1) << (y0 & 7)
+            idx = page * width + x
+
+            if c == 1:
+                buffer[idx] |= mask
+            elif c == 0:
+                buffer[idx] &= ~mask
+            else:
+                buffer[idx] ^= mask
+
+            y0 = bottom
+
+def _make_dot_spans(r):
+    # the midpoint circle of `fill_circle`, collected into one vertical span per column
+    tops, bottoms = [r] * (2 * r + 1), [-r - 1] * (2 * r + 1)
+    x, y, err = r, 0, 1 - r
+
+    while x >= y:
+        for half, dy in ((x, y), (x, -y), (y, x), (y, -x)):
+            for dx in range(-half, half + 1):
+                tops[dx + r] = min(tops[dx + r], dy)
+                bottoms[dx + r] = max(bottoms[dx + r], dy)
+
+        y += 1
+        if err < 0:
+            err += 2 * y + 1
+        else:
+            x -= 1
+            err += 2 * (y - x) + 1
+
+    dxs, dys, hs = [], [], []
+
+    for dx in range(-r, r + 1):
+        if bottoms[dx + r] >= tops[dx + r]:
+            dxs.append(dx)
+            dys.append(tops[dx + r])
+            hs.append(bottoms[dx + r] - tops[dx + r] + 1)
+
+    return tuple(dxs), tuple(dys), tuple(hs)
+
+def _numpy_points(buffer, width, height, xs, ys, c, ox, oy):
+    xs = xs.astype(int) + ox
+    ys = ys.astype(int) + oy
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    xs, ys = xs[inside], ys[inside]
+    pages = _numpy.frombuffer(buffer, dtype = _numpy.uint8)
+    idx = (ys >> 3) * width + xs
+    bits = (1 << (ys & 7)).astype(_numpy.uint8)
+
+    # the unbuffered `at` applies every point, even those landing on the same byte
+    if c == 1:
+        _numpy.bitwise_or.at(pages, idx, bits)
+    elif c == 0:
+        _numpy.bitwise_and.at(pages, idx, ~bits)
+    else:
+        _numpy.bitwise_xor.at(pages, idx, bits)
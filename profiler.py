@@ -0,0 +1,185 @@
+# Frame profiler, timings in microseconds collected into preallocated histograms
+
+from array import array
+
+import time
+
+###############################################################################
+class ProfilePhase(object):
+    UPDATE = 0
+    MOTION = 1
+    COLLISION = 2
+    BACKGROUND = 3
+    DRAW = 4
+    SHOW = 5
+    EVENTS = 6
+
+_PHASE_NAMES = ('update', 'motion', 'collision', 'background', 'draw', 'show', 'events')
+_MATTER_PHASES = 2 # update and draw
+
+###############################################################################
+class Profiler(object):
+    '''
+    Timings of the phases of a frame, and of `update` and `draw` of each kind of matter.
+
+    Every sample lands in a histogram of power-of-two buckets: bucket `i` counts the samples
+    taking less than `2 ** i` microseconds. Counters are preallocated arrays, recording a sample
+    allocates nothing, except the first time a new class of matter shows up. Totals carry
+    whole seconds into counters of their own, so that they neither wrap nor leave the small ints.
+
+    :param max_classes: matter classes beyond this number are all recorded as 'others'
+    :param buckets: the last bucket collects everything slower than `2 ** (buckets - 2)` microseconds
+    '''
+
+    def __init__(self, max_classes = 16, buckets = 20):
+        super(Profiler, self).__init__()
+
+        phases = len(_PHASE_NAMES)
+        self.__buckets = buckets
+        self.__histograms = array('L', [0] * (phases * buckets))
+        self.__counts = array('L', [0] * phases)
+        self.__totals = array('L', [0] * phases)
+        self.__seconds = array('L', [0] * phases)
+        self.__maxima = array('L', [0] * phases)
+
+        self.__max_classes = max_classes
+        self.__classes = {}
+        self.__class_names = []
+        self.__class_counts = array('L', [0] * ((max_classes + 1) * _MATTER_PHASES))
+        self.__class_totals = array('L', [0] * ((max_classes + 1) * _MATTER_PHASES))
+        self.__class_seconds = array('L', [0] * ((max_classes + 1) * _MATTER_PHASES))
+        self.__class_maxima = array('L', [0] * ((max_classes + 1) * _MATTER_PHASES))
+
+# public
+    def record(self, phase, t0):
+        ''' :param t0: the `time.ticks_us()` when the phase started '''
+        return self.add(phase, time.ticks_diff(time.ticks_us(), t0))
+
+    def add(self, phase, elapsed):
+        ''' Record a sample measured by the caller, say, a phase split into several pieces '''
+        self.__counts[phase] += 1
+        _accumulate(self.__totals, self.__seconds, phase, elapsed)
+
+        if elapsed > self.__maxima[phase]:
+            self.__maxima[phase] = elapsed
+
+        self.__histograms[phase * self.__buckets + self.__bucket_of(elapsed)] += 1
+
+        return elapsed
+
+    def record_matter(self, phase, m, t0):
+        ''' Record `phase` on behalf of the class of `m`, the phase as a whole is recorded by its caller '''
+        elapsed = time.ticks_diff(time.ticks_us(), t0)
+        cls = m.__class__
+
+        if cls in self.__classes:
+            slot = self.__classes[cls]
+        else:
+            slot = self.__register_class(cls)
+
+        slot = slot * _MATTER_PHASES + (0 if phase == ProfilePhase.UPDATE else 1)
+        self.__class_counts[slot] += 1
+        _accumulate(self.__class_totals, self.__class_seconds, slot, elapsed)
+
+        if elapsed > self.__class_maxima[slot]:
+            self.__class_maxima[slot] = elapsed
+
+    def reset(self):
+        for counters in (self.__histograms, self.__counts, self.__totals, self.__seconds, self.__maxima,
+                         self.__class_counts, self.__class_totals, self.__class_seconds, self.__class_maxima):
+            for i in range(len(counters)):
+                counters[i] = 0
+
+    def summary(self):
+        '''
+        :return: a list of (phase name, samples, total us, mean us, p50 us, p99 us, max us),
+                 p50 and p99 are the upper bounds of the buckets holding them
+        '''
+        rows = []
+
+        for phase in range(len(_PHASE_NAMES)):
+            count = self.__counts[phase]
+
+            if count > 0:
+                total = self.__seconds[phase] * 1000000 + self.__totals[phase]
+                rows.append((_PHASE_NAMES[phase], count, total, total // count,
+                             self.__percentile(phase, 50), self.__percentile(phase, 99), self.__maxima[phase]))
+
+        return rows
+
+    def class_summary(self):
+        ''' :return: a list of (class name, 'update' or 'draw', samples, total us, mean us, max us) '''
+        rows = []
+
+        for slot in range(len(self.__class_names)):
+            for k in range(_MATTER_PHASES):
+                idx = slot * _MATTER_PHASES + k
+                count = self.__class_counts[idx]
+
+                if count > 0:
+                    total = self.__class_seconds[idx] * 1000000 + self.__class_totals[idx]
+                    rows.append((self.__class_names[slot], 'update' if k == 0 else 'draw', count,
+                                 total, total // count, self.__class_maxima[idx]))
+
+        return rows
+
+    def dump(self, stream = None):
+        ''' Print the summaries, to the serial console by default '''
+        print("%-12s %8s %10s %8s %8s %8s %8s" % ('phase', 'samples', 'total', 'mean', 'p50', 'p99', 'max'), file = stream)
+        for row in self.summary():
+            print("%-12s %8d %10d %8d %8d %8d %8d" % row, file = stream)
+
+        print("%-16s %-6s %8s %10s %8s %8s" % ('matter', 'phase', 'samples', 'total', 'mean', 'max'), file = stream)
+        for row in self.class_summary():
+            print("%-16s %-6s %8d %10d %8d %8d" % row, file = stream)
+
+# private
+    def __bucket_of(self, elapsed):
+        bucket = 0
+        last = self.__buckets - 1
+
+        while elapsed > 0 and bucket < last:
+            elapsed >>= 1
+            bucket += 1
+
+        return bucket
+
+    def __percentile(self, phase, p):
+        base = phase * self.__buckets
+        goal = (self.__counts[phase] * p + 99) // 100
+        seen, bucket = 0, 0
+
+        while bucket < self.__buckets:
+            seen += self.__histograms[base + bucket]
+
+            if seen >= goal:
+                break
+
+            bucket += 1
+
+        return min((1 << bucket) - 1, self.__maxima[phase])
+
+    def __register_class(self, cls):
+        slot = len(self.__class_names)
+
+        if slot < self.__max_classes:
+            self.__class_names.append(cls.__name__)
+        elif slot == self.__max_classes:
+            self.__class_names.append('others')
+        else:
+            slot = self.__max_classes
+
+        self.__classes[cls] = slot
+
+        return slot
+
+###############################################################################
+def _accumulate(totals, seconds, idx, elapsed):
+    # microseconds below a second, whole seconds carried into `seconds`
+    total = totals[idx] + elapsed
+
+    if total >= 1000000:
+        seconds[idx] += total // 1000000
+        total %= 1000000
+
+    totals[idx] = total
@@ -0,0 +1,699 @@
+# Headless stand-in for the mpython board, run universes on a desktop Python
+
+import sys
+import time
+import types
+
+_perf_counter = time.perf_counter
+
+###############################################################################
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+###############################################################################
+class VirtualClock(object):
+    '''
+    A millisecond clock that only moves when the simulator says so.
+
+    `time.ticks_*` are patched to read this clock and wrap around like MicroPython does,
+    so code that subtracts ticks directly instead of using `ticks_diff` breaks here as well.
+
+    Set `wall_us` to make `ticks_us` read the host's clock instead, so that a profiler
+    measures how long the code really takes while the game still runs on virtual time.
+    '''
+
+    def __init__(self, start = 0):
+        super(VirtualClock, self).__init__()
+        self.now = start
+        self.wall_us = False
+
+    def ticks_ms(self):
+        return self.now & _TICKS_MAX
+
+    def ticks_us(self):
+        if self.wall_us:
+            us = int(_perf_counter() * 1000000)
+        else:
+            us = self.now * 1000
+
+        return us & _TICKS_MAX
+
+    def ticks_diff(self, end, start):
+        return ((end - start + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+    def ticks_add(self, ticks, delta):
+        return (ticks + delta) & _TICKS_MAX
+
+    def sleep_ms(self, ms):
+        self.now += ms
+
+    def patch(self, module):
+        module.ticks_ms = self.ticks_ms
+        module.ticks_us = self.ticks_us
+        module.ticks_cpu = self.ticks_us
+        module.ticks_diff = self.ticks_diff
+        module.ticks_add = self.ticks_add
+        module.sleep_ms = self.sleep_ms
+
+###############################################################################
+class FrameBuffer(object):
+    '''
+    Pure Python port of MicroPython's `framebuf.FrameBuffer` for the monochrome formats.
+
+    Clipping, the line algorithm and the byte layouts follow `modframebuf.c`,
+    so a frame drawn here has the same bytes as one drawn on the board.
+    '''
+
+    def __init__(self, buffer, width, height, format = MONO_VLSB, stride = None):
+        super(FrameBuffer, self).__init__()
+        self.buffer = buffer
+        self.width, self.height = width, height
+        self.format = format
+        self.stride = stride if stride is not None else width
+
+        if format != MONO_VLSB:
+            self.stride = (self.stride + 7) & ~7
+
+# public
+    def pixel(self, x, y, c = None):
+        value = None
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if c is None:
+                value = self.__get(x, y)
+            else:
+                self.__set(x, y, c)
+
+        return value
+
+    def fill(self, c):
+        value = 0xFF if c else 0x00
+        buf = self.buffer
+
+        for i in range(len(buf)):
+            buf[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        if h >= 1 and w >= 1 and x + w > 0 and y + h > 0 and x < self.width and y < self.height:
+            xend, yend = min(self.width, x + w), min(self.height, y + h)
+            x, y = max(x, 0), max(y, 0)
+
+            if self.format == MONO_VLSB:
+                self.__fill_rect_vlsb(x, y, xend, yend, c)
+            else:
+                for yy in range(y, yend):
+                    for xx in range(x, xend):
+                        self.__set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f = False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+        else:
+            self.fill_rect(x, y, w, 1, c)
+            self.fill_rect(x, y + h - 1, w, 1, c)
+            self.fill_rect(x, y, 1, h, c)
+            self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = x2 - x1
+        if dx > 0:
+            sx = 1
+        else:
+            dx, sx = -dx, -1
+
+        dy = y2 - y1
+        if dy > 0:
+            sy = 1
+        else:
+            dy, sy = -dy, -1
+
+        steep = dy > dx
+        if steep:
+            x1, y1 = y1, x1
+            dx, dy = dy, dx
+            sx, sy = sy, sx
+
+        e = 2 * dy - dx
+        for _ in range(dx):
+            if steep:
+                self.pixel(y1, x1, c)
+            else:
+                self.pixel(x1, y1, c)
+
+            while e >= 0:
+                y1 += sy
+                e -= 2 * dx
+
+            x1 += sx
+            e += 2 * dy
+
+        self.pixel(x2, y2, c)
+
+    def blit(self, fbuf, x, y, key = -1, palette = None):
+        if x < self.width and y < self.height and x + fbuf.width > 0 and y + fbuf.height > 0:
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = max(-x, 0), max(-y, 0)
+            x0end, y0end = min(self.width, x + fbuf.width), min(self.height, y + fbuf.height)
+
+            for cy in range(y0, y0end):
+                cx1 = x1
+                for cx in range(x0, x0end):
+                    c = fbuf.pixel(cx1, y1)
+                    if palette is not None:
+                        c = palette.pixel(c, 0)
+                    if c != key:
+                        self.__set(cx, cy, c)
+                    cx1 += 1
+                y1 += 1
+
+    def scroll(self, xstep, ystep):
+        if xstep < 0:
+            sx, xend, dx = 0, self.width + xstep, 1
+            if xend <= 0: return
+        else:
+            sx, xend, dx = self.width - 1, xstep - 1, -1
+            if xend >= sx: return
+
+        if ystep < 0:
+            y, yend, dy = 0, self.height + ystep, 1
+            if yend <= 0: return
+        else:
+            y, yend, dy = self.height - 1, ystep - 1, -1
+            if yend >= y: return
+
+        while y != yend:
+            x = sx
+            while x != xend:
+                self.__set(x, y, self.__get(x - xstep, y - ystep))
+                x += dx
+            y += dy
+
+    def text(self, s, x, y, c = 1):
+        # the real font is not reproduced, every character becomes an 8x8 box with a blank right column
+        for ch in s:
+            if ch != ' ':
+                self.rect(x, y, 7, 8, c)
+            x += 8
+
+# private
+    def __get(self, x, y):
+        if self.format == MONO_VLSB:
+            value = (self.buffer[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        elif self.format == MONO_HLSB:
+            value = (self.buffer[(x + y * self.stride) >> 3] >> (7 - (x & 7))) & 1
+        else:
+            value = (self.buffer[(x + y * self.stride) >> 3] >> (x & 7)) & 1
+
+        return value
+
+    def __set(self, x, y, c):
+        if self.format == MONO_VLSB:
+            idx, bit = (y >> 3) * self.stride + x, 1 << (y & 7)
+        elif self.format == MONO_HLSB:
+            idx, bit = (x + y * self.stride) >> 3, 0x80 >> (x & 7)
+        else:
+            idx, bit = (x + y * self.stride) >> 3, 1 << (x & 7)
+
+        if c & 1:
+            self.buffer[idx] |= bit
+        else:
+            self.buffer[idx] &= ~bit & 0xFF
+
+    def __fill_rect_vlsb(self, x, y, xend, yend, c):
+        buf, stride = self.buffer, self.stride
+
+        while y < yend:
+            page = y >> 3
+            top = y & 7
+            bottom = min(8, top + yend - y)
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            base = page * stride
+
+            if c & 1:
+                for i in range(base + x, base + xend):
+                    buf[i] |= mask
+            else:
+                mask = ~mask & 0xFF
+                for i in range(base + x, base + xend):
+                    buf[i] &= mask
+
+            y += bottom - top
+
+###############################################################################
+class RecordingI2C(object):
+    ''' Keeps every `writeto` so that display traffic can be measured '''
+
+    def __init__(self):
+        super(RecordingI2C, self).__init__()
+        self.log = []
+        self.bytes_written = 0
+        self.recording = True
+
+    def writeto(self, addr, buf):
+        self.bytes_written += len(buf)
+
+        if self.recording:
+            self.log.append((addr, bytes(buf)))
+
+        return len(buf)
+
+    def clear(self):
+        del self.log[:]
+        self.bytes_written = 0
+
+class OLED(FrameBuffer):
+    '''
+    The 128x64 SSD1306/SH1106 of the board, in the MONO_VLSB layout.
+
+    `show()` copies the framebuffer to `frame`, which is what the panel would be displaying,
+    unless `snapshots` is off, say, while measuring the allocations of the code under test.
+    Circles and triangles are drawn with the classic midpoint and scanline algorithms,
+    `DispChar` draws placeholder boxes, 8 pixels per ASCII character and 16 for the others.
+    '''
+
+    def __init__(self, width = 128, height = 64):
+        super(OLED, self).__init__(bytearray(width * height // 8), width, height, MONO_VLSB)
+        self.frame = bytes(len(self.buffer))
+        self.shows = 0
+        self.snapshots = True
+        self.brightness, self.inverted = 255, 0
+        self.i2c = RecordingI2C()
+        self.addr = 0x3C
+        self.on_show = None
+
+    def show(self):
+        self.shows += 1
+
+        if self.snapshots:
+            self.frame = bytes(self.buffer)
+
+        self.i2c.bytes_written += len(self.buffer) + 1
+
+        if self.on_show:
+            self.on_show(self)
+
+    def contrast(self, brightness):
+        self.brightness = brightness
+
+    def invert(self, n):
+        self.inverted = n
+
+    def poweron(self):
+        pass
+
+    def poweroff(self):
+        pass
+
+    def circle(self, x0, y0, r, c):
+        self.__circle(x0, y0, r, c, False)
+
+    def fill_circle(self, x0, y0, r, c):
+        self.__circle(x0, y0, r, c, True)
+
+    def triangle(self, x0, y0, x1, y1, x2, y2, c):
+        self.line(x0, y0, x1, y1, c)
+        self.line(x1, y1, x2, y2, c)
+        self.line(x2, y2, x0, y0, c)
+
+    def fill_triangle(self, x0, y0, x1, y1, x2, y2, c):
+        if y0 > y1: x0, y0, x1, y1 = x1, y1, x0, y0
+        if y1 > y2: x1, y1, x2, y2 = x2, y2, x1, y1
+        if y0 > y1: x0, y0, x1, y1 = x1, y1, x0, y0
+
+        for y in range(y0, y2 + 1):
+            xa = self.__edge(x0, y0, x2, y2, y)
+
+            if y < y1:
+                xb = self.__edge(x0, y0, x1, y1, y)
+            else:
+                xb = self.__edge(x1, y1, x2, y2, y)
+
+            if xa > xb:
+                xa, xb = xb, xa
+
+            self.hline(xa, y, xb - xa + 1, c)
+
+    def Bitmap(self, x, y, bitmap, w, h, c):
+        bw = (w + 7) // 8
+
+        for j in range(h):
+            row = j * bw
+            for i in range(w):
+                if bitmap[row + (i >> 3)] & (0x80 >> (i & 7)):
+                    self.pixel(x + i, y + j, c)
+
+    def DispChar(self, s, x, y, mode = 1, auto_return = False):
+        c = 0 if mode == 2 else 1
+
+        for ch in s:
+            advance = 8 if ord(ch) < 128 else 16
+            if ch != ' ':
+                self.rect(x, y + 1, advance - 1, 14, c)
+            x += advance
+
+        return x, y
+
+    def to_text(self, frame = None):
+        ''' The displayed frame as lines of '#' and '.', for test logs and terminals '''
+        fb = FrameBuffer(bytearray(frame if frame is not None else self.frame), self.width, self.height)
+        lines = []
+
+        for y in range(self.height):
+            lines.append(''.join('#' if fb.pixel(x, y) else '.' for x in range(self.width)))
+
+        return '\n'.join(lines)
+
+# private
+    def __circle(self, x0, y0, r, c, filled):
+        x, y, err = r, 0, 1 - r
+
+        while x >= y:
+            if filled:
+                self.hline(x0 - x, y0 + y, 2 * x + 1, c)
+                self.hline(x0 - x, y0 - y, 2 * x + 1, c)
+                self.hline(x0 - y, y0 + x, 2 * y + 1, c)
+                self.hline(x0 - y, y0 - x, 2 * y + 1, c)
+            else:
+                for dx, dy in ((x, y), (y, x), (-y, x), (-x, y), (-x, -y), (-y, -x), (y, -x), (x, -y)):
+                    self.pixel(x0 + dx, y0 + dy, c)
+
+            y += 1
+            if err < 0:
+                err += 2 * y + 1
+            else:
+                x -= 1
+                err += 2 * (y - x) + 1
+
+    def __edge(self, xa, ya, xb, yb, y):
+        if yb == ya:
+            x = xa
+        else:
+            x = xa + (xb - xa) * (y - ya) // (yb - ya)
+
+        return x
+
+###############################################################################
+class Pin(object):
+    IN, OUT = 1, 3
+    PULL_UP, PULL_DOWN = 2, 1
+    IRQ_FALLING, IRQ_RISING = 2, 1
+
+    def __init__(self, id = None, mode = IN, pull = None, value = 1):
+        super(Pin, self).__init__()
+        self.id, self.level = id, value
+        self.handler, self.trigger = None, 0
+
+    def value(self, level = None):
+        if level is None:
+            level = self.level
+        else:
+            self.drive(level)
+
+        return level
+
+    def irq(self, handler = None, trigger = IRQ_FALLING | IRQ_RISING):
+        self.handler, self.trigger = handler, trigger
+
+    def drive(self, level):
+        edge = 0
+
+        if self.level and not level:
+            edge = Pin.IRQ_FALLING
+        elif not self.level and level:
+            edge = Pin.IRQ_RISING
+
+        self.level = level
+
+        if self.handler and (edge & self.trigger):
+            self.handler(self)
+
+class TouchPad(object):
+    ''' Raw capacitive readings, lower when touched '''
+
+    def __init__(self, idle = 600):
+        super(TouchPad, self).__init__()
+        self.value = idle
+        self.idle = idle
+
+    def read(self):
+        return self.value
+
+class AnalogSensor(object):
+    ''' `value` may also be a function of the virtual time in milliseconds '''
+
+    def __init__(self, clock, value = 0):
+        super(AnalogSensor, self).__init__()
+        self.clock, self.value = clock, value
+
+    def read(self):
+        value = self.value
+        if callable(value):
+            value = value(self.clock.now)
+
+        return int(value)
+
+class Accelerometer(object):
+    def __init__(self):
+        super(Accelerometer, self).__init__()
+        self.x, self.y, self.z = 0.0, 0.0, -1.0
+        self.range = 0
+        self.reads = 0
+
+    def set_range(self, range):
+        self.range = range
+
+    def get_x(self):
+        self.reads += 1
+        return self.x
+
+    def get_y(self):
+        self.reads += 1
+        return self.y
+
+    def get_z(self):
+        self.reads += 1
+        return self.z
+
+    def roll_pitch_angle(self):
+        import math
+
+        self.reads += 3
+        roll = math.degrees(math.atan2(self.y, -self.z))
+        pitch = math.degrees(math.atan2(self.x, math.sqrt(self.y * self.y + self.z * self.z)))
+
+        return roll, pitch
+
+class NeoPixels(object):
+    ''' The on-board RGB LEDs, `pixels` holds what `write()` last pushed '''
+
+    def __init__(self, count = 3):
+        super(NeoPixels, self).__init__()
+        self.colors = [(0, 0, 0)] * count
+        self.pixels = tuple(self.colors)
+        self.writes = 0
+
+    def __len__(self):
+        return len(self.colors)
+
+    def __setitem__(self, idx, color):
+        self.colors[idx] = color
+
+    def __getitem__(self, idx):
+        return self.colors[idx]
+
+    def fill(self, color):
+        for i in range(len(self.colors)):
+            self.colors[i] = color
+
+    def write(self):
+        self.pixels = tuple(self.colors)
+        self.writes += 1
+
+###############################################################################
+class Timer(object):
+    ONE_SHOT, PERIODIC = 0, 1
+
+    def __init__(self, id = -1):
+        super(Timer, self).__init__()
+        self.id = id
+        self.period, self.mode, self.callback = 0, Timer.PERIODIC, None
+        self.due = None
+
+        if Simulator.current is not None:
+            Simulator.current.timers.append(self)
+
+    def init(self, mode = PERIODIC, period = 1000, callback = None):
+        self.period, self.mode, self.callback = max(1, period), mode, callback
+        self.due = Simulator.current.clock.now + self.period
+
+    def deinit(self):
+        self.due = None
+
+class Simulator(object):
+    '''
+    Fake `mpython`, `machine`, `micropython` and `framebuf` modules plus a virtual clock.
+
+    `install()` must run before `universe` (or anything importing `mpython`) is imported.
+    `run(ms)` then jumps from one timer deadline to the next instead of sleeping,
+    so minutes of game time take as long as the Python code needs to execute them.
+    '''
+
+    current = None
+
+    def __init__(self, schedule_depth = 8):
+        super(Simulator, self).__init__()
+
+        self.clock = VirtualClock()
+        self.timers = []
+        self.scheduled = []
+        self.schedule_depth = schedule_depth
+        self.script = []
+        self.oled = OLED()
+        self.button_a, self.button_b = Pin(0), Pin(2)
+        self.touchpads = {}
+        for name in 'PYTHON':
+            self.touchpads[name] = TouchPad()
+        self.light = AnalogSensor(self.clock)
+        self.sound = AnalogSensor(self.clock)
+        self.accelerometer = Accelerometer()
+        self.rgb = NeoPixels()
+
+# public
+    def run(self, ms):
+        ''' Advance the virtual clock by `ms`, firing timers, scripted inputs and scheduled callbacks on the way '''
+        end = self.clock.now + ms
+
+        while True:
+            due, what = self.__next_deadline(end)
+            if what is None:
+                break
+
+            self.clock.now = due
+
+            if isinstance(what, Timer):
+                if what.mode == Timer.PERIODIC:
+                    what.due += what.period
+                else:
+                    what.due = None
+                what.callback(what)
+            else:
+                self.script.remove(what)
+                what[1]()
+
+            self.drain_scheduled()
+
+        self.clock.now = end
+
+    def at(self, ms, action):
+        ''' Run `action()` when the virtual clock reaches `ms` '''
+        self.script.append((ms, action))
+
+    def after(self, ms, action):
+        self.at(self.clock.now + ms, action)
+
+    def press(self, button, pressed = True):
+        ''' `button` is 'A' or 'B' '''
+        pin = self.button_a if button == 'A' else self.button_b
+        pin.drive(0 if pressed else 1)
+
+    def release(self, button):
+        self.press(button, False)
+
+    def touch(self, pad, touched = True, reading = 150):
+        pad = self.touchpads[pad]
+        pad.value = reading if touched else pad.idle
+
+    def tilt(self, x, y, z = -1.0):
+        self.accelerometer.x, self.accelerometer.y, self.accelerometer.z = x, y, z
+
+    def schedule(self, callback, arg):
+        if len(self.scheduled) >= self.schedule_depth:
+            raise RuntimeError("schedule queue full")
+
+        self.scheduled.append((callback, arg))
+
+    def drain_scheduled(self):
+        while self.scheduled:
+            callback, arg = self.scheduled.pop(0)
+            callback(arg)
+
+    def install(self):
+        Simulator.current = self
+        self.clock.patch(time)
+
+        fb = types.ModuleType('framebuf')
+        fb.FrameBuffer = FrameBuffer
+        fb.FrameBuffer1 = FrameBuffer
+        fb.MONO_VLSB, fb.MONO_HLSB, fb.MONO_HMSB = MONO_VLSB, MONO_HLSB, MONO_HMSB
+
+        machine = types.ModuleType('machine')
+        machine.Timer = Timer
+        machine.Pin = Pin
+        machine.freq = lambda *args: 240000000
+
+        mp = types.ModuleType('micropython')
+        mp.schedule = self.schedule
+        mp.const = lambda value: value
+        mp.mem_info = lambda *args: None
+
+        board = types.ModuleType('mpython')
+        board.oled = self.oled
+        board.display = self.oled
+        board.Pin = Pin
+        board.button_a, board.button_b = self.button_a, self.button_b
+        for name in 'PYTHON':
+            setattr(board, 'touchPad_' + name, self.touchpads[name])
+        board.light, board.sound = self.light, self.sound
+        board.accelerometer = self.accelerometer
+        board.rgb = self.rgb
+        board.sleep_ms = self.clock.sleep_ms
+        board.__all__ = [name for name in dir(board) if not name.startswith('_')]
+
+        for module in (fb, machine, mp, board):
+            sys.modules[module.__name__] = module
+
+        return self
+
+# private
+    def __next_deadline(self, end):
+        due, what = end + 1, None
+
+        for timer in self.timers:
+            if timer.due is not None and timer.due < due:
+                due, what = timer.due, timer
+
+        for item in self.script:
+            if item[0] < due:
+                due, what = item[0], item
+
+        return due, what
+
+def install(schedule_depth = 8):
+    ''' Register the fake board modules and return the simulator that drives them '''
+    return Simulator(schedule_depth).install()
+
+###############################################################################
+if __name__ == "__main__":
+    # python simulator.py ghost_football.FootballShot [milliseconds]
+    sim = install()
+
+    modname, classname = sys.argv[1].rsplit('.', 1)
+    ms = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    universe = getattr(__import__(modname), classname)(24)
+    universe.big_bang()
+    sim.run(ms)
+
+    print(sim.oled.to_text())
+    print("%d frames shown in %d virtual ms" % (sim.oled.shows, ms))
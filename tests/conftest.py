@@ -0,0 +1,52 @@
+# The tests run on a desktop Python against `simulator.py`, run them from the top of the repository:
+#
+#   python -m pytest -q
+#
+# The simulator is installed once for the whole session, since the engine modules keep
+# the fake board objects they imported.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulator
+board = simulator.install()
+
+import universe as universe_module
+import pytest
+
+###############################################################################
+@pytest.fixture(autouse = True)
+def sim():
+    ''' The board, with the screen cleared, the sensors at rest and no timers left over from the previous test '''
+    board.timers = []
+    board.script = []
+    board.scheduled = []
+    board.oled.fill(0)
+    board.oled.i2c.clear()
+    universe_module._timer_wheel = None
+
+    for name in board.touchpads:
+        board.touch(name, False)
+
+    board.light.value, board.sound.value = 0, 0
+    board.tilt(0.0, 0.0)
+
+    return board
+
+@pytest.fixture
+def bang():
+    ''' Start a universe without its timer, the test drives it with `tick` '''
+
+    def start(universe):
+        universe.big_bang()
+        universe.cancel_timer()
+
+        return universe
+
+    return start
+
+def tick(universe, count = 1, interval = 42):
+    for i in range(count):
+        universe._on_elapse(interval, i + 1, (i + 1) * interval)
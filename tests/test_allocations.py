@@ -0,0 +1,93 @@
+from cosmos import *
+
+import cosmos
+import random
+import tracemalloc
+import pytest
+
+# the drawing primitives of the simulated panel rasterize in Python, their garbage is not the board's
+PRIMITIVES = ('blit', 'fill_rect', 'fill', 'pixel', 'hline', 'vline', 'line', 'rect', 'show',
+              'circle', 'fill_circle', 'triangle', 'fill_triangle')
+
+###############################################################################
+class Crowd(Cosmos):
+    ''' Moving, bouncing and colliding shapes drawn from cached sprites '''
+
+    def __init__(self, population):
+        self.population = population
+        super(Crowd, self).__init__(24)
+
+    def load(self, width, height):
+        rng = random.Random(3)
+        self.enable_collision_detection(True)
+
+        for i in range(self.population):
+            m = (Circlet(3, True), Rectanglet(6, 4, True), Trianglet(5, 5, 0, 6, True))[i % 3]
+            m.enable_sprite_cache(True)
+            m.enable_collision(True)
+            m.set_border_strategy(BorderStrategy.BOUNCE)
+            m.set_speed(rng.uniform(0.5, 2.0), rng.uniform(0.0, 360.0))
+            self.insert(m, rng.randint(0, width - 8), rng.randint(0, height - 8))
+
+def nothing(*args):
+    pass
+
+def heap_taken(fn, *args):
+    ''' :return: the largest heap, above the start, that running `fn` takes '''
+    # fill CPython's free lists, so that what they hold back is not counted either
+    spare = [(i + 0.5, (i,) * (i % 10), [i], {}) for i in range(200)]
+    del spare
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn(*args)
+    taken = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return taken
+
+def garbage(sim, population, dirty):
+    '''
+    :return: the largest heaps that a steady `_on_elapse` and `refresh` take
+    '''
+    universe = Crowd(population)
+    universe.enable_dirty_rendering(dirty)
+    universe.big_bang()
+    universe.cancel_timer()
+
+    # sprites, buffers and the motion engine settle down first
+    for count in range(1, 200):
+        universe._on_elapse(41, count, count * 41)
+        universe.refresh()
+
+    for name in PRIMITIVES:
+        setattr(sim.oled, name, nothing)
+
+    elapsing, refreshing = 0, 0
+
+    for count in range(200, 300):
+        elapsing = max(elapsing, heap_taken(universe._on_elapse, 41, count, count * 41))
+        refreshing = max(refreshing, heap_taken(universe.refresh))
+
+    for name in PRIMITIVES:
+        delattr(sim.oled, name)
+
+    universe.erase()
+
+    return elapsing, refreshing
+
+###############################################################################
+@pytest.mark.parametrize('dirty', (False, True))
+def test_steady_ticks_allocate_nothing_per_matter(sim, monkeypatch, dirty):
+    '''
+    CPython allocates the iterators of loops and the integers above 256, which the board does not,
+    so the crowd is measured against a scene of one matter of each kind running the same code.
+    The scenes stay small enough for the floats, boxed on the board as well, to come from CPython's free list
+    '''
+    monkeypatch.setattr(cosmos, '_numpy', None)
+    baseline = garbage(sim, 3, dirty)
+    crowd = garbage(sim, 12, dirty)
+
+    # zero bytes above the baseline, whatever the matters do in a tick
+    assert crowd[0] - baseline[0] <= 0
+    assert crowd[1] - baseline[1] <= 0
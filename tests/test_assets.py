@@ -0,0 +1,252 @@
+from assets import *
+from assets import _PackBitsUnpacker
+from simulator import OLED
+
+import assets
+import os
+import random
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+###############################################################################
+def samples():
+    rng = random.Random(11)
+
+    return [b'', b'\x00', b'ab', b'aab', b'aaab',
+            # runs at the limits of a control byte, and one past them
+            b'\x55' * 127, b'\x55' * 128, b'\x55' * 129, b'\x55' * 256 + b'\x01',
+            bytes(range(127)), bytes(range(128)), bytes(range(129)), bytes(range(256)) * 2,
+            # literals broken by runs of two and of three
+            b'abccdeffgh', b'abcccdefffgh', bytes(range(128)) + b'\x07' * 128 + bytes(range(128)),
+            bytes(rng.getrandbits(8) & rng.getrandbits(8) & rng.getrandbits(8) for i in range(2000))]
+
+def controls(packed):
+    ''' :return: the literal and the repeat lengths of the packed data '''
+    literals, repeats, i = [], [], 0
+
+    while i < len(packed):
+        n = packed[i]
+
+        if n < 128:
+            literals.append(n + 1)
+            i += n + 2
+        else:
+            repeats.append(257 - n)
+            i += 2
+
+    return literals, repeats
+
+def unpack(packed, size, chunk):
+    out = bytearray(size)
+    unpacker = _PackBitsUnpacker(out, size)
+
+    for i in range(0, len(packed), chunk):
+        piece = bytes(packed[i:i + chunk])
+        unpacker.feed(piece, len(piece))
+
+    assert unpacker.done() or size == 0
+
+    return bytes(out)
+
+def picture(width, height, seed):
+    rng = random.Random(seed)
+    stride = (width + 7) // 8
+    pixels = bytearray(stride * height)
+
+    # bands compress, the specks in between do not
+    for j in range(height):
+        for i in range(width):
+            if (i // 16 + j // 8) % 3 == 0 or (j % 8 == 4 and rng.random() < 0.2):
+                pixels[j * stride + (i >> 3)] |= 0x80 >> (i & 7)
+
+    return pixels
+
+def sources(tmp_path, pixels, width, height):
+    ''' :return: the same picture as frozen bytes and as files, raw and compressed '''
+    found = []
+
+    for rle in (False, True):
+        data = encode_asset(pixels, width, height, rle)
+        path = os.path.join(str(tmp_path), 'picture%d.mpb' % rle)
+
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        found.extend((BitmapAsset(data), BitmapAsset(path)))
+
+    return found
+
+def mkasset(tmp_path, *args):
+    # in a process of its own, as the script installs a simulator of its own
+    return subprocess.check_output([sys.executable, os.path.join(ROOT, 'mkasset.py')] + list(args),
+                                   cwd = str(tmp_path), universal_newlines = True)
+
+###############################################################################
+def test_packed_bits_unpack_to_the_same_bytes():
+    for data in samples():
+        packed = pack_bits(data)
+        literals, repeats = controls(packed)
+
+        assert max(literals + repeats + [1]) <= 128
+        assert 128 not in packed[0:1]
+
+        for chunk in (1, 2, 3, 64, len(packed) + 1):
+            assert unpack(packed, len(data), chunk) == data
+
+    # runs of the same byte as long as a control byte allows
+    assert controls(pack_bits(b'\x55' * 128)) == ([], [128])
+    assert controls(pack_bits(b'\x55' * 129)) == ([1], [128])
+    assert controls(pack_bits(b'\x55' * 256 + b'\x01')) == ([1], [128, 128])
+    assert controls(pack_bits(bytes(range(128)))) == ([128], [])
+    assert controls(pack_bits(bytes(range(129)))) == ([128, 1], [])
+    assert controls(pack_bits(b'abccdeffgh')) == ([10], [])
+    assert controls(pack_bits(b'abcccdefffgh')) == ([2, 2, 2], [3, 3])
+
+def test_unpacking_stops_at_the_size():
+    out = bytearray(b'\xee' * 8)
+    unpacker = _PackBitsUnpacker(out, 5)
+    packed = pack_bits(b'\x01\x02' + b'\x09' * 20)
+    unpacker.feed(packed, len(packed))
+
+    assert unpacker.done() and bytes(out) == b'\x01\x02\x09\x09\x09\xee\xee\xee'
+
+def test_assets_keep_the_smaller_encoding(tmp_path):
+    pixels = picture(45, 30, 1)
+    frozen, stored, frozen_packed, stored_packed = sources(tmp_path, pixels, 45, 30)
+
+    assert (stored.width, stored.height, stored.size) == (45, 30, 6 * 30)
+    assert not stored.compressed and stored_packed.compressed and stored_packed.stored_size < stored_packed.size
+    # only the raw bytes are used in place
+    assert frozen.in_place() and not stored.in_place() and not frozen_packed.in_place()
+    assert bytes(frozen.pixels()) == bytes(pixels)
+
+    for asset in (frozen, stored, frozen_packed, stored_packed):
+        assert bytes(asset.load(bytearray(asset.size), bytearray(7))) == bytes(pixels)
+
+    # noise does not shrink, it is stored raw
+    rng = random.Random(2)
+    noise = bytes(rng.getrandbits(8) for i in range(64))
+    assert not BitmapAsset(encode_asset(noise, 64, 8, True)).compressed
+
+    for broken in (b'MPBM', b'XPBM' + encode_asset(noise, 64, 8)[4:]):
+        with pytest.raises(ValueError):
+            BitmapAsset(broken)
+
+def test_cache_evicts_the_least_recently_used(tmp_path):
+    cache = AssetCache(3 * 60, 0, 1)
+    assets_ = []
+
+    for seed in range(4):
+        path = os.path.join(str(tmp_path), '%d.mpb' % seed)
+
+        with open(path, 'wb') as f:
+            f.write(encode_asset(picture(16, 30, seed), 16, 30, seed % 2 == 1))
+
+        assets_.append(BitmapAsset(path))
+
+    a, b, c, d = assets_
+    pixels = [cache.acquire(asset) for asset in (a, b, c)]
+    assert cache.stats() == (3, 0, 0, 3, 180)
+
+    # a is used again, b becomes the least recent and makes room for d in its buffer
+    assert cache.acquire(a) is pixels[0]
+    assert cache.acquire(d) is pixels[1]
+    assert bytes(pixels[1]) == bytes(picture(16, 30, 3))
+    assert cache.stats() == (4, 1, 1, 3, 180)
+
+    assert bytes(cache.acquire(b)) == bytes(picture(16, 30, 1))
+    assert cache.stats() == (5, 1, 2, 3, 180)
+    assert cache.acquire(a) is pixels[0] and cache.acquire(d) is pixels[1]
+
+    # b was used before a and d
+    cache.release(d)
+    cache.set_budget(60)
+    assert cache.stats()[2:] == (3, 1, 60)
+    assert bytes(cache.acquire(b)) == bytes(picture(16, 30, 1))
+    assert cache.stats() == (6, 3, 4, 1, 60)
+
+    # frozen raw assets are not copied
+    frozen = BitmapAsset(encode_asset(picture(16, 30, 0), 16, 30))
+    assert cache.acquire(frozen).obj is frozen.source and cache.stats()[3] == 1
+
+    cache.clear()
+    assert cache.stats()[3:] == (0, 0)
+
+def test_cache_gives_the_heap_back_when_it_runs_short(monkeypatch):
+    free = [100000]
+    monkeypatch.setattr(assets.gc, 'mem_free', lambda: free[0], raising = False)
+    cache = AssetCache(4096, 8192, 2)
+    packed = [BitmapAsset(encode_asset(picture(16, 30, seed), 16, 30, True)) for seed in range(4)]
+
+    for asset in packed[0:3]:
+        cache.acquire(asset)
+
+    assert cache.stats()[3:] == (3, 180)
+
+    # every asset is dropped while the heap stays short
+    free[0] = 1000
+    assert bytes(cache.acquire(packed[3])) == bytes(picture(16, 30, 3))
+    assert cache.stats() == (4, 0, 3, 1, 60)
+
+def test_bitmaplets_look_like_bitmap(sim, tmp_path):
+    pixels = picture(45, 30, 3)
+    cache = AssetCache(4096, 0)
+    expected = OLED()
+
+    for k, asset in enumerate(sources(tmp_path, pixels, 45, 30)):
+        x, y, c = 40 - 25 * k, 20 + 13 * k, k % 2
+        m = Bitmaplet(asset, c, cache)
+        assert m.get_extent(0, 0) == (45.0, 30.0)
+
+        sim.oled.fill(1 - c)
+        expected.fill(1 - c)
+        m.draw(sim.oled, x, y, 45.0, 30.0)
+        expected.Bitmap(x, y, pixels, 45, 30, c)
+
+        assert bytes(sim.oled.buffer) == bytes(expected.buffer)
+
+    # the bytes or the path of an asset are enough
+    m = Bitmaplet(encode_asset(pixels, 45, 30, True), 1, cache)
+    assert m.get_asset().compressed
+
+def test_mkasset_converts_freezes_and_shows(tmp_path):
+    width, height = 13, 5
+    rows = ['1100000000001', '0110000000011', '0011111111110', '0000000000000', '1111111111111']
+
+    with open(os.path.join(str(tmp_path), 'p1.pbm'), 'w') as f:
+        f.write('P1\n# a comment\n%d %d\n%s\n' % (width, height, '\n'.join(' '.join(row) for row in rows)))
+
+    mkasset(tmp_path, 'convert', 'p1.pbm', 'p1.mpb', 'rle')
+    p1 = BitmapAsset(os.path.join(str(tmp_path), 'p1.mpb'))
+    pixels = bytes(p1.load(bytearray(p1.size)))
+    expected = bytearray(2 * height)
+
+    for j, row in enumerate(rows):
+        for i, bit in enumerate(row):
+            if bit == '1':
+                expected[j * 2 + (i >> 3)] |= 0x80 >> (i & 7)
+
+    assert (p1.width, p1.height) == (width, height) and pixels == bytes(expected)
+
+    # the raw P4 of the same image, inverted
+    with open(os.path.join(str(tmp_path), 'p4.pbm'), 'wb') as f:
+        f.write(b'P4\n%d %d\n' % (width, height) + bytes(expected))
+
+    mkasset(tmp_path, 'convert', 'p4.pbm', 'p4.mpb', 'invert')
+    p4 = BitmapAsset(os.path.join(str(tmp_path), 'p4.mpb'))
+    assert not p4.compressed and bytes(p4.load(bytearray(p4.size))) == bytes(b ^ 0xFF for b in expected)
+
+    mkasset(tmp_path, 'freeze', 'p1.mpb', 'frozen.py', 'TREE')
+    frozen = {}
+
+    with open(os.path.join(str(tmp_path), 'frozen.py')) as f:
+        exec(f.read(), frozen)
+
+    with open(os.path.join(str(tmp_path), 'p1.mpb'), 'rb') as f:
+        assert frozen['TREE'] == f.read()
+
+    shown = mkasset(tmp_path, 'show', 'p1.mpb').splitlines()
+    assert shown[1:] == [row.replace('1', '#').replace('0', '.') for row in rows]
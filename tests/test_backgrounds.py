@@ -0,0 +1,131 @@
+from cosmos import *
+from conftest import tick
+from simulator import OLED
+
+import random
+import pytest
+
+###############################################################################
+class Scene(Cosmos):
+    ''' Bouncing shapes over a background, drawing only the damaged regions '''
+
+    def __init__(self, background):
+        super(Scene, self).__init__(24, background)
+
+    def load(self, width, height):
+        rng = random.Random(5)
+        self.enable_dirty_rendering(True)
+
+        for i in range(8):
+            m = Circlet(rng.randint(2, 5), i % 2 == 0) if i % 3 else Rectanglet(rng.randint(3, 9), rng.randint(3, 9), True)
+            m.set_draw_mode(i % 2)
+            m.set_border_strategy(BorderStrategy.BOUNCE)
+            m.set_speed(rng.uniform(0.5, 2.5), rng.uniform(0.0, 360.0))
+            self.insert(m, rng.randint(0, width - 10), rng.randint(0, height - 10))
+
+class Slow(Scene):
+    ''' Draws the background the way the universe did before backgrounds were decoded once '''
+
+    def _on_refresh(self, ledscr, width, height):
+        ledscr.fill(0)
+
+        if self.get_background():
+            ledscr.Bitmap(0, 0, self.get_background(), width, height, 0)
+
+class Spy(Scene):
+    ''' Keeps how every frame restores its background, a full refresh or a region that could be restored or not '''
+
+    def __init__(self, background):
+        super(Spy, self).__init__(background)
+        self.refreshes = []
+
+    def _on_refresh(self, ledscr, width, height):
+        self.refreshes.append('full')
+        super(Spy, self)._on_refresh(ledscr, width, height)
+
+    def _on_refresh_region(self, ledscr, x, y, width, height):
+        restored = super(Spy, self)._on_refresh_region(ledscr, x, y, width, height)
+        self.refreshes.append(restored)
+
+        return restored
+
+def bitmap(seed):
+    rng = random.Random(seed)
+
+    return bytearray(rng.getrandbits(8) & rng.getrandbits(8) for i in range(128 * 64 // 8))
+
+@pytest.fixture
+def decodes(sim, monkeypatch):
+    ''' The bitmaps drawn with `Bitmap`, whose set bits are lit, or the simulated backgrounds would be all black '''
+    drawn = []
+
+    def Bitmap(x, y, bm, w, h, c):
+        drawn.append(bm)
+        OLED.Bitmap(sim.oled, x, y, bm, w, h, 1 - c)
+
+    monkeypatch.setattr(sim.oled, 'Bitmap', Bitmap)
+
+    return drawn
+
+def play(sim, universe, script):
+    ''' :return: the frame shown after each tick, `script` maps ticks to what to do before them '''
+    universe.big_bang()
+    universe.cancel_timer()
+    frames = []
+
+    for count in range(1, 41):
+        if count in script:
+            script[count](universe)
+
+        tick(universe)
+        universe.refresh()
+        frames.append(sim.oled.frame)
+
+    universe.erase()
+
+    return frames
+
+###############################################################################
+def test_swapped_backgrounds_look_like_those_drawn_every_frame(sim, decodes):
+    a, b, c = bitmap(1), bitmap(2), bitmap(3)
+    screens = []
+
+    def preload(universe):
+        before = bytes(sim.oled.buffer)
+        universe.preload_background(b)
+        screens.append(bytes(sim.oled.buffer) == before)
+
+    script = { 5: preload,
+               10: lambda universe: universe.set_background(b),
+               20: lambda universe: universe.set_background(a),
+               30: lambda universe: universe.set_background(c) }
+
+    expected = play(sim, Slow(a), script)
+    del decodes[:]
+
+    assert play(sim, Scene(a), script) == expected
+    # decoded once each, the one preloaded ahead of the swap without touching the screen
+    assert decodes == [a, b, c]
+    assert screens == [True, True]
+
+def test_region_refreshes_fall_back_until_the_background_is_decoded(sim, decodes):
+    a = bitmap(4)
+
+    def mutate(universe):
+        a[100:300] = bitmap(5)[100:300]
+        universe.forget_background(a)
+
+    universe = Spy(a)
+    frames = play(sim, universe, { 12: mutate })
+
+    # the big bang decodes, then the damaged regions are restored from the decoded copy
+    assert universe.refreshes[0] == 'full'
+    assert set(universe.refreshes[1:12]) == { True }
+
+    # forgotten, the region cannot be restored and the whole frame is drawn again
+    assert universe.refreshes[12:14] == [False, 'full']
+    assert set(universe.refreshes[14:]) == { True }
+    assert decodes == [a, a]
+
+    universe = Slow(a)
+    assert play(sim, universe, {})[11:] == frames[11:]
@@ -0,0 +1,124 @@
+from cosmos import *
+from conftest import tick
+
+import random
+
+###############################################################################
+class Recorder(object):
+    ''' Collects the collisions delivered in a tick as pairs of indices '''
+
+    def __init__(self):
+        self.pairs = []
+
+    def hook(self, m, idx, scene):
+        def on_collision(other):
+            self.pairs.append((idx, scene.shapes.index(other)))
+
+        m.on_collision = on_collision
+
+class Scene(Cosmos):
+    def __init__(self, population, seed, narrowphase = False):
+        self.population, self.seed, self.narrowphase = population, seed, narrowphase
+        self.recorder = Recorder()
+        super(Scene, self).__init__(24)
+
+    def load(self, width, height):
+        rng = random.Random(self.seed)
+        self.enable_collision_detection(True, self.narrowphase)
+        self.shapes = []
+
+        for i in range(self.population):
+            if i % 2 == 0:
+                m = Circlet(rng.randint(2, 5), True)
+            else:
+                m = Rectanglet(rng.randint(2, 12), rng.randint(2, 12))
+
+            self.shapes.append(self.insert(m, rng.randint(0, width - 12), rng.randint(0, height - 12)))
+            self.recorder.hook(m, i, self)
+
+            # a few do not collide, a third stands still
+            m.enable_collision(i % 7 != 6)
+
+            if i % 3 != 0:
+                m.set_border_strategy(BorderStrategy.BOUNCE)
+                m.set_speed(rng.uniform(0.5, 3.0), rng.uniform(0.0, 360.0))
+
+def brute_force_pairs(scene):
+    pairs = []
+
+    for i, a in enumerate(scene.shapes):
+        for j, b in enumerate(scene.shapes):
+            if i < j and a.collidable() and b.collidable():
+                if a.x_speed() != 0.0 or a.y_speed() != 0.0 or b.x_speed() != 0.0 or b.y_speed() != 0.0:
+                    ax, ay, aw, ah = scene.get_matter_boundary(a)
+                    bx, by, bw, bh = scene.get_matter_boundary(b)
+
+                    if ax <= bx + bw and bx <= ax + aw and ay <= by + bh and by <= ay + ah:
+                        pairs.append((i, j))
+
+    return pairs
+
+def delivered_pairs(recorder):
+    pairs = set()
+
+    for a, b in recorder.pairs:
+        # both sides are told
+        assert (b, a) in recorder.pairs
+        pairs.add((min(a, b), max(a, b)))
+
+    recorder.pairs = []
+
+    return sorted(pairs)
+
+###############################################################################
+def test_sweep_and_prune_finds_every_overlapping_pair(bang):
+    scene = bang(Scene(40, 2))
+    seen = 0
+
+    for i in range(40):
+        tick(scene)
+        expected = brute_force_pairs(scene)
+
+        assert delivered_pairs(scene.recorder) == expected
+        seen += len(expected)
+
+    assert seen > 40
+
+def test_collisions_follow_switching_and_removal(bang):
+    scene = bang(Scene(30, 9))
+
+    tick(scene, 3)
+    scene.recorder.pairs = []
+
+    for i in range(0, 30, 4):
+        scene.shapes[i].enable_collision(not scene.shapes[i].collidable())
+
+    for m in scene.shapes[1:30:5]:
+        scene.remove(m)
+        m.enable_collision(False)
+
+    for i in range(20):
+        tick(scene)
+        assert delivered_pairs(scene.recorder) == brute_force_pairs(scene)
+
+def test_narrowphase_checks_the_shapes(bang):
+    class Pair(Cosmos):
+        def load(self, width, height):
+            self.enable_collision_detection(True)
+            self.recorder = Recorder()
+            self.shapes = [self.insert(Circlet(5, True), 0, 0), self.insert(Circlet(5, True), 9, 9),
+                           self.insert(Rectanglet(4, 4), 60, 0), self.insert(Circlet(5, True), 53, 3)]
+
+            for i, m in enumerate(self.shapes):
+                m.enable_collision(True)
+                self.recorder.hook(m, i, self)
+
+    scene = bang(Pair(24))
+
+    # the bounds of the circles overlap at their corners, the circles do not touch
+    scene.shapes[1].set_speed(0.01, 0)
+    # the circle reaches the square
+    scene.shapes[3].set_speed(1.0, 0)
+    tick(scene)
+
+    assert delivered_pairs(scene.recorder) == [(2, 3)]
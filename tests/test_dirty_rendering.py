@@ -0,0 +1,186 @@
+from cosmos import *
+from conftest import tick
+
+import random
+
+###############################################################################
+class Scene(Cosmos):
+    def __init__(self, dirty):
+        self.dirty = dirty
+        super(Scene, self).__init__(24)
+
+    def load(self, width, height):
+        rng = random.Random(3)
+        self.enable_dirty_rendering(self.dirty)
+        self.shapes = []
+
+        for i in range(12):
+            if i % 2 == 0:
+                m = Circlet(rng.randint(2, 5), i % 4 == 0)
+            else:
+                m = Rectanglet(rng.randint(2, 9), rng.randint(2, 9), i % 3 == 0)
+
+            self.shapes.append(self.insert(m, rng.randint(0, width - 10), rng.randint(0, height - 10)))
+
+            if i % 3 != 2:
+                m.set_border_strategy(BorderStrategy.BOUNCE)
+                m.set_speed(rng.uniform(0.5, 2.5), rng.uniform(0.0, 360.0))
+
+class CursorScene(Scene):
+    ''' Draws a cursor of its own on top of the matters '''
+
+    def __init__(self, dirty):
+        self.cursor = 0
+        super(CursorScene, self).__init__(dirty)
+
+    def update(self, interval, count, uptime):
+        self.cursor = (self.cursor + 3) % 128
+        self.notify_updated()
+
+    def draw(self, ledscr, x, y, width, height):
+        super(CursorScene, self).draw(ledscr, x, y, width, height)
+        ledscr.vline(self.cursor, 0, 64, 2)
+
+def record(scene, sim, ticks):
+    frames = []
+
+    for i in range(ticks):
+        tick(scene)
+        frames.append(bytes(sim.oled.buffer))
+
+    return frames
+
+def test_dirty_frames_match_full_frames(bang, sim):
+    full = record(bang(Scene(False)), sim, 40)
+    dirty = record(bang(Scene(True)), sim, 40)
+
+    assert dirty == full
+    assert len(set(full)) > 30
+
+def test_dirty_frames_follow_removals_and_inserts(bang, sim):
+    frames = []
+
+    for dirty in (False, True):
+        scene = bang(Scene(dirty))
+        frames.append(record(scene, sim, 5))
+
+        for m in scene.shapes[0:4]:
+            scene.remove(m)
+
+        scene.insert(Rectanglet(20, 6), 50, 30)
+        frames[-1] += record(scene, sim, 5)
+
+    assert frames[1] == frames[0]
+
+def test_overridden_draw_is_honored(bang, sim):
+    full = record(bang(CursorScene(False)), sim, 30)
+    dirty = record(bang(CursorScene(True)), sim, 30)
+
+    assert dirty == full
+
+class StripedScene(Scene):
+    ''' Clears the screen to a stripe of its own, which moves every frame '''
+
+    def __init__(self, dirty):
+        self.stripe = 0
+        super(StripedScene, self).__init__(dirty)
+
+    def update(self, interval, count, uptime):
+        self.stripe = (self.stripe + 5) % 64
+        self.notify_updated()
+
+    def _on_refresh(self, ledscr, width, height):
+        super(StripedScene, self)._on_refresh(ledscr, width, height)
+        ledscr.hline(0, self.stripe, width, 1)
+
+class RegionStripedScene(StripedScene):
+    ''' Restores the regions of its fixed stripe on its own '''
+
+    def update(self, interval, count, uptime):
+        pass
+
+    def _on_refresh_region(self, ledscr, x, y, width, height):
+        restored = super(RegionStripedScene, self)._on_refresh_region(ledscr, x, y, width, height)
+
+        if restored and y <= self.stripe < y + height:
+            ledscr.hline(x, self.stripe, width, 1)
+
+        return restored
+
+class LayeredScene(Cosmos):
+    ''' A static ground, moving shapes, a static frame over them and a moving shape on top '''
+
+    def __init__(self, dirty):
+        self.dirty = dirty
+        self.regions = []
+        super(LayeredScene, self).__init__(24)
+
+    def load(self, width, height):
+        self.enable_dirty_rendering(self.dirty)
+        self.set_layer_static(-1)
+        self.set_layer_static(1)
+
+        for i in range(4):
+            self.set_matter_layer(self.insert(Rectanglet(12, 5, True), i * 32, 52), -1)
+            self.set_matter_layer(self.insert(Rectanglet(30, 20, False), i * 30 + 2, 20), 1)
+
+        for i in range(6):
+            m = self.insert(Circlet(3, i % 2 == 0), 10 + i * 18, 10 + i * 7)
+            m.set_border_strategy(BorderStrategy.BOUNCE)
+            m.set_speed(1.0 + i * 0.3, i * 55)
+
+        top = self.insert(Rectanglet(6, 6, True), 60, 30)
+        self.set_matter_layer(top, 2)
+        top.set_border_strategy(BorderStrategy.BOUNCE)
+        top.set_speed(2.0, 200)
+
+    def _on_refresh_region(self, ledscr, x, y, width, height):
+        restored = super(LayeredScene, self)._on_refresh_region(ledscr, x, y, width, height)
+        self.regions.append(restored)
+
+        return restored
+
+def test_overridden_background_is_honored(bang, sim):
+    full = record(bang(StripedScene(False)), sim, 30)
+    dirty = record(bang(StripedScene(True)), sim, 30)
+
+    assert dirty == full
+
+def test_overridden_region_background_keeps_dirty_rendering_on(bang, sim):
+    full = record(bang(RegionStripedScene(False)), sim, 30)
+    scene = bang(RegionStripedScene(True))
+    dirty = record(scene, sim, 30)
+
+    assert dirty == full
+    assert not scene._Cosmos__custom_drawing
+
+class ShadedScene(LayeredScene):
+    ''' Black bars in the static frame layer clear what the moving shapes below draw '''
+
+    def __init__(self, dirty, static):
+        self.static = static
+        super(ShadedScene, self).__init__(dirty)
+
+    def load(self, width, height):
+        super(ShadedScene, self).load(width, height)
+
+        for i in range(3):
+            self.set_matter_layer(self.insert(Rectanglet(14, 30, True, 0), 8 + i * 40, 12), 1)
+
+        if not self.static:
+            self.set_layer_static(-1, False)
+            self.set_layer_static(1, False)
+
+def test_static_layers_keep_cleared_pixels(bang, sim):
+    live = record(bang(ShadedScene(False, False)), sim, 40)
+
+    assert record(bang(ShadedScene(False, True)), sim, 40) == live
+    assert record(bang(ShadedScene(True, True)), sim, 40) == live
+
+def test_static_layers_keep_dirty_rendering_on(bang, sim):
+    full = record(bang(LayeredScene(False)), sim, 40)
+    scene = bang(LayeredScene(True))
+    dirty = record(scene, sim, 40)
+
+    assert dirty == full
+    assert len(scene.regions) >= 39 and all(scene.regions)
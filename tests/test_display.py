@@ -0,0 +1,102 @@
+from display import *
+from simulator import RecordingI2C
+
+import pytest
+
+###############################################################################
+class Screen(object):
+    ''' Just the framebuffer and the bus, as `PageFlusher` sees a display '''
+
+    def __init__(self, width = 128, height = 64):
+        self.buffer = bytearray(width * height // 8)
+        self.i2c = RecordingI2C()
+        self.addr = 0x3C
+
+def transfers(screen):
+    ''' :return: (command bytes, data byte count) of each window written since the last call '''
+    log = screen.i2c.log
+    windows = []
+
+    for i in range(0, len(log), 2):
+        cmd, data = log[i][1], log[i + 1][1]
+        assert log[i][0] == log[i + 1][0] == screen.addr
+        assert cmd[0] == 0x00 and data[0] == 0x40
+        windows.append((tuple(cmd[1:]), len(data) - 1))
+
+    screen.i2c.clear()
+
+    return windows
+
+def page_command(page, col):
+    return (0xB0 | page, col & 0x0F, 0x10 | (col >> 4))
+
+def horizontal_command(page, c0, c1):
+    return (0x21, c0, c1 - 1, 0x22, page, page)
+
+###############################################################################
+@pytest.mark.parametrize('offset', (0, 2))
+def test_page_addressing_sends_changed_windows(offset):
+    screen = Screen()
+    flusher = PageFlusher(screen, column_offset = offset)
+
+    # the first flush sends everything
+    assert flusher.flush() == 8 * (4 + 129)
+    assert transfers(screen) == [(page_command(page, offset), 128) for page in range(8)]
+
+    # nothing changed, nothing sent
+    assert flusher.flush() == 0
+    assert transfers(screen) == []
+
+    screen.buffer[2 * 128 + 17] = 0xFF
+    screen.buffer[2 * 128 + 40] = 0x01
+    screen.buffer[5 * 128 + 127] = 0x80
+    screen.buffer[7 * 128 + 0] = 0x10
+
+    assert flusher.flush() == (4 + 25) + (4 + 2) + (4 + 2)
+    assert transfers(screen) == [(page_command(2, 17 + offset), 24),
+                                 (page_command(5, 127 + offset), 1),
+                                 (page_command(7, 0 + offset), 1)]
+    assert flusher.stats()[0:2] == (4 + 25 + 4 + 2 + 4 + 2, 3)
+
+    # a byte changed back is a change too
+    screen.buffer[2 * 128 + 40] = 0x00
+    flusher.flush()
+    assert transfers(screen) == [(page_command(2, 40 + offset), 1)]
+
+@pytest.mark.parametrize('offset', (0, 2))
+def test_horizontal_addressing_sends_changed_windows(offset):
+    screen = Screen()
+    flusher = PageFlusher(screen, addressing = DisplayAddressing.HORIZONTAL, column_offset = offset)
+
+    assert flusher.flush() == 8 * (7 + 129)
+    assert transfers(screen) == [(horizontal_command(page, offset, 128 + offset), 128) for page in range(8)]
+
+    screen.buffer[3 * 128 + 60:3 * 128 + 70] = b'\x55' * 10
+    screen.buffer[6 * 128 + 5] = 0x02
+
+    assert flusher.flush() == (7 + 11) + (7 + 2)
+    assert transfers(screen) == [(horizontal_command(3, 60 + offset, 70 + offset), 10),
+                                 (horizontal_command(6, 5 + offset, 6 + offset), 1)]
+
+def test_data_bytes_are_the_changed_columns():
+    screen = Screen()
+    flusher = PageFlusher(screen)
+    flusher.flush()
+    screen.i2c.clear()
+
+    screen.buffer[4 * 128 + 9:4 * 128 + 13] = b'\x01\x02\x03\x04'
+    flusher.flush()
+
+    assert screen.i2c.log[1][1] == b'\x40\x01\x02\x03\x04'
+
+def test_invalidate_resends_the_whole_frame():
+    screen = Screen(64, 32)
+    flusher = PageFlusher(screen, 64, 32)
+    flusher.flush()
+    transfers(screen)
+
+    flusher.invalidate()
+    flusher.flush()
+
+    assert transfers(screen) == [(page_command(page, 0), 64) for page in range(4)]
+    assert flusher.stats()[2:4] == (2 * 4 * (4 + 65), 2)
@@ -0,0 +1,133 @@
+from cosmos import *
+from universe import _EventQueue, _EVENT_BUTTON, _EVENT_TOUCHPAD, _EVENT_LIGHT, _EVENT_SOUND
+
+###############################################################################
+class Listener(Cosmos):
+    ''' Keeps the input events it is told about, and asks for a frame after each key '''
+
+    def __init__(self):
+        super(Listener, self).__init__(24)
+        self.heard = []
+
+    def on_button_key(self, which, pressed):
+        self.heard.append(('button', which, pressed))
+        self.notify_updated()
+
+    def on_touchpad_key(self, which, index, pressed):
+        self.heard.append(('touchpad', which, index, pressed))
+        self.notify_updated()
+
+    def on_light(self, value, percentage):
+        self.heard.append(('light', value))
+
+    def on_sound(self, value, percentage):
+        self.heard.append(('sound', value))
+
+def run_scheduled_once(sim):
+    ''' Run the callback the universe scheduled, as the board does the next time it can '''
+    assert len(sim.scheduled) == 1
+    callback, arg = sim.scheduled.pop(0)
+    callback(arg)
+
+###############################################################################
+def test_full_queues_drop_and_count_new_events():
+    queue = _EventQueue(5)
+    # rounded up to 8 slots, one of them is always left empty
+    assert queue.mask == 7
+
+    for turn in range(3):
+        results = [queue.put(_EVENT_BUTTON, i, True, i) for i in range(10)]
+
+        assert results == [True] * 7 + [False] * 3
+        assert queue.size() == 7
+
+        # the slots are reused after being taken
+        for i in range(7):
+            assert queue.args[queue.head] == i
+            queue.head = (queue.head + 1) & queue.mask
+
+        assert queue.is_empty()
+
+    assert (queue.posted, queue.overflowed) == (21, 9)
+
+def test_posting_to_a_full_queue_fails(bang, sim):
+    universe = bang(Listener())
+    posted, dispatched, overflowed = universe.get_event_stats()[0:3]
+
+    results = [universe.post_event(_EVENT_BUTTON, 0, True) for i in range(40)]
+
+    assert results == [True] * 31 + [False] * 9
+    assert universe.get_event_stats()[0:3] == (posted + 31, dispatched, overflowed + 9)
+
+    sim.drain_scheduled()
+    assert len(universe.heard) == 31
+    assert universe.get_event_stats()[4] == 0
+
+def test_events_are_drained_in_batches(bang, sim):
+    universe = bang(Listener())
+    universe.set_event_batch_size(4)
+    batches = universe.get_event_stats()[3]
+
+    for i in range(10):
+        universe.post_event(_EVENT_SOUND, i, True)
+
+    # a single drain is scheduled however many events are posted
+    assert universe.heard == []
+    run_scheduled_once(sim)
+    assert [arg for kind, arg in universe.heard] == [0, 1, 2, 3]
+    assert universe.get_event_stats()[3:] == (batches + 1, 6)
+
+    # what is left reschedules itself
+    run_scheduled_once(sim)
+    run_scheduled_once(sim)
+    assert [arg for kind, arg in universe.heard] == list(range(10))
+    assert universe.get_event_stats()[3:] == (batches + 3, 0)
+    assert sim.scheduled == []
+
+    # drained by hand, the batch size is up to the caller
+    for i in range(5):
+        universe.post_event(_EVENT_SOUND, i, True)
+
+    assert universe.drain_events(2) == 3
+    assert universe.drain_events() == 0
+
+def test_events_of_all_kinds_keep_their_order(bang, sim):
+    universe = bang(Listener())
+
+    universe.post_event(_EVENT_BUTTON, 0, True)
+    universe.post_event(_EVENT_LIGHT, 3000, True)
+    universe.post_event(_EVENT_TOUCHPAD, 4, True)
+    universe.post_event(_EVENT_SOUND, 120, False)
+    universe.post_event(_EVENT_TOUCHPAD, 4, False)
+    universe.post_event(_EVENT_BUTTON, 1, False)
+    sim.drain_scheduled()
+
+    assert universe.heard == [('button', 'A', True), ('light', 3000), ('touchpad', 'H', 4, True),
+                              ('sound', 120), ('touchpad', 'H', 4, False), ('button', 'B', False)]
+
+def test_input_latency_runs_until_the_screen_shows_it(bang, sim):
+    universe = bang(Listener())
+    universe.enable_frame_coalescing(True)
+    assert universe.get_input_latency() == (0, 0.0, 0)
+
+    universe.post_event(_EVENT_BUTTON, 0, True)
+    sim.clock.now += 10
+    universe.post_event(_EVENT_TOUCHPAD, 2, True)
+    # sensors are not input, their events are left out
+    universe.post_event(_EVENT_LIGHT, 3000, True)
+    sim.clock.now += 20
+    sim.drain_scheduled()
+
+    # nothing is on the screen yet
+    assert universe.get_input_latency() == (0, 0.0, 0)
+
+    sim.clock.now += 12
+    universe.flush()
+    assert universe.get_input_latency() == (42, 37.0, 2)
+
+    # without coalescing the frame is drawn as soon as the key is handled
+    universe.enable_frame_coalescing(False)
+    universe.post_event(_EVENT_BUTTON, 2, False)
+    sim.clock.now += 5
+    sim.drain_scheduled()
+    assert universe.get_input_latency() == (42, 79 / 3.0, 3)
@@ -0,0 +1,144 @@
+from cosmos import *
+
+import pytest
+
+###############################################################################
+class Busy(Cosmos):
+    ''' Asks for a frame after every step of the world '''
+
+    def _on_elapse(self, interval, count, uptime):
+        Cosmos._on_elapse(self, interval, count, uptime)
+        self.notify_updated()
+
+def fixed(bang, fps, render_fps, **options):
+    ''' A busy universe with a fixed timestep, driven by hand with `late` '''
+    universe = bang(Busy(fps))
+    universe.enable_fixed_timestep(True, render_fps, **options)
+    universe.cancel_timer()
+
+    return universe
+
+def late(sim, universe, ms):
+    ''' The timer of the universe fires `ms` after the previous time '''
+    sim.clock.now += ms
+    universe.on_tick(None)
+    sim.drain_scheduled()
+
+def coalesced(universe):
+    ''' :return: whether a refresh requested now is held back until the next flush '''
+    pending = universe.get_frame_stats()[1]
+    universe.notify_updated()
+    coalescing = universe.get_frame_stats()[1] > pending
+    universe.flush()
+
+    return coalescing
+
+###############################################################################
+@pytest.mark.parametrize('coalescing', (False, True))
+def test_fixed_timestep_restores_frame_coalescing(bang, coalescing):
+    universe = bang(Cosmos(24))
+    universe.enable_frame_coalescing(coalescing)
+
+    universe.enable_fixed_timestep(True, 12)
+    assert coalesced(universe)
+
+    # turned on twice, the setting from before the first time still holds
+    universe.enable_fixed_timestep(True, 6)
+    universe.enable_fixed_timestep(False)
+    assert coalesced(universe) == coalescing
+
+    # turned off again, nothing changes
+    universe.enable_frame_coalescing(True)
+    universe.enable_fixed_timestep(False)
+    assert coalesced(universe)
+
+def test_plain_refreshes_are_counted(bang, sim):
+    universe = bang(Cosmos(24))
+    rendered, coalesced_requests = universe.get_frame_stats()
+    shows = sim.oled.shows
+
+    for i in range(3):
+        universe.notify_updated()
+
+    assert universe.get_frame_stats() == (rendered + 3, coalesced_requests)
+    assert sim.oled.shows == shows + 3
+
+def test_coalesced_requests_are_counted(bang, sim):
+    universe = bang(Cosmos(24))
+    universe.enable_frame_coalescing(True)
+    rendered, coalesced_requests = universe.get_frame_stats()
+    shows = sim.oled.shows
+
+    for i in range(4):
+        universe.notify_updated()
+
+    assert sim.oled.shows == shows
+    universe.flush()
+    assert universe.get_frame_stats() == (rendered + 1, coalesced_requests + 3)
+    assert sim.oled.shows == shows + 1
+
+    # nothing is pending any more, the screen is left alone
+    universe.flush()
+    universe.enable_frame_coalescing(False)
+    assert universe.get_frame_stats() == (rendered + 1, coalesced_requests + 3)
+    assert sim.oled.shows == shows + 1
+
+@pytest.mark.parametrize('fps, render_fps', ((24, 24), (24, 12), (50, 30), (20, 60)))
+def test_fixed_timestep_renders_at_the_requested_rate(bang, sim, fps, render_fps):
+    universe = bang(Busy(fps))
+    universe.enable_fixed_timestep(True, render_fps)
+    rendered, steps = universe.get_frame_stats()[0], universe.get_loop_stats()[0]
+
+    sim.run(10000)
+    universe.cancel_timer()
+
+    # the world never renders faster than it changes
+    interval = 1000 // fps
+    render_interval = max(interval, 1000 // render_fps)
+    assert abs(universe.get_frame_stats()[0] - rendered - 10000 // render_interval) <= 2
+    assert abs(universe.get_loop_stats()[0] - steps - 10000 // interval) <= 1
+
+def test_late_ticks_catch_up_and_skip_renders(bang, sim):
+    universe = fixed(bang, 25, None)
+    rendered = universe.get_frame_stats()[0]
+
+    late(sim, universe, 40)
+    assert universe.get_loop_stats() == (1, 0, 0, 0, 0.0)
+    assert universe.get_frame_stats()[0] == rendered + 1
+
+    # three steps are due, the render is skipped to catch up sooner
+    late(sim, universe, 130)
+    assert universe.get_loop_stats() == (4, 0, 1, 90, 45.0)
+    assert universe.get_frame_stats()[0] == rendered + 1
+
+    # the 10ms left over make the next step due earlier
+    late(sim, universe, 30)
+    assert universe.get_loop_stats() == (5, 0, 1, 90, 30.0)
+    assert universe.get_frame_stats()[0] == rendered + 2
+
+def test_skipped_renders_are_limited(bang, sim):
+    universe = fixed(bang, 25, None, max_skipped_renders = 2)
+    rendered = universe.get_frame_stats()[0]
+
+    for i in range(3):
+        late(sim, universe, 80)
+
+    # two steps each time, the third one renders anyway
+    assert universe.get_loop_stats()[0:3] == (6, 0, 2)
+    assert universe.get_frame_stats()[0] == rendered + 1
+
+    late(sim, universe, 80)
+    assert universe.get_loop_stats()[0:3] == (8, 0, 3)
+    assert universe.get_frame_stats()[0] == rendered + 1
+
+def test_steps_beyond_the_catch_up_limit_are_dropped(bang, sim):
+    universe = fixed(bang, 25, None, max_catchup_steps = 4)
+
+    # twelve steps are due, four of them run
+    late(sim, universe, 490)
+    assert universe.get_loop_stats()[0:2] == (4, 8)
+    assert universe.get_loop_stats()[3] == 450
+
+    # the 10ms left over are kept
+    late(sim, universe, 30)
+    assert universe.get_loop_stats()[0:2] == (5, 8)
@@ -0,0 +1,65 @@
+from cosmos import *
+from conftest import tick
+
+import random
+
+###############################################################################
+class Scene(Cosmos):
+    def __init__(self, population, indexed):
+        self.population, self.indexed = population, indexed
+        super(Scene, self).__init__(24)
+
+    def load(self, width, height):
+        rng = random.Random(7)
+
+        if self.indexed:
+            self.enable_matter_index(True, 16)
+
+        self.shapes = []
+        for i in range(self.population):
+            m = Rectanglet(rng.randint(1, 20), rng.randint(1, 20))
+            self.shapes.append(self.insert(m, rng.randint(-10, width), rng.randint(-10, height)))
+
+def probe(scene):
+    points = [scene.find_matter(x, y) for y in range(-4, 68, 5) for x in range(-4, 132, 5)]
+    rects = [scene.find_matters(x, y, 23, 11) for y in range(-8, 64, 9) for x in range(-8, 128, 17)]
+
+    return [scene.shapes.index(m) if m else -1 for m in points], \
+           [[scene.shapes.index(m) for m in found] for found in rects]
+
+def test_indexed_queries_match_the_linear_scan(bang):
+    plain, indexed = bang(Scene(60, False)), bang(Scene(60, True))
+
+    assert probe(indexed) == probe(plain)
+
+def test_index_follows_moves_and_removals(bang):
+    plain, indexed = bang(Scene(60, False)), bang(Scene(60, True))
+
+    for scene in (plain, indexed):
+        for i in range(0, 60, 4):
+            scene.move(scene.shapes[i], 13.0, -7.0)
+
+        for i in range(1, 60, 6):
+            scene.remove(scene.shapes[i])
+
+    assert probe(indexed) == probe(plain)
+
+def test_index_follows_the_motion_pass(bang):
+    plain, indexed = bang(Scene(30, False)), bang(Scene(30, True))
+
+    for scene in (plain, indexed):
+        for i in range(0, 30, 2):
+            scene.shapes[i].set_speed(2.5, i * 12)
+
+        tick(scene, 10)
+
+    assert probe(indexed) == probe(plain)
+
+def test_index_can_be_turned_on_and_off_later(bang):
+    plain, scene = bang(Scene(40, False)), bang(Scene(40, False))
+
+    scene.enable_matter_index(True, 8)
+    assert probe(scene) == probe(plain)
+
+    scene.enable_matter_index(False)
+    assert probe(scene) == probe(plain)
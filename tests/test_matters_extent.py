@@ -0,0 +1,67 @@
+from cosmos import *
+from conftest import tick
+
+import random
+
+###############################################################################
+class Scene(Cosmos):
+    def load(self, width, height):
+        rng = random.Random(11)
+        self.shapes = []
+
+        for i in range(25):
+            m = Rectanglet(rng.randint(1, 15), rng.randint(1, 15))
+            self.shapes.append(self.insert(m, rng.randint(-20, width), rng.randint(-20, height)))
+
+def brute_force_extent(scene):
+    left, top, right, bottom = math.inf, math.inf, -math.inf, -math.inf
+
+    for m in scene.shapes:
+        x, y, w, h = scene.get_matter_boundary(m)
+        left, top = min(left, x), min(top, y)
+        right, bottom = max(right, x + w), max(bottom, y + h)
+
+    return left, top, right - left, bottom - top
+
+def test_extent_after_loading(bang):
+    scene = bang(Scene(24))
+
+    assert scene.get_matters_boundary() == brute_force_extent(scene)
+
+def test_extent_grows_and_shrinks_with_moves(bang):
+    scene = bang(Scene(24))
+    rng = random.Random(5)
+
+    for i in range(200):
+        m = scene.shapes[rng.randrange(len(scene.shapes))]
+        scene.move(m, rng.uniform(-30.0, 30.0), rng.uniform(-30.0, 30.0))
+
+        # asked in between, so that the cached extent is kept and updated incrementally
+        if i % 3 == 0:
+            assert scene.get_matters_boundary() == brute_force_extent(scene)
+
+    assert scene.get_matters_boundary() == brute_force_extent(scene)
+
+def test_extent_follows_removals(bang):
+    scene = bang(Scene(24))
+
+    # remove the matters on the boundary first
+    for m in sorted(scene.shapes, key = lambda m: scene.get_matter_boundary(m)[0]):
+        scene.remove(m)
+        scene.shapes.remove(m)
+
+        if scene.shapes:
+            assert scene.get_matters_boundary() == brute_force_extent(scene)
+
+    assert scene.get_matters_boundary() == (0.0, 0.0, 0.0, 0.0)
+
+def test_extent_follows_the_motion_pass(bang):
+    scene = bang(Scene(24))
+
+    for i, m in enumerate(scene.shapes):
+        if i % 2 == 0:
+            m.set_speed(1.5 + i * 0.1, i * 30)
+
+    for i in range(30):
+        tick(scene)
+        assert scene.get_matters_boundary() == brute_force_extent(scene)
@@ -0,0 +1,173 @@
+from cosmos import *
+from conftest import tick
+
+###############################################################################
+class Vanishing(Circlet):
+    ''' Removes itself once it reaches a border '''
+
+    def on_border(self, hoffset, voffset):
+        self.master().remove(self)
+
+class Reaper(Circlet):
+    ''' Removes the other matters once it reaches a border '''
+
+    def __init__(self, radius, victims):
+        super(Reaper, self).__init__(radius, True)
+        self.victims = victims
+
+    def on_border(self, hoffset, voffset):
+        for m in self.victims:
+            self.master().remove(m)
+
+        self.victims = []
+        super(Reaper, self).on_border(hoffset, voffset)
+
+class Updating(Circlet):
+    ''' Counts its updates, and removes the victims on the first one '''
+
+    def __init__(self, victims = ()):
+        super(Updating, self).__init__(2, True)
+        self.victims, self.updates = list(victims), 0
+
+    def update(self, count, interval, uptime):
+        self.updates += 1
+
+        for m in self.victims:
+            self.master().remove(m)
+
+        self.victims = []
+
+class Eraser(Circlet):
+    def on_border(self, hoffset, voffset):
+        self.master().erase()
+
+class Scene(Cosmos):
+    def __init__(self, make):
+        self.make = make
+        super(Scene, self).__init__(24)
+
+    def load(self, width, height):
+        self.make(self, width, height)
+
+def moving(m, speed, direction):
+    m.set_speed(speed, direction)
+
+    return m
+
+def positions(scene, matters):
+    return [(m.info.x, m.info.y) for m in matters]
+
+###############################################################################
+def test_matter_removes_itself_on_border(bang):
+    def make(scene, width, height):
+        scene.runners = [scene.insert(moving(Circlet(2, True), 1.0, 0), 10, 10 + i * 6) for i in range(4)]
+        scene.vanishing = [scene.insert(moving(Vanishing(2, True), 3.0, 180), 4, 8 + i * 6) for i in range(4)]
+
+    scene = bang(Scene(make))
+    tick(scene, 5)
+
+    assert positions(scene, scene.runners) == [(15.0, 10.0 + i * 6) for i in range(4)]
+    assert scene.find_matters(0, 0, 128, 64) == list(reversed(scene.runners))
+
+def test_matter_removes_others_in_the_same_pass(bang):
+    def make(scene, width, height):
+        scene.victims = [scene.insert(moving(Circlet(2, True), 0.5, 90), 30 + i * 8, 20) for i in range(6)]
+        scene.reaper = scene.insert(moving(Reaper(2, scene.victims[1:4]), 2.0, 180), 1, 40)
+        scene.reaper.set_border_strategy(BorderStrategy.BOUNCE)
+        scene.victims.append(scene.insert(moving(Circlet(2, True), 0.5, 90), 90, 20))
+
+    scene = bang(Scene(make))
+    tick(scene, 4)
+
+    survivors = scene.victims[0:1] + scene.victims[4:]
+    assert positions(scene, survivors) == [(30.0 + i * 8, 22.0) for i in (0, 4, 5)] + [(90.0, 22.0)]
+    assert scene.reaper.x_speed() > 0.0
+    assert len(scene.find_matters(0, 0, 128, 64)) == 5
+
+def test_updates_removing_earlier_matters_skip_nobody(bang):
+    def make(scene, width, height):
+        scene.early = [scene.insert(Updating(), 10 + i * 8, 10) for i in range(3)]
+        scene.reaper = scene.insert(Updating(), 40, 10)
+        scene.late = [scene.insert(Updating(), 50 + i * 8, 10) for i in range(3)]
+        # the two matters before it, itself, and one after it
+        scene.reaper.victims = scene.early[1:3] + [scene.reaper, scene.late[1]]
+
+    scene = bang(Scene(make))
+    tick(scene, 1)
+
+    assert [m.updates for m in scene.early + [scene.reaper] + scene.late] == [1, 1, 1, 1, 1, 0, 1]
+
+    tick(scene, 2)
+    assert [m.updates for m in scene.early + [scene.reaper] + scene.late] == [3, 1, 1, 1, 3, 0, 3]
+    assert len(scene.find_matters(0, 0, 128, 64)) == 3
+
+def test_removed_matter_is_left_alone(bang):
+    class Bouncing(Circlet):
+        def on_border(self, hoffset, voffset):
+            self.master().remove(self)
+            # bounces, which changes the motion of a matter no longer in the cosmos
+            super(Bouncing, self).on_border(hoffset, voffset)
+
+    def make(scene, width, height):
+        scene.bouncing = scene.insert(moving(Bouncing(2, True), 3.0, 180), 2, 8)
+        scene.bouncing.set_border_strategy(BorderStrategy.BOUNCE)
+        scene.runner = scene.insert(moving(Circlet(2, True), 1.0, 0), 10, 30)
+
+    scene = bang(Scene(make))
+    tick(scene, 2)
+
+    m = scene.bouncing
+    m.set_speed(1.0, 90)
+    scene.move(m, 5.0, 5.0)
+    scene.remove(m)
+    tick(scene, 2)
+
+    assert m.master() is scene
+    assert m.info.x == -1.0
+    assert scene.find_matters(0, 0, 128, 64) == [scene.runner]
+    assert positions(scene, [scene.runner]) == [(14.0, 30.0)]
+
+def test_matter_erases_the_scene_on_border(bang):
+    def make(scene, width, height):
+        scene.erased = [scene.insert(moving(Circlet(2, True), 1.0, 0), 10, 5 + i * 6) for i in range(5)]
+        scene.erased.append(scene.insert(moving(Eraser(2, True), 2.0, 270), 40, 1))
+        scene.erased += [scene.insert(moving(Circlet(2, True), 1.0, 0), 60, 5 + i * 6) for i in range(5)]
+
+    scene = bang(Scene(make))
+    tick(scene, 3)
+
+    assert scene.find_matters(0, 0, 128, 64) == []
+
+    # erased as if removed, they are left alone
+    for m in scene.erased:
+        scene.remove(m)
+        scene.move(m, 1.0, 1.0)
+        assert m.master() is scene and m.info.slot == -1
+
+    scene.insert(moving(Circlet(2, True), 1.0, 0), 10, 10)
+    tick(scene, 2)
+
+    assert len(scene.find_matters(0, 0, 128, 64)) == 1
+
+def test_motion_engine_grows_during_the_pass(bang):
+    class Spawner(Circlet):
+        def on_border(self, hoffset, voffset):
+            for i in range(40):
+                self.master().insert(moving(Circlet(1, True), 1.0, 0), 50, 50)
+
+            super(Spawner, self).on_border(hoffset, voffset)
+
+    def make(scene, width, height):
+        scene.spawner = scene.insert(moving(Spawner(2, True), 2.0, 180), 1, 5)
+        scene.spawner.set_border_strategy(BorderStrategy.BOUNCE)
+        scene.runners = [scene.insert(moving(Circlet(2, True), 1.0, 0), 10, 10 + i * 5) for i in range(8)]
+
+    scene = bang(Scene(make))
+
+    # the runners come after the spawner in the pass that grows the engine
+    tick(scene)
+    assert positions(scene, scene.runners) == [(11.0, 10.0 + i * 5) for i in range(8)]
+
+    tick(scene, 2)
+    assert positions(scene, scene.runners) == [(13.0, 10.0 + i * 5) for i in range(8)]
+    assert len(scene.find_matters(0, 0, 128, 64)) == 49
@@ -0,0 +1,155 @@
+from matter import *
+from simulator import OLED
+
+import pytest
+
+###############################################################################
+class Mortal(ParticleSystem):
+    ''' Keeps where its particles died, and whether they left the region '''
+
+    def __init__(self, *args, **kwargs):
+        super(Mortal, self).__init__(*args, **kwargs)
+        self.deaths = []
+
+    def on_particle_expired(self, x, y, outside):
+        self.deaths.append((x, y, outside))
+
+def scatter(system, n):
+    for i in range(n):
+        system.spawn(float(i * 7 % 61), float(i * 5 % 29), 0.0, 0.0)
+
+def background(screen):
+    for y in range(0, 64, 3):
+        screen.hline(0, y, 128, 1)
+
+###############################################################################
+def test_emitters_spawn_at_their_rate_inside_their_rectangle():
+    system = ParticleSystem(128, 64, 64)
+    system.add_emitter(RectEmitter(10, 20, 8, 4, 250, 1.0, -0.5, 0.0, 100, 12))
+
+    # 250 per second, 2.5 particles per tick of 10ms
+    system.update(1, 10, 10)
+    assert system.count == 2
+    system.update(2, 10, 20)
+    assert system.count == 5
+
+    for slot in range(system.count):
+        steps = 2 if slot < 2 else 1
+
+        assert system.lives[slot] == 100 - steps
+        assert (system.vxs[slot], system.vys[slot]) == (1.0, -0.5)
+        assert 10.0 <= system.xs[slot] - steps < 18.0 and 20.0 <= system.ys[slot] + steps * 0.5 < 24.0
+
+    # the emitter has used up its total
+    for count in range(3, 10):
+        system.update(count, 10, count * 10)
+
+    assert system.count == 12
+
+def test_emitting_into_a_full_system_drops_the_backlog():
+    system = ParticleSystem(128, 64, 4)
+    system.add_emitter(RectEmitter(0, 0, 128, 64, 1000))
+
+    # 10 are due, 4 fit
+    system.update(1, 10, 10)
+    assert system.count == 4
+
+    system.clear()
+    system.update(2, 1, 11)
+    assert system.count == 1
+
+def test_particles_die_of_age_or_on_leaving_the_region():
+    system = Mortal(20, 10, 8)
+    system.spawn(5.0, 5.0, 0.0, 0.0, 3)
+    system.spawn(18.0, 5.0, 1.0, 0.0)
+    system.spawn(5.0, 2.0, 0.0, -1.0, 10)
+    system.spawn(2.0, 2.0)
+
+    system.update(1, 10, 10)
+    assert system.deaths == []
+
+    # out through the right border, then through the top one while the first one dies of age
+    system.update(2, 10, 20)
+    assert system.deaths == [(20.0, 5.0, True)]
+    system.update(3, 10, 30)
+
+    assert system.deaths[1:] == [(5.0, -1.0, True), (5.0, 5.0, False)]
+    assert system.count == 1 and (system.xs[0], system.ys[0]) == (2.0, 2.0)
+
+def test_unbounded_particles_outlive_the_region():
+    system = Mortal(20, 10, 8, bounded = False)
+    system.spawn(18.0, 5.0, 1.0, 0.0)
+    system.spawn(5.0, 5.0, 0.0, 0.0, 2)
+
+    for count in range(1, 6):
+        system.update(count, 10, count * 10)
+
+    assert system.deaths == [(5.0, 5.0, False)]
+    assert system.count == 1 and system.xs[0] == 23.0
+
+def test_dead_slots_are_reused_in_place():
+    system = ParticleSystem(128, 64, 6)
+    arrays = (system.xs, system.ys, system.vxs, system.vys, system.lives)
+    scatter(system, 6)
+
+    assert system.spawn(1.0, 1.0) == -1
+
+    # the last particle takes the slot of the dead one
+    x5, y5 = system.xs[5], system.ys[5]
+    system.kill(1)
+    assert system.count == 5 and (system.xs[1], system.ys[1]) == (x5, y5)
+
+    system.kill(4)
+    assert system.count == 4
+    assert system.spawn(3.0, 4.0, 0.5, 0.25, 7) == 4
+    assert (system.xs[4], system.ys[4], system.vxs[4], system.vys[4], system.lives[4]) == (3.0, 4.0, 0.5, 0.25, 7)
+
+    system.clear()
+    assert system.count == 0
+    scatter(system, 6)
+    assert all(a is b for a, b in zip((system.xs, system.ys, system.vxs, system.vys, system.lives), arrays))
+
+@pytest.mark.parametrize('c', (0, 1, 2))
+@pytest.mark.parametrize('shape', (ParticleShape.DOT, ParticleShape.STREAK, ParticleShape.PLUS))
+def test_particles_are_drawn_like_the_screen_primitives(shape, c):
+    # drawn on a screen of its own, outside of any universe
+    system = ParticleSystem(128, 64, 64, shape, 11, c, False)
+    scatter(system, 40)
+    system.spawn(-1.0, 3.0)
+    system.spawn(126.5, 62.5)
+    system.spawn(60.0, -4.0)
+
+    for ox, oy in ((0, 0), (9, -6), (-3, 7)):
+        screen, expected = OLED(), OLED()
+        background(screen)
+        background(expected)
+
+        system.draw(screen, ox, oy, system.width, system.height)
+
+        for slot in range(system.count):
+            x, y = int(system.xs[slot]) + ox, int(system.ys[slot]) + oy
+
+            if shape == ParticleShape.DOT:
+                points = [(x, y)]
+            elif shape == ParticleShape.STREAK:
+                points = [(x, y + dy) for dy in range(11)]
+            else:
+                points = [(x, y), (x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+
+            for px, py in points:
+                if 0 <= px < 128 and 0 <= py < 64:
+                    expected.pixel(px, py, (1 - expected.pixel(px, py)) if c == 2 else c)
+
+        assert bytes(screen.buffer) == bytes(expected.buffer)
+
+def test_plus_particles_look_like_small_filled_circles(sim):
+    system = ParticleSystem(128, 64, 64, ParticleShape.PLUS)
+    scatter(system, 40)
+    expected = OLED()
+
+    system.draw(sim.oled, 0, 0, system.width, system.height)
+
+    for slot in range(system.count):
+        expected.fill_circle(int(system.xs[slot]), int(system.ys[slot]), 1, 1)
+
+    assert bytes(sim.oled.buffer) == bytes(expected.buffer)
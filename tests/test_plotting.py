@@ -0,0 +1,146 @@
+from plotting import *
+from simulator import OLED
+from array import array
+
+import plotting
+import random
+import pytest
+
+###############################################################################
+@pytest.fixture(params = ('python', 'numpy'))
+def path(request, monkeypatch):
+    ''' The pure Python loops, or numpy whatever the number of items '''
+    if request.param == 'numpy':
+        if plotting._numpy is None:
+            pytest.skip("numpy is not installed")
+
+        monkeypatch.setattr(plotting, '_NUMPY_THRESHOLD', 0)
+    else:
+        monkeypatch.setattr(plotting, '_numpy', None)
+
+    return request.param
+
+def screens(width, height):
+    ''' Two screens with the same background, for the plotted and the expected pixels '''
+    found = []
+
+    for i in range(2):
+        screen = OLED(width, height)
+
+        for y in range(0, height, 3):
+            screen.hline(0, y, width, 1)
+
+        found.append(screen)
+
+    return found
+
+def coordinates(rng, n, width, height, kind):
+    ''' Points around the window, some off it, in the containers the plotters take '''
+    xs = [rng.uniform(-6.0, width + 6.0) for i in range(n)]
+    ys = [rng.uniform(-10.0, height + 10.0) for i in range(n)]
+
+    # the edges, and the same pixel more than once
+    xs[0:6] = [0.0, width - 1.0, -0.5, width - 0.5, 3.0, 3.0]
+    ys[0:6] = [0.0, height - 1.0, 2.0, 7.0, 8.0, 8.0]
+
+    if kind == 'f':
+        xs, ys = array('f', xs), array('f', ys)
+    elif kind == 'h':
+        xs, ys = memoryview(array('h', [int(x) for x in xs])), memoryview(array('h', [int(y) for y in ys]))
+
+    return xs, ys
+
+def put(screen, x, y, c):
+    if 0 <= x < screen.width and 0 <= y < screen.height:
+        if c == 2:
+            c = 1 - screen.pixel(x, y)
+
+        screen.pixel(x, y, c)
+
+def dot(r):
+    ''' :return: the pixels of `fill_circle`, relative to the center '''
+    screen = OLED(32, 32)
+    screen.fill_circle(16, 16, r, 1)
+
+    return [(i - 16, j - 16) for j in range(32) for i in range(32) if screen.pixel(i, j)]
+
+###############################################################################
+@pytest.mark.parametrize('c', (0, 1, 2))
+@pytest.mark.parametrize('kind', ('list', 'f', 'h'))
+@pytest.mark.parametrize('width, height', ((128, 64), (40, 24)))
+def test_points_look_like_pixels(path, c, kind, width, height):
+    rng = random.Random(c)
+    xs, ys = coordinates(rng, 150, width, height, kind)
+
+    for ox, oy in ((0, 0), (5, -9), (-20, 13)):
+        screen, expected = screens(width, height)
+
+        # the last few are left out
+        vlsb_points(screen.buffer, width, height, xs, ys, 140, c, ox, oy)
+
+        for i in range(140):
+            put(expected, int(xs[i]) + ox, int(ys[i]) + oy, c)
+
+        assert bytes(screen.buffer) == bytes(expected.buffer)
+
+@pytest.mark.parametrize('c', (0, 1, 2))
+@pytest.mark.parametrize('width, height', ((128, 64), (40, 24)))
+def test_spans_look_like_vlines(path, c, width, height):
+    rng = random.Random(c + 10)
+    xs, ys = coordinates(rng, 100, width, height, 'f')
+    # within a page, across one or several page boundaries, and nothing at all
+    hs = [rng.choice((1, 2, 5, 8, 9, 17, 30, 0, -3)) for i in range(100)]
+    hs[0:6] = [1, 70, 3, 12, 8, 8]
+
+    for heights in (hs, 11):
+        for ox, oy in ((0, 0), (-3, -12), (7, 9)):
+            screen, expected = screens(width, height)
+
+            vlsb_vspans(screen.buffer, width, height, xs, ys, 90, heights, c, ox, oy)
+
+            for i in range(90):
+                x, y = int(xs[i]) + ox, int(ys[i]) + oy
+                h = heights if isinstance(heights, int) else heights[i]
+
+                if c == 2:
+                    for dy in range(max(h, 0)):
+                        put(expected, x, y + dy, c)
+                else:
+                    expected.vline(x, y, h, c)
+
+            assert bytes(screen.buffer) == bytes(expected.buffer)
+
+@pytest.mark.parametrize('c', (0, 1, 2))
+@pytest.mark.parametrize('radius', (1, 2, 4))
+def test_dots_look_like_filled_circles(path, c, radius):
+    rng = random.Random(radius)
+    xs, ys = coordinates(rng, 80, 128, 64, 'f')
+    pixels = dot(radius)
+
+    for ox, oy in ((0, 0), (-6, 4)):
+        screen, expected = screens(128, 64)
+
+        vlsb_dots(screen.buffer, 128, 64, xs, ys, 80, radius, c, ox, oy)
+
+        for i in range(80):
+            x, y = int(xs[i]) + ox, int(ys[i]) + oy
+
+            if c == 2:
+                for dx, dy in pixels:
+                    put(expected, x + dx, y + dy, c)
+            else:
+                expected.fill_circle(x, y, radius, c)
+
+        assert bytes(screen.buffer) == bytes(expected.buffer)
+
+def test_nothing_is_plotted_off_the_window(path):
+    screen = OLED()
+    xs, ys = [-1, 128, 300, 5, 5], [5, 5, 5, -1, 64]
+
+    vlsb_points(screen.buffer, 128, 64, xs, ys, 5)
+    # ending just above the window, or starting just below it
+    vlsb_vspans(screen.buffer, 128, 64, xs, ys, 3, 20)
+    vlsb_vspans(screen.buffer, 128, 64, [10, 11], [-30, 64], 2, 30)
+    vlsb_dots(screen.buffer, 128, 64, [-3, 131, 60, 60], [30, 30, -3, 67], 4, 2)
+
+    assert not any(screen.buffer)
@@ -0,0 +1,109 @@
+from cosmos import *
+from simulator import OLED
+
+import random
+import pytest
+
+###############################################################################
+class Canvas(Cosmos):
+    def __init__(self, dirty, c):
+        self.dirty, self.c = dirty, c
+        super(Canvas, self).__init__(24)
+
+    def load(self, width, height):
+        self.enable_dirty_rendering(self.dirty)
+        self.path = self.insert(Polylinet(90, 40, 4, self.c, 3), 20.0, 12.0)
+
+def walk(rng, n, width, height):
+    # corners and edges of the canvas included
+    points = [(0, 0), (width - 1, height - 1), (width - 1, 0), (0, height - 1)]
+
+    while len(points) < n:
+        points.append((rng.randint(0, width - 1), rng.randint(0, height - 1)))
+
+    return points[0:n]
+
+def segments(screen, points, x, y, c, marker = -1, radius = 2):
+    ''' What drawing the path one `line` per segment gives '''
+    if len(points) == 1:
+        screen.pixel(x + points[0][0], y + points[0][1], c)
+
+    for i in range(1, len(points)):
+        screen.line(x + points[i - 1][0], y + points[i - 1][1], x + points[i][0], y + points[i][1], c)
+
+    if marker >= 0:
+        screen.fill_circle(x + points[marker][0], y + points[marker][1], radius, c)
+
+    return bytes(screen.buffer)
+
+def background(screen):
+    for y in range(0, 64, 3):
+        screen.hline(0, y, 128, 1)
+
+###############################################################################
+@pytest.mark.parametrize('c', (0, 1, 2))
+def test_paths_look_like_their_segments(c):
+    rng = random.Random(c)
+    path = Polylinet(60, 30, 2, c)
+    points = []
+
+    for n in range(1, 25):
+        points.append(walk(rng, n, 60, 30)[-1])
+        path.append(*points[-1])
+        path.set_marker(rng.randint(-1, n - 1))
+
+        assert path.count() == n and path.get_point(n - 1) == points[-1]
+        assert path.get_extent(0, 0) == (60.0, 30.0)
+
+        # partly off the screen as well
+        for x, y in ((0, 0), (40, 20), (-15, -8), (100, 50)):
+            screen, expected = OLED(), OLED()
+            background(screen)
+            background(expected)
+            path.draw(screen, x, y, 60, 30)
+
+            assert bytes(screen.buffer) == segments(expected, points, x, y, c, path.get_marker())
+
+@pytest.mark.parametrize('dirty', (False, True))
+@pytest.mark.parametrize('c', (0, 1))
+def test_paths_edited_in_a_universe(bang, sim, dirty, c):
+    universe = bang(Canvas(dirty, c))
+    path = universe.path
+    points = walk(random.Random(7), 30, 90, 40)
+    screen = OLED()
+
+    def check(drawn, marker = -1, mode = c):
+        universe.refresh()
+        screen.fill(0)
+
+        assert universe.get_matter_boundary(path) == (20.0, 12.0, 90.0, 40.0)
+        assert bytes(sim.oled.buffer) == segments(screen, drawn, 20, 12, mode, marker, 3)
+
+    # the path grows beyond its initial capacity after insertion
+    for n in range(1, len(points) + 1):
+        path.append(*points[n - 1])
+        check(points[0:n])
+
+    path.set_marker(5)
+    check(points, 5)
+    path.set_marker(29)
+    check(points, 29)
+
+    # the marker never reaches the retained layer
+    path.set_marker(-1)
+    check(points)
+
+    # the layer is rebuilt after clearing and after changing the color
+    path.clear()
+    check([])
+    path.append(*points[3])
+    check(points[3:4])
+    path.append(*points[4])
+    path.set_draw_mode(2)
+    check(points[3:5], -1, 2)
+
+    universe.move(path, 5.0, 3.0)
+    universe.refresh()
+    screen.fill(0)
+    assert universe.get_matter_boundary(path) == (25.0, 15.0, 90.0, 40.0)
+    assert bytes(sim.oled.buffer) == segments(screen, points[3:5], 25, 15, 2)
@@ -0,0 +1,37 @@
+from profiler import *
+from matter import Circlet
+
+import io
+import time
+
+###############################################################################
+def test_totals_neither_wrap_nor_overflow(sim):
+    profiler = Profiler()
+    m = Circlet(2, True)
+
+    # 5000s in all, far beyond what 32 bits of microseconds hold
+    for i in range(1000):
+        profiler.add(ProfilePhase.DRAW, 5000000)
+
+        t0 = time.ticks_us()
+        sim.clock.now += 5000
+        profiler.record_matter(ProfilePhase.UPDATE, m, t0)
+
+    profiler.add(ProfilePhase.DRAW, 999999)
+
+    assert profiler.summary() == [('draw', 1001, 5000999999, 4996003, 2 ** 19 - 1, 2 ** 19 - 1, 5000000)]
+    assert profiler.class_summary() == [('Circlet', 'update', 1000, 5000000000, 5000000, 5000000)]
+
+    profiler.dump(io.StringIO())
+
+    # 'L' is 32 bits on the board, and the counters are read as small ints
+    for counters in (profiler._Profiler__totals, profiler._Profiler__class_totals):
+        assert max(counters) < 2 ** 30
+
+def test_reset_clears_the_carried_seconds():
+    profiler = Profiler()
+    profiler.add(ProfilePhase.SHOW, 2500000)
+    profiler.reset()
+    profiler.add(ProfilePhase.SHOW, 300)
+
+    assert profiler.summary() == [('show', 1, 300, 300, 300, 300, 300)]
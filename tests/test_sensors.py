@@ -0,0 +1,102 @@
+from universe import _SensorChannel, _PhysicsWatcher, _EVENT_LIGHT, _EVENT_SOUND
+from cosmos import Cosmos
+
+import random
+import pytest
+
+###############################################################################
+class Target(object):
+    ''' Stands for the universe, keeps the posted (kind, average, above) triples '''
+
+    def __init__(self):
+        self.events = []
+
+    def post_event(self, kind, arg, flag):
+        self.events.append((kind, arg, flag))
+
+def watcher():
+    options = { 'light': (100, 4, 2048, 200), 'sound': (50, 2, 1000, 100), 'accelerometer': (40, 4, 0, 0) }
+    target = Target()
+
+    return _PhysicsWatcher(target, options), target
+
+def run(sim, lights):
+    ''' One light sample per value '''
+    for value in lights:
+        sim.light.value = value
+        sim.run(100)
+
+###############################################################################
+@pytest.mark.parametrize('typecode, window', (('h', 1), ('h', 8), ('h', 5), ('f', 4)))
+def test_channel_keeps_the_average_and_the_peak_of_the_window(typecode, window):
+    rng = random.Random(window)
+    channel = _SensorChannel(typecode, window)
+    pushed = []
+
+    for i in range(200):
+        if i % 40 < 15:
+            # runs of falling values let the peak leave the window
+            datum = 4000 - i % 40 * 100
+        else:
+            datum = rng.randint(-500, 4095)
+
+        if typecode == 'f':
+            datum = datum / 1024.0
+
+        channel.push(datum)
+        pushed.append(datum)
+        values = pushed[-window:]
+
+        assert channel.latest == datum
+        assert channel.count == len(values)
+        assert channel.average == pytest.approx(sum(values) / len(values))
+        assert channel.peak == max(values)
+
+def test_light_crossing_the_threshold_posts_events(sim):
+    w, target = watcher()
+
+    # the average has to reach 2248 to rise and 1848 to fall
+    run(sim, [2000] * 4)
+    assert target.events == []
+
+    run(sim, [3000])
+    assert target.events == [(_EVENT_LIGHT, 2250, True)]
+
+    # noise around the threshold posts nothing
+    run(sim, [1900, 2100] * 5)
+    assert target.events == [(_EVENT_LIGHT, 2250, True)]
+
+    run(sim, [0])
+    assert target.events[1:] == [(_EVENT_LIGHT, 1525, False)]
+
+def test_channels_are_sampled_at_their_own_rates(sim):
+    w, target = watcher()
+
+    sim.sound.value = 1200
+    sim.tilt(0.5, -0.25)
+    sim.run(400)
+
+    assert target.events == [(_EVENT_SOUND, 1200, True)]
+    assert w.light.count == 4 and w.sound.count == 2 and w.acceleration[0].count == 4
+    assert w.xyz == (0.5, -0.25, -1.0)
+    assert w.acceleration[1].average == -0.25
+
+def test_levels_are_read_directly_before_the_big_bang(sim):
+    universe = Cosmos(24)
+    sim.light.value, sim.sound.value = 1234, 321
+    sim.tilt(0.5, -0.25)
+
+    assert universe.get_light_level() == (1234, 1234, 1234)
+    assert universe.get_sound_level() == (321, 321, 321)
+    assert universe.get_average_acceleration() == (0.5, -0.25, -1.0)
+    assert universe.get_average_acceleration() == universe.get_acceleration()
+
+    # afterwards the sampled windows are used
+    universe.big_bang()
+    universe.set_sensor_options('light', 100, 4)
+    sim.run(200)
+    sim.light.value = 2234
+    sim.run(200)
+    universe.cancel_timer()
+
+    assert universe.get_light_level() == (2234, 1734, 2234)
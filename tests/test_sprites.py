@@ -0,0 +1,84 @@
+from matter import *
+
+import pytest
+
+###############################################################################
+def shapes():
+    return [Circlet(1, True), Circlet(4, True), Circlet(6, False), Circlet(9, True),
+            Rectanglet(7, 3, True), Rectanglet(12, 9, False),
+            Trianglet(9, 11, -6, 13, True), Trianglet(14, -5, 3, 7, False), Trianglet(20, 0, 10, 6, True)]
+
+def draw(sim, m, x, y, cached):
+    m.enable_sprite_cache(cached)
+    width, height = m.get_extent(x, y)
+    m.draw(sim.oled, x, y, width, height)
+
+    return bytes(sim.oled.buffer)
+
+def background(sim):
+    # something for the masks to be transparent over
+    for y in range(0, 64, 3):
+        sim.oled.hline(0, y, 128, 1)
+
+###############################################################################
+@pytest.mark.parametrize('c', (0, 1))
+def test_cached_draws_match_direct_draws(sim, c):
+    sprite_cache.clear()
+    misses = sprite_cache.stats()[1]
+
+    for i, m in enumerate(shapes()):
+        m.set_draw_mode(c)
+
+        for x, y in ((3, 5), (60, 30 + i), (-4, -3), (122, 58)):
+            background(sim)
+            direct = draw(sim, m, x, y, False)
+            sim.oled.fill(0)
+            background(sim)
+
+            assert draw(sim, m, x, y, True) == direct
+            sim.oled.fill(0)
+
+    assert sprite_cache.stats()[1] - misses == len(shapes())
+
+def test_drawing_a_mask_leaves_the_screen_alone(sim):
+    sprite_cache.clear()
+    background(sim)
+    sim.oled.fill_rect(0, 0, 30, 20, 1)
+    before = bytes(sim.oled.buffer)
+
+    mask = sprite_cache.sprite(sim.oled, 'C', 15, 15, 0, Circlet(8, True)._IShapelet__draw_shapelet, 15, 15)
+
+    assert bytes(sim.oled.buffer) == before
+    assert mask.pixel(7, 7) == 1 and mask.pixel(0, 0) == 0
+
+def test_masks_larger_than_the_screen_are_drawn_directly(sim):
+    sprite_cache.clear()
+    m = Circlet(40, True)
+
+    assert draw(sim, m, 10, -10, True) == draw(sim, m, 10, -10, False)
+    assert sprite_cache.stats()[3] == 0
+
+def test_least_recently_used_masks_are_evicted(sim):
+    cache = SpriteCache(64)
+    rasterize = Rectanglet(8, 8)._IShapelet__draw_shapelet
+
+    for key in 'abcd':
+        cache.sprite(sim.oled, key, 16, 8, 0, rasterize, 8, 8)
+
+    cache.sprite(sim.oled, 'a', 16, 8, 0, rasterize, 8, 8)
+    cache.sprite(sim.oled, 'e', 16, 8, 0, rasterize, 8, 8)
+    assert cache.stats() == (1, 5, 1, 4, 64)
+
+    # 'b' was the least recently used one, 'a' was used lately
+    cache.sprite(sim.oled, 'a', 16, 8, 0, rasterize, 8, 8)
+    assert cache.stats()[0:2] == (2, 5)
+    cache.sprite(sim.oled, 'b', 16, 8, 0, rasterize, 8, 8)
+    assert cache.stats()[0:3] == (2, 6, 2)
+
+    cache.set_budget(32)
+    assert cache.stats()[2:] == (4, 2, 32)
+
+    # 'a' and 'b' are kept
+    cache.sprite(sim.oled, 'a', 16, 8, 0, rasterize, 8, 8)
+    cache.sprite(sim.oled, 'b', 16, 8, 0, rasterize, 8, 8)
+    assert cache.stats()[0:2] == (4, 6)
@@ -0,0 +1,124 @@
+from text import *
+from simulator import OLED
+
+import os
+
+###############################################################################
+class Screen(OLED):
+    ''' Counts the calls of `DispChar`, whose font has a glyph taking no room at all '''
+
+    def __init__(self):
+        super(Screen, self).__init__()
+        self.calls = 0
+
+    def DispChar(self, s, x, y, mode = 1, auto_return = False):
+        self.calls += 1
+
+        if s == '`':
+            return x, y
+
+        return super(Screen, self).DispChar(s, x, y, mode, auto_return)
+
+def pattern(screen):
+    for y in range(0, 64, 5):
+        screen.hline(0, y, 128, 1)
+
+###############################################################################
+def test_glyphs_are_measured_once():
+    screen = Screen()
+    metrics = GlyphMetrics(screen)
+
+    assert metrics.measure('ab`') == 16
+    assert screen.calls == 95
+
+    # a glyph without advance is measured as well
+    assert metrics.advance('`') == 0
+    assert metrics.measure('`a`') == 8
+    assert metrics.advance('中') == 16
+    assert metrics.advance('中') == 16
+    assert screen.calls == 96
+
+def test_measuring_leaves_the_screen_alone(tmp_path):
+    screen = Screen()
+    pattern(screen)
+    before = bytes(screen.buffer)
+    metrics = GlyphMetrics(screen)
+    metrics.calibrate()
+
+    assert bytes(screen.buffer) == before
+
+    path = os.path.join(str(tmp_path), 'advances.json')
+    metrics.save(path)
+    loaded = GlyphMetrics(screen)
+    calls = screen.calls
+
+    assert loaded.load(path)
+    assert loaded.measure('``xy') == 16 and screen.calls == calls
+
+def test_cached_text_looks_like_dispchar(sim):
+    engine = TextEngine(1024, GlyphMetrics(Screen()))
+
+    for mode in (1, 3):
+        for text in ('hello', '12-7', 'hello', '-12', ' a b '):
+            # the normal mode of the simulator keeps the background, the one of the board does not
+            if mode == 3:
+                pattern(sim.oled)
+
+            expected_x = sim.oled.DispChar(text, 5, 20, mode)[0]
+            expected = bytes(sim.oled.buffer)
+
+            sim.oled.fill(0)
+            if mode == 3:
+                pattern(sim.oled)
+
+            assert engine.draw(sim.oled, text, 5, 20, mode) == expected_x
+            assert bytes(sim.oled.buffer) == expected
+            sim.oled.fill(0)
+
+def test_digits_count_against_the_budget(sim):
+    engine = TextEngine(200, GlyphMetrics(Screen()))
+
+    engine.draw(sim.oled, '10-0', 0, 0)
+    # '1', '0' and '-', 8 pixels wide and 2 pages high
+    assert engine.stats()[3:] == (3, 48)
+
+    engine.draw(sim.oled, 'abc', 0, 0)
+    engine.draw(sim.oled, 'abcdef', 0, 0)
+    assert engine.stats()[2:] == (0, 5, 48 + 48 + 96)
+
+    # strings make room, the digits stay
+    engine.draw(sim.oled, '987', 0, 20)
+    assert engine.stats()[2:] == (1, 7, 48 + 48 + 96)
+    engine.draw(sim.oled, 'xyz', 0, 20)
+    assert engine.stats()[2:] == (2, 7, 96 + 48)
+
+    engine.set_budget(50)
+    assert engine.stats()[2:] == (3, 6, 96)
+
+    engine.clear()
+    assert engine.stats()[3:] == (0, 0)
+
+def test_the_least_recently_used_strings_are_evicted_across_modes(sim):
+    engine = TextEngine(1000, GlyphMetrics(Screen()))
+
+    # 'ab' and 'cd' are 16 pixels wide and take 32 bytes
+    for text, mode in (('ab', 1), ('ab', 3), ('cd', 1), ('cd', 3)):
+        engine.draw(sim.oled, text, 0, 0, mode)
+
+    # used again, the first one is now the most recent
+    engine.draw(sim.oled, 'ab', 0, 0, 1)
+    assert engine.stats() == (1, 4, 0, 4, 128)
+
+    engine.set_budget(64)
+    assert engine.stats()[2:] == (2, 2, 64)
+
+    hits, misses = engine.stats()[0:2]
+    engine.draw(sim.oled, 'cd', 0, 0, 3)
+    engine.draw(sim.oled, 'ab', 0, 0, 1)
+    assert engine.stats()[0:2] == (hits + 2, misses)
+
+    # a new string makes room by dropping the least recent of the two
+    engine.draw(sim.oled, 'ef', 0, 0, 3)
+    engine.draw(sim.oled, 'ab', 0, 0, 1)
+    engine.draw(sim.oled, 'ef', 0, 0, 3)
+    assert engine.stats() == (hits + 4, misses + 1, 3, 2, 64)
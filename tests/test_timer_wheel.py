@@ -0,0 +1,116 @@
+from universe import _TimerWheel
+
+###############################################################################
+class Recorder(object):
+    ''' Collects the virtual times a task fires at, relative to when the wheel was made '''
+
+    def __init__(self, sim):
+        self.sim, self.start, self.times = sim, sim.clock.now, []
+
+    def __call__(self, task):
+        self.times.append(self.sim.clock.now - self.start)
+
+def wheel(sim):
+    # a turn of the wheel takes 80ms
+    return _TimerWheel(1, 10, 8), Recorder(sim)
+
+###############################################################################
+def test_one_shot_tasks_fire_once_on_the_next_tick_at_or_after_the_delay(sim):
+    w, fired = wheel(sim)
+    tasks = [w.schedule(fired, delay) for delay in (10, 25, 1, 79, 80, 81)]
+    assert w.stats()[0] == 6
+
+    sim.run(200)
+
+    assert fired.times == [10, 10, 30, 80, 80, 90]
+    assert w.stats() == (0, 6, 0)
+    assert not any(task.active for task in tasks)
+
+def test_delays_longer_than_a_turn_wait_for_their_round(sim):
+    w, fired = wheel(sim)
+
+    for delay in (250, 90, 170, 1000):
+        w.schedule(fired, delay)
+
+    sim.run(1200)
+
+    assert fired.times == [90, 170, 250, 1000]
+
+def test_periodic_tasks_keep_their_average_rate(sim):
+    w, fired = wheel(sim)
+    w.schedule(fired, 25, 25, 0)
+
+    sim.run(1000)
+
+    # 25ms is not a multiple of the resolution, the ticks alternate between 20ms and 30ms apart
+    assert fired.times[0:4] == [30, 50, 80, 100]
+    assert len(fired.times) == 40
+
+def test_periods_of_a_turn_and_longer(sim):
+    w, fired = wheel(sim)
+    w.schedule(fired, 80, 80, 0)
+    w.schedule(fired, 200, 200, 0)
+
+    sim.run(800)
+
+    assert fired.times == [80, 160, 200, 240, 320, 400, 400, 480, 560, 600, 640, 720, 800, 800]
+
+def test_cancelled_tasks_never_fire(sim):
+    w, fired = wheel(sim)
+    doomed = w.schedule(fired, 150)
+    periodic = []
+
+    def once(task):
+        fired(task)
+        w.cancel(task)
+
+    periodic.append(w.schedule(once, 30, 30, 0))
+    w.schedule(lambda task: w.cancel(doomed), 100)
+
+    sim.run(400)
+
+    assert fired.times == [30]
+    assert w.stats() == (0, 2, 0)
+    assert not doomed.active and not periodic[0].active
+
+def test_late_ticks_catch_up_in_order(sim):
+    w, fired = wheel(sim)
+    w.schedule(fired, 20, 20, 0)
+    # the wheel is driven by hand
+    sim.timers[0].deinit()
+
+    # the hardware timer is held up for 50ms, the wheel runs the missed slots at once
+    sim.clock.now += 50
+    w.on_tick(None)
+
+    assert fired.times == [50, 50]
+    assert w.stats()[2] == 4
+
+    for i in range(3):
+        sim.clock.now += 10
+        w.on_tick(None)
+
+    assert fired.times == [50, 50, 60, 80]
+
+def test_automatic_phases_spread_the_periodic_tasks(sim):
+    w, fired = wheel(sim)
+    tasks = [w.schedule(fired, 40, 40) for i in range(4)]
+
+    assert len(set(task.slot for task in tasks)) == 4
+
+def test_due_times_stay_within_a_turn(sim):
+    w, fired = wheel(sim)
+    task = w.schedule(fired, 30, 30, 0)
+    later = w.schedule(fired, 100000)
+    rounds = later.rounds
+
+    # a thousand turns, the times kept by the tasks never grow with the uptime
+    for i in range(100):
+        sim.run(800)
+        assert 0 <= task.due < 80 and 0 <= task.slot < 8 and task.rounds == 0
+        assert 0 <= later.due < 80 and later.rounds == rounds - 10 * (i + 1)
+
+    assert len(fired.times) == 80000 // 30
+
+    sim.run(20000)
+    assert fired.times.count(100000) == 1
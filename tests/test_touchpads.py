@@ -0,0 +1,127 @@
+from universe import _TouchpadWatcher, _EVENT_TOUCHPAD
+
+import pytest
+
+###############################################################################
+class Target(object):
+    ''' Stands for the universe, keeps the posted (pad index, pressed) pairs '''
+
+    def __init__(self):
+        self.events = []
+
+    def post_event(self, kind, arg, flag):
+        assert kind == _EVENT_TOUCHPAD
+        self.events.append((arg, flag))
+
+class Clumsy(Target):
+    ''' A universe whose handler of the touchpads is broken '''
+
+    def post_event(self, kind, arg, flag):
+        raise ZeroDivisionError()
+
+def unreadable():
+    raise OSError()
+
+def watcher(debounce = 2, target = None):
+    target = target or Target()
+    w = _TouchpadWatcher(target, 50, 30, 15, debounce)
+    # the samples are fed by hand unless a test runs the simulator
+    w.cancel_timer()
+
+    return w, target
+
+def feed(w, readings, idx = 0):
+    for datum in readings:
+        w._sample(idx, datum)
+
+###############################################################################
+def test_press_and_release_need_consecutive_samples():
+    w, target = watcher()
+    feed(w, [600, 600])
+
+    # a single glitch is ignored
+    feed(w, [150, 600, 150, 600])
+    assert target.events == []
+
+    feed(w, [150, 150])
+    assert target.events == [(1, True)]
+
+    feed(w, [150, 600, 150, 600])
+    assert target.events == [(1, True)]
+
+    feed(w, [600, 600, 600])
+    assert target.events == [(1, True), (1, False)]
+
+def test_thresholds_have_hysteresis():
+    w, target = watcher(1)
+    feed(w, [1000])
+
+    # 30% below the baseline presses, back to less than 15% below releases
+    feed(w, [710, 700, 699, 750, 849])
+    assert target.events == [(1, True)]
+
+    feed(w, [850])
+    assert target.events == [(1, True), (1, False)]
+
+def test_baseline_follows_slow_drifts_but_not_touches():
+    w, target = watcher()
+    feed(w, [600])
+
+    # the readings sink slowly with the weather, nothing is pressed
+    feed(w, [int(600 * 0.995 ** i) for i in range(1, 120)])
+    assert target.events == []
+    assert 330 <= w._baselines[0] <= 360
+
+    # held for long, the baseline stays where it was before the touch
+    baseline = w._baselines[0]
+    feed(w, [100] * 50)
+    assert target.events == [(1, True)]
+    assert w._baselines[0] == baseline
+
+    # readings higher than the baseline are taken at once
+    feed(w, [baseline] * 2 + [500])
+    assert target.events == [(1, True), (1, False)]
+    assert w._baselines[0] == 500
+
+def test_pads_are_watched_independently():
+    w, target = watcher()
+    feed(w, [600] * 2, 2)
+    feed(w, [600] * 2, 5)
+
+    feed(w, [100] * 2, 5)
+    feed(w, [100] * 2, 2)
+    feed(w, [600] * 2, 5)
+
+    assert target.events == [(6, True), (3, True), (6, False)]
+
+def test_pads_are_sampled_on_the_timer_wheel(sim):
+    target = Target()
+    _TouchpadWatcher(target, 50, 30, 15, 2)
+
+    sim.run(200)
+    sim.touch('Y')
+    sim.run(120)
+    assert target.events == [(2, True)]
+
+    sim.touch('Y', False)
+    sim.touch('N')
+    sim.run(100)
+    assert target.events == [(2, True), (2, False), (6, True)]
+
+def test_unreadable_pads_are_skipped(sim, monkeypatch):
+    w, target = watcher(1)
+    monkeypatch.setattr(sim.touchpads['Y'], 'read', unreadable)
+    w.on_tick(None)
+
+    sim.touch('Y')
+    sim.touch('T')
+    w.on_tick(None)
+    assert target.events == [(3, True)]
+
+def test_errors_of_the_handlers_are_not_swallowed(sim):
+    w, target = watcher(1, Clumsy())
+    w.on_tick(None)
+    sim.touch('P')
+
+    with pytest.raises(ZeroDivisionError):
+        w.on_tick(None)
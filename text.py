@@ -0,0 +1,282 @@
+# Text rendering on top of `DispChar`: glyph advances measured once, rendered strings cached as bitmaps
+
+from array import array
+
+import framebuf
+import json
+
+###############################################################################
+TEXT_HEIGHT = 16
+
+_MODE_NORMAL = 1
+_MODE_TRANSPARENT = 3
+_NUMERIC = '0123456789-'
+_UNMEASURED = 255 # no glyph is that wide, some are not wide at all
+
+###############################################################################
+class GlyphMetrics(object):
+    '''
+    Advances of the glyphs of the font of `DispChar`, so that text is measured without drawing.
+
+    Printable ASCII glyphs are measured all at once the first time one of them is needed,
+    the others one by one. Measuring draws into the first two pages of the screen,
+    which are restored afterwards. `save` and `load` keep the advances across boots.
+
+    :param ledscr: the screen, the `oled` of mpython by default
+    '''
+
+    def __init__(self, ledscr = None):
+        super(GlyphMetrics, self).__init__()
+        self.__ledscr = ledscr
+        self.__ascii = array('B', [_UNMEASURED] * 95)
+        self.__others = {}
+        self.__scratch = None
+
+# public
+    def advance(self, ch):
+        code = ord(ch)
+
+        if 32 <= code < 127:
+            adv = self.__ascii[code - 32]
+
+            if adv == _UNMEASURED:
+                self.calibrate()
+                adv = self.__ascii[code - 32]
+        else:
+            adv = self.__others.get(ch, -1)
+
+            if adv < 0:
+                adv = self.__measure_glyph(ch)
+                self.__others[ch] = adv
+
+        return adv
+
+    def measure(self, text):
+        width = 0
+
+        for ch in text:
+            width += self.advance(ch)
+
+        return width
+
+    def calibrate(self, chars = None):
+        ''' Measure the glyphs of `chars`, all printable ASCII glyphs by default '''
+        if chars is None:
+            for code in range(32, 127):
+                self.__ascii[code - 32] = self.__measure_glyph(chr(code))
+        else:
+            for ch in chars:
+                code = ord(ch)
+
+                if 32 <= code < 127:
+                    self.__ascii[code - 32] = self.__measure_glyph(ch)
+                else:
+                    self.__others[ch] = self.__measure_glyph(ch)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({ 'ascii': list(self.__ascii), 'others': self.__others }, f)
+
+    def load(self, path):
+        ''' :return: whether the advances are loaded, the file might not exist yet '''
+        okay = False
+
+        try:
+            with open(path) as f:
+                table = json.load(f)
+
+            if len(table['ascii']) == len(self.__ascii):
+                for i in range(len(self.__ascii)):
+                    self.__ascii[i] = table['ascii'][i]
+
+                self.__others = table['others']
+                okay = True
+        except (OSError, ValueError, KeyError):
+            pass
+
+        return okay
+
+    def screen(self):
+        if self.__ledscr is None:
+            from mpython import oled
+            self.__ledscr = oled
+
+        return self.__ledscr
+
+    def render(self, text, mode, width):
+        '''
+        :return: a MONO_VLSB framebuffer of `width` x `TEXT_HEIGHT` holding the text drawn by `DispChar`
+        '''
+        pixels = bytearray(width * 2)
+        self.__draw_aside(text, mode, pixels, width)
+
+        return framebuf.FrameBuffer(pixels, width, TEXT_HEIGHT, framebuf.MONO_VLSB)
+
+# private
+    def __measure_glyph(self, ch):
+        return self.__draw_aside(ch, _MODE_TRANSPARENT, None, 0)
+
+    def __draw_aside(self, text, mode, pixels, width):
+        # the first two pages are saved, drawn into and copied out, then restored
+        ledscr = self.screen()
+        buffer, stride = ledscr.buffer, ledscr.width
+
+        if self.__scratch is None or len(self.__scratch) != stride * 2:
+            self.__scratch = bytearray(stride * 2)
+
+        self.__scratch[:] = buffer[0:stride * 2]
+        ledscr.fill_rect(0, 0, stride, TEXT_HEIGHT, 0)
+        advance = ledscr.DispChar(text, 0, 0, mode, False)[0]
+
+        if pixels is not None:
+            pixels[0:width] = buffer[0:width]
+            pixels[width:width * 2] = buffer[stride:stride + width]
+
+        buffer[0:stride * 2] = self.__scratch
+
+        return advance
+
+class TextEngine(object):
+    '''
+    Measure and draw text, strings drawn lately are cached as bitmaps and blitted,
+    the least recently used ones are evicted once they take more bytes than the budget.
+
+    Only the normal and the transparent modes of `DispChar` are cached, since a framebuffer
+    blits either the whole box or only the set bits. Numeric text is composed of cached digits,
+    so that a changing counter costs nothing but blits. The digits count against the budget
+    but are never evicted, they are a few dozen bytes per mode.
+    The strings of both modes are kept in one circular list from the least to the most recently used one.
+    '''
+
+    def __init__(self, budget = 1024, metrics = None):
+        super(TextEngine, self).__init__()
+        self.metrics = metrics if metrics is not None else GlyphMetrics()
+        self.budget = budget
+        self.hits, self.misses, self.evictions = 0, 0, 0
+        self.__strings = { _MODE_NORMAL: {}, _MODE_TRANSPARENT: {} }
+        self.__digits = { _MODE_NORMAL: {}, _MODE_TRANSPARENT: {} }
+        self.clear()
+
+# public
+    def measure(self, text):
+        ''' :return: width, height, without drawing '''
+        return self.metrics.measure(text), TEXT_HEIGHT
+
+    def draw(self, ledscr, text, x, y, mode = _MODE_TRANSPARENT, auto_return = False):
+        '''
+        :param auto_return: passed to `DispChar` for text wider than the screen, which is never cached
+        :return: the x where the text ends, as `DispChar` does
+        '''
+        strings = self.__strings.get(mode)
+
+        if strings is None or not text:
+            x = ledscr.DispChar(text, x, y, mode, auto_return)[0]
+        elif self.__numeric(text):
+            key = 0 if mode == _MODE_TRANSPARENT else -1
+            digits = self.__digits[mode]
+
+            for ch in text:
+                glyph = digits.get(ch)
+
+                if glyph is None:
+                    glyph = self.__render_glyph(ch, mode)
+                    digits[ch] = glyph
+                    self.__size += glyph[1] * 2
+                    self.__evict()
+
+                ledscr.blit(glyph[0], x, y, key)
+                x += glyph[1]
+        else:
+            entry = strings.get(text)
+
+            if entry:
+                self.hits += 1
+                self.__unlink(entry)
+                self.__link(entry)
+            else:
+                self.misses += 1
+                width = self.metrics.measure(text)
+
+                # neither wider than the screen nor bigger than the whole budget
+                if width <= ledscr.width and width * 2 <= self.budget:
+                    entry = _Text(text, mode, self.metrics.render(text, mode, width), width)
+                    strings[text] = entry
+                    self.__size += entry.nbytes
+                    self.__link(entry)
+                    self.__evict()
+
+            if entry:
+                ledscr.blit(entry.fb, x, y, 0 if mode == _MODE_TRANSPARENT else -1)
+                x += entry.width
+            else:
+                x = ledscr.DispChar(text, x, y, mode, auto_return)[0]
+
+        return x
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.__evict()
+
+    def clear(self):
+        for mode in self.__strings:
+            self.__strings[mode] = {}
+            self.__digits[mode] = {}
+
+        self.__size = 0
+        self.__head = _Text(None, 0, None, 0)
+        self.__head.prev, self.__head.next = self.__head, self.__head
+
+    def stats(self):
+        '''
+        :return: hits, misses, evictions, cached strings and digits, cached bytes
+        '''
+        count = 0
+
+        for mode in self.__strings:
+            count += len(self.__strings[mode]) + len(self.__digits[mode])
+
+        return self.hits, self.misses, self.evictions, count, self.__size
+
+# private
+    def __numeric(self, text):
+        numeric = True
+
+        for ch in text:
+            if ch not in _NUMERIC:
+                numeric = False
+                break
+
+        return numeric
+
+    def __render_glyph(self, ch, mode):
+        width = self.metrics.advance(ch)
+
+        return self.metrics.render(ch, mode, width), width
+
+    def __link(self, entry):
+        # as the most recently used one
+        head = self.__head
+        entry.prev, entry.next = head.prev, head
+        head.prev.next = entry
+        head.prev = entry
+
+    def __unlink(self, entry):
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+    def __evict(self):
+        # the digits are not in the list, only strings are evicted
+        while self.__size > self.budget and self.__head.next is not self.__head:
+            lru = self.__head.next
+            self.__unlink(lru)
+            del self.__strings[lru.mode][lru.text]
+            self.__size -= lru.nbytes
+            self.evictions += 1
+
+class _Text(object):
+    def __init__(self, text, mode, fb, width):
+        super(_Text, self).__init__()
+        self.text, self.mode, self.fb, self.width, self.nbytes = text, mode, fb, width, width * 2
+        self.prev, self.next = None, None
+
+text_engine = TextEngine()
@@ -2,69 +2,337 @@
 
 from mpython import *
 from machine import Timer as SysTimer
+from display import *
+from profiler import *
+from plotting import *
+from array import array
 
 import time
 
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+_EVENT_TICK = 0
+_EVENT_BUTTON = 1
+_EVENT_TOUCHPAD = 2
+_EVENT_LIGHT = 3
+_EVENT_SOUND = 4
+
+_BUTTON_NAMES = ('A', 'B', 'C')
+_TOUCHPAD_NAMES = ('', 'P', 'Y', 'T', 'H', 'O', 'N')
+
+# 时间轮的精度(毫秒)，定时器回调最多提前或推迟这么多
+_TIMER_RESOLUTION = 10
+
 ###############################################
+class _TimerTask(object):
+    def __init__(self, callback, period):
+        super(_TimerTask, self).__init__()
+        self.callback, self.period = callback, period
+        self.due, self.slot, self.rounds = 0, 0, 0
+        self.active = True
+
+class _TimerWheel(object):
+    """
+    用一个硬件定时器驱动的时间轮，所有周期任务和一次性任务共享同一个硬件定时器。
+    任务按到期时间所在的轮次散列到各个槽里，每次硬件定时器到期只检查当前槽。
+    游标只在轮内转动，任务记下到期时间对整轮时长取模的毫秒数和还要等待的整轮数，
+    长时间运行也不会超出小整数的范围
+    """
+
+    def __init__(self, timer_id, resolution = _TIMER_RESOLUTION, slots = 64):
+        super(_TimerWheel, self).__init__()
+
+        self.__resolution, self.__mask = resolution, slots - 1
+        self.__slots = [[] for _ in range(slots)]
+        self.__cursor, self.__stamp = 0, time.ticks_ms()
+        self.__tasks, self.__fired, self.__late_ticks = 0, 0, 0
+
+        self.__hw = SysTimer(timer_id)
+        self.__hw.init(period=resolution, mode=SysTimer.PERIODIC, callback=self.on_tick)
+
+# public
+    def schedule(self, callback, delay, period = 0, phase = None):
+        """ delay 毫秒后调用 callback(task)，period 大于 0 时周期执行；phase 为 None 时自动错开与已有任务的相位 """
+        if phase is None and period > 0:
+            phase = self.__quiet_phase(delay, period)
+
+        task = _TimerTask(callback, period)
+        self.__insert(task, max(1, delay + (phase or 0)))
+        self.__tasks += 1
+
+        return task
+
+    def cancel(self, task):
+        if task is not None and task.active:
+            task.active = False
+            self.__tasks -= 1
+
+            slot = self.__slots[task.slot]
+            if task in slot:
+                slot.remove(task)
+
+    def stats(self):
+        """ 返回 (活动任务数, 累计触发次数, 硬件定时器迟到的轮次) """
+        return self.__tasks, self.__fired, self.__late_ticks
+
+    def on_tick(self, _):
+        resolution = self.__resolution
+        elapsed = time.ticks_diff(time.ticks_ms(), self.__stamp)
+        steps = elapsed // resolution
+
+        if steps > 1:
+            self.__late_ticks += steps - 1
+
+        self.__stamp = time.ticks_add(self.__stamp, steps * resolution)
+
+        for _ in range(steps):
+            self.__cursor = (self.__cursor + 1) & self.__mask
+            self.__run_slot(self.__cursor)
+
+# private
+    def __run_slot(self, cursor):
+        slot = self.__slots[cursor]
+        now = cursor * self.__resolution
+        span = (self.__mask + 1) * self.__resolution
+        idx = len(slot) - 1
+
+        # 逆序遍历，重新插入到同一个槽的周期任务在末尾，不会在本轮再次触发
+        while idx >= 0:
+            if idx < len(slot):
+                task = slot[idx]
+
+                if task.rounds > 0:
+                    task.rounds -= 1
+                else:
+                    slot.pop(idx)
+
+                    if task.period > 0:
+                        # 按毫秒累加到期时间，周期不是分辨率的整数倍时平均频率也不会偏
+                        late = (now - task.due) % span
+                        self.__insert(task, max(1, task.period - late))
+                    else:
+                        task.active = False
+                        self.__tasks -= 1
+
+                    self.__fired += 1
+                    task.callback(task)
+            idx -= 1
+
+    def __insert(self, task, delay):
+        # delay 是从当前槽算起的毫秒数，至少为 1，因此总是落在之后的槽里
+        resolution, slots = self.__resolution, self.__mask + 1
+        due = self.__cursor * resolution + delay
+        ticks = (due + resolution - 1) // resolution
+
+        task.due = due % (slots * resolution)
+        task.slot = ticks & self.__mask
+        task.rounds = (ticks - self.__cursor - 1) // slots
+        self.__slots[task.slot].append(task)
+
+    def __to_ticks(self, ms):
+        return (ms + self.__resolution - 1) // self.__resolution
+
+    def __quiet_phase(self, delay, period):
+        # 候选的是任务首次到期时会落进的那些槽
+        best, best_load = 0, -1
+        first = self.__cursor + self.__to_ticks(max(1, delay))
+        candidates = min(self.__to_ticks(period), self.__mask + 1)
+
+        for k in range(candidates):
+            load = len(self.__slots[(first + k) & self.__mask])
+
+            if best_load < 0 or load < best_load:
+                best, best_load = k, load
+
+        return best * self.__resolution
+
+_timer_wheel = None
+
+def _shared_timer_wheel():
+    global _timer_wheel
+
+    if _timer_wheel is None:
+        _timer_wheel = _TimerWheel(1)
+
+    return _timer_wheel
+
 class _Timer(object):
-    _id = 0
-  
     def __init__(self, interval):
         super(_Timer, self).__init__()
 
-        _Timer._id += 1
-        self._self = SysTimer(_Timer._id)
-        self._self.init(period=interval, mode=SysTimer.PERIODIC, callback= lambda a: self.on_tick(a))
+        self._task = None
+        self.set_timer_interval(interval)
     
     def on_tick(self, who):
         pass
 
-class _PhysicsWatcher(_Timer):
-    def __init__(self, target):
-        super(_PhysicsWatcher, self).__init__(100)
+    def set_timer_interval(self, interval):
+        self.cancel_timer()
+        self._task = _shared_timer_wheel().schedule(self.on_tick, interval, interval)
+
+    def cancel_timer(self):
+        _shared_timer_wheel().cancel(self._task)
+        self._task = None
+
+class _SensorChannel(object):
+    """ 定长环形缓冲区，增量维护滑动平均值和窗口内的峰值 """
+
+    def __init__(self, typecode, window):
+        super(_SensorChannel, self).__init__()
+
+        self.samples = array(typecode, [0] * max(1, window))
+        self.index, self.count, self.total = 0, 0, 0
+        self.latest, self.average, self.peak = 0, 0, 0
+        self.above = False
+
+    def push(self, datum):
+        samples = self.samples
+        size = len(samples)
+        evicted = samples[self.index]
+
+        samples[self.index] = datum
+        self.index += 1
+        
+        if self.count < size:
+            self.count += 1
+            evicted = 0
+
+        if self.index == size:
+            # 每转一圈重新求和一次，浮点误差不会累积
+            self.index = 0
+            self.total = sum(samples)
+        else:
+            self.total += datum - evicted
+
+        self.latest = datum
+        self.average = self.total / self.count
+
+        if self.count == 1 or datum >= self.peak:
+            self.peak = datum
+        elif evicted == self.peak:
+            self.peak = max(samples) if self.count == size else max(samples[0:self.count])
+
+class _PhysicsWatcher(object):
+    """
+    按各自的频率采样光线、声音和加速度计，结果写进环形缓冲区供游戏随时读取。
+    光线和声音只在滑动平均值越过阈值(带回差)时产生事件，不再转发每一个原始读数
+    """
+
+    def __init__(self, target, options):
+        super(_PhysicsWatcher, self).__init__()
         self.target = target
+        self._tasks = {}
+        self._thresholds = {}
+        self.light, self.sound, self.acceleration = None, None, None
+        self.xyz, self.roll_pitch = (0.0, 0.0, 0.0), (0.0, 0.0)
         accelerometer.set_range(3)
+
+        for which in options:
+            self.configure(which, *options[which])
     
-    def on_tick(self, _):
-        datum = light.read()
-        if datum > 0: self.on_light(datum, datum / 4095)
-    
-        datum = sound.read()
-        if datum > 0: self.on_sound(datum, datum / 4095)
-    
-    def on_light(self, value, percentage):
-        self.target.on_light(value, percentage)
-    
-    def on_sound(self, value, percentage):
-        self.target.on_sound(value, percentage)
+    def configure(self, which, interval, window, threshold, hysteresis):
+        wheel = _shared_timer_wheel()
+        wheel.cancel(self._tasks.get(which, None))
+        self._thresholds[which] = (threshold + hysteresis, threshold - hysteresis)
+
+        if which == 'light':
+            self.light = _SensorChannel('h', window)
+            self._tasks[which] = wheel.schedule(self.on_light_tick, interval, interval)
+        elif which == 'sound':
+            self.sound = _SensorChannel('h', window)
+            self._tasks[which] = wheel.schedule(self.on_sound_tick, interval, interval)
+        elif which == 'accelerometer':
+            self.acceleration = (_SensorChannel('f', window), _SensorChannel('f', window), _SensorChannel('f', window))
+            self._tasks[which] = wheel.schedule(self.on_accelerometer_tick, interval, interval)
+
+    def on_light_tick(self, _):
+        self._sample(self.light, light.read(), 'light', _EVENT_LIGHT)
+
+    def on_sound_tick(self, _):
+        self._sample(self.sound, sound.read(), 'sound', _EVENT_SOUND)
+
+    def on_accelerometer_tick(self, _):
+        x, y, z = self.acceleration
+        x.push(accelerometer.get_x())
+        y.push(accelerometer.get_y())
+        z.push(accelerometer.get_z())
+        self.xyz = (x.latest, y.latest, z.latest)
+        self.roll_pitch = accelerometer.roll_pitch_angle()
+
+    def _sample(self, channel, datum, which, kind):
+        rising, falling = self._thresholds[which]
+        channel.push(datum)
+
+        if not channel.above and channel.average >= rising:
+            channel.above = True
+            self.target.post_event(kind, int(channel.average), True)
+        elif channel.above and channel.average <= falling:
+            channel.above = False
+            self.target.post_event(kind, int(channel.average), False)
     
 class _TouchpadWatcher(_Timer):
-    def __init__(self, threshold, target):
-        super(_TouchpadWatcher, self).__init__(100)
+    """
+    触摸键只在按下和松开的瞬间产生事件。
+    每个键维护自适应的基线（松开时读数的滑动平均），读数比基线低 press_drop% 视为按下，
+    回到比基线低不到 release_drop% 视为松开，新状态需要连续保持 debounce 次采样才算数
+    """
+
+    def __init__(self, target, interval = 50, press_drop = 30, release_drop = 15, debounce = 2):
+        super(_TouchpadWatcher, self).__init__(interval)
         self.target = target
-        self._threshold = { 'P': threshold, 'Y': threshold, 'T': threshold, 'H': threshold, 'O': threshold, 'N': threshold }
+        self._pads = (touchPad_P, touchPad_Y, touchPad_T, touchPad_H, touchPad_O, touchPad_N)
+        self._baselines = array('h', [0] * 6)
+        self._pressed = bytearray(6)
+        self._streaks = bytearray(6)
+        self.configure(interval, press_drop, release_drop, debounce)
+
+    def configure(self, interval, press_drop, release_drop, debounce):
+        self._press_level = 100 - press_drop
+        self._release_level = 100 - min(release_drop, press_drop)
+        self._debounce = max(1, debounce)
+        self.set_timer_interval(interval)
     
     def on_tick(self, _):
-        try:
-            touchPad_P.read()
-        except:
-            return
-  
-        self._dispatch(touchPad_P.read(), 'P', 1)
-        self._dispatch(touchPad_Y.read(), 'Y', 2)
-        self._dispatch(touchPad_T.read(), 'T', 3)
-        self._dispatch(touchPad_H.read(), 'H', 4)
-        self._dispatch(touchPad_O.read(), 'O', 5)
-        self._dispatch(touchPad_N.read(), 'N', 6)
+        for idx in range(6):
+            try:
+                datum = self._pads[idx].read()
+            except Exception:
+                # 读不出来的键跳过这一次采样，按键处理中的异常照常抛出
+                continue
+
+            self._sample(idx, datum)
     
     def on_touchpad_key(self, keyname, key_idx, pressed):
-        self.target.on_touchpad_key(keyname, key_idx, pressed)
+        self.target.post_event(_EVENT_TOUCHPAD, key_idx, pressed)
   
-    def _dispatch(self, read_datum, keyname, idx):
-        if read_datum < self._threshold[keyname]:
-            self.on_touchpad_key(keyname, idx, True)
+    def _sample(self, idx, datum):
+        baseline = self._baselines[idx]
+        pressed = self._pressed[idx]
+
+        if baseline == 0 or (not pressed and datum > baseline):
+            # 第一次采样或者环境变化导致读数升高，立即跟上
+            baseline = datum
+        elif not pressed and datum * 100 >= baseline * self._release_level:
+            baseline += (datum - baseline) >> 4
+
+        self._baselines[idx] = baseline
+
+        if pressed:
+            changing = datum * 100 >= baseline * self._release_level
         else:
-            self.on_touchpad_key(keyname, idx, False)
+            changing = datum * 100 < baseline * self._press_level
+
+        if not changing:
+            self._streaks[idx] = 0
+        elif self._streaks[idx] + 1 < self._debounce:
+            self._streaks[idx] += 1
+        else:
+            self._streaks[idx] = 0
+            self._pressed[idx] = not pressed
+            self.on_touchpad_key(_TOUCHPAD_NAMES[idx + 1], idx + 1, not pressed)
       
 class _ButtonWatcher(object):
     def __init__(self, target):
@@ -76,7 +344,7 @@ class _ButtonWatcher(object):
                   handler= lambda a: self._ugly_python(button_b.value(), button_a.value(), 'B'))
     
     def on_button_key(self, who, pressed):
-        self.target.on_button_key(who, pressed)
+        self.target.post_event(_EVENT_BUTTON, _BUTTON_NAMES.index(who), pressed)
 
     def _ugly_python(self, value, the_other_value, who):
         if value == the_other_value:
@@ -89,6 +357,50 @@ class _ButtonWatcher(object):
         else:
             self.on_button_key(who, False)
 
+class _EventQueue(object):
+    """
+    预先分配的环形事件队列，中断和定时器只负责投递，由主线程分批取出并分发，投递过程不分配内存。
+    队列满时丢弃新事件并计数
+    """
+
+    def __init__(self, capacity):
+        super(_EventQueue, self).__init__()
+
+        size = 1
+        while size < capacity:
+            size <<= 1
+
+        self.mask = size - 1
+        self.kinds = bytearray(size)
+        self.args = array('h', [0] * size)
+        self.flags = bytearray(size)
+        self.stamps = array('l', [0] * size)
+        self.head, self.tail = 0, 0
+        self.posted, self.dispatched, self.overflowed, self.batches = 0, 0, 0, 0
+
+    def put(self, kind, arg, flag, stamp):
+        okay = False
+        tail = self.tail
+
+        if ((tail + 1) & self.mask) != self.head:
+            self.kinds[tail] = kind
+            self.args[tail] = arg
+            self.flags[tail] = flag
+            self.stamps[tail] = stamp
+            self.tail = (tail + 1) & self.mask
+            self.posted += 1
+            okay = True
+        else:
+            self.overflowed += 1
+
+        return okay
+
+    def is_empty(self):
+        return self.head == self.tail
+
+    def size(self):
+        return (self.tail - self.head) & self.mask
+
 ###############################################################################
 class Universe(_Timer):
 # public
@@ -98,11 +410,34 @@ class Universe(_Timer):
         self.__screen_width, self.__screen_height = width, height
         self.__count, self.__interval, self.__uptime, self.__uptime0 = 0, 1000 // fps, 0, -1
         self.__background = background
+        self.__backgrounds = {}
+        self.__background_pages = None
         self.__update_sequence_depth = 0
         self.__update_is_needed = False
         self.__button_watcher = None
         self.__touchpad_watcher = None
         self.__physics_watcher = None
+        self.__touchpad_options = (50, 30, 15, 2)
+        self.__sensor_options = { 'light': (100, 8, 2048, 200), 'sound': (50, 8, 2048, 200), 'accelerometer': (40, 4, 0, 0) }
+        self.__flusher = None
+        self.__coalescing = False
+        self.__frame_pending = False
+        self.__frame_requests, self.__rendered_frames = 0, 0
+        self.__fixed_timestep = False
+        self.__coalescing_unfixed = False
+        self.__last_tick, self.__lag, self.__next_render = 0, 0, 0
+        self.__render_interval, self.__max_catchup_steps, self.__max_skipped_renders = self.__interval, 4, 2
+        self.__steps, self.__dropped_steps, self.__skipped_renders, self.__skipping = 0, 0, 0, 0
+        self.__lateness_max, self.__lateness_sum, self.__lateness_count = 0, 0, 0
+        self.__events = _EventQueue(32)
+        self.__event_batch = 8
+        self.__drain_scheduled = False
+        self.__drain_ref = self.__drain_scheduled_events
+        self.__tick_pending = False
+        self.__unrendered_stamps = array('l', [0] * 16)
+        self.__unrendered_count = 0
+        self.__latency_max, self.__latency_sum, self.__latency_count = 0, 0, 0
+        self._profiler = None
         
         super(Universe, self).__init__(self.__interval)
 
@@ -132,17 +467,19 @@ class Universe(_Timer):
     def big_bang(self):
         """ 宇宙大爆炸，开启游戏主循环，返回游戏运行时间 """
 
-        self.__touchpad_watcher = _TouchpadWatcher(400, self)
+        self.__touchpad_watcher = _TouchpadWatcher(self, *self.__touchpad_options)
         self.__button_watcher = _ButtonWatcher(self)
-        self.__physics_watcher = _PhysicsWatcher(self)
+        self.__physics_watcher = _PhysicsWatcher(self, self.__sensor_options)
         
         self.__uptime0 = time.ticks_ms()
+        self.__last_tick, self.__next_render = self.__uptime0, self.__uptime0
         self.__screen_width, self.__screen_height = self.get_window_size()
         self.begin_update_sequence()
         self._on_big_bang(self.__screen_width, self.__screen_height)
         self.reflow(self.__screen_width, self.__screen_height)
         self.notify_updated()
         self.end_update_sequence()
+        self.flush()
 
 # public
     def get_window_size(self):
@@ -158,22 +495,350 @@ class Universe(_Timer):
         oled.invert(n)
 
     def refresh(self):
-        self._on_refresh(oled, self.__screen_width, self.__screen_height)
-        self.draw(oled, 0, 0, self.__screen_width, self.__screen_height)
-        oled.show()
+        profiler = self._profiler
+
+        if profiler is None:
+            self._on_refresh(oled, self.__screen_width, self.__screen_height)
+            self.draw(oled, 0, 0, self.__screen_width, self.__screen_height)
+        else:
+            t0 = time.ticks_us()
+            self._on_refresh(oled, self.__screen_width, self.__screen_height)
+            profiler.record(ProfilePhase.BACKGROUND, t0)
+
+            t0 = time.ticks_us()
+            self.draw(oled, 0, 0, self.__screen_width, self.__screen_height)
+            profiler.record(ProfilePhase.DRAW, t0)
+
+        self.show()
+
+    def show(self):
+        if self._profiler is not None:
+            t0 = time.ticks_us()
+
+        if self.__flusher:
+            self.__flusher.flush()
+        else:
+            oled.show()
+
+        if self._profiler is not None:
+            self._profiler.record(ProfilePhase.SHOW, t0)
+
+    def enable_profiling(self, yes_or_no):
+        """ 统计每一帧各个阶段以及每类物体的耗时(微秒)，关闭时不产生任何开销 """
+        if yes_or_no:
+            if self._profiler is None:
+                self._profiler = Profiler()
+        else:
+            self._profiler = None
+
+    def get_profiler(self):
+        return self._profiler
+
+    def dump_profile(self, stream = None):
+        """ 打印性能统计，默认输出到串口(标准输出) """
+        if self._profiler:
+            self._profiler.dump(stream)
+
+    def set_background(self, background):
+        """ 切换背景位图，None 表示黑色背景；解码过的背景直接复用，不会再次解码 """
+        if self.__background is not background:
+            self.__background = background
+            self.__background_pages = None
+
+            if background:
+                entry = self.__backgrounds.get(id(background))
+
+                if entry:
+                    self.__background_pages = entry[1]
+
+            self.notify_updated()
+
+    def get_background(self):
+        return self.__background
+
+    def preload_background(self, background):
+        """ 提前把背景解码成显存的页格式，之后切换到它时不必解码；每张背景占用一帧显存大小的内存 """
+        if id(background) not in self.__backgrounds:
+            frame = bytearray(oled.buffer)
+            self.__decode_background(oled, background, self.__screen_width, self.__screen_height)
+            oled.buffer[:] = frame
+
+    def forget_background(self, background = None):
+        """ 释放背景解码后的副本，默认全部释放；背景位图的内容被修改之后也需要调用 """
+        if background is None:
+            self.__backgrounds = {}
+            self.__background_pages = None
+        elif id(background) in self.__backgrounds:
+            del self.__backgrounds[id(background)]
+
+            if background is self.__background:
+                self.__background_pages = None
+
+    def plot_points(self, xs, ys, n = -1, c = 1):
+        """
+        批量画点，直接写显存；坐标可以是 array、memoryview 或列表，超出屏幕的点被裁掉
+        c 为 1 点亮，0 熄灭，2 取反；n 为负数时画出全部坐标
+        """
+        vlsb_points(oled.buffer, self.__screen_width, self.__screen_height, xs, ys, len(xs) if n < 0 else n, c)
+
+    def plot_vspans(self, xs, ys, h, n = -1, c = 1):
+        """ 批量画竖线，从 (x, y) 向下 h 个像素；h 可以是一个数，也可以是每条竖线各自的高度 """
+        vlsb_vspans(oled.buffer, self.__screen_width, self.__screen_height, xs, ys, len(xs) if n < 0 else n, h, c)
+
+    def plot_dots(self, xs, ys, n = -1, radius = 1, c = 1):
+        """ 批量画实心小圆点，形状与 fill_circle 相同，半径为 1 时是十字 """
+        vlsb_dots(oled.buffer, self.__screen_width, self.__screen_height, xs, ys, len(xs) if n < 0 else n, radius, c)
+
+    def enable_display_diffing(self, yes_or_no, addressing = DisplayAddressing.PAGE, column_offset = 0):
+        """ 只把与上一帧不同的页和列区间发送给屏幕，而不是每帧都发送整个显存 """
+        if yes_or_no:
+            self.__flusher = PageFlusher(oled, self.__screen_width, self.__screen_height,
+                                         addressing = addressing, column_offset = column_offset)
+        else:
+            self.__flusher = None
+
+    def get_display_stats(self):
+        """ 返回 (上一帧发送字节数, 上一帧发送窗口数, 累计发送字节数, 累计帧数) """
+        stats = None
+        
+        if self.__flusher:
+            stats = self.__flusher.stats()
+
+        return stats
 
     def on_tick(self, _):
+        if not self.__tick_pending:
+            # 定时器落后时多个滴答合并成一个，固定步长模式会按实际流逝的时间补跑
+            self.__tick_pending = True
+
+            if not self.post_event(_EVENT_TICK):
+                self.__tick_pending = False
+
+    def post_event(self, kind, arg = 0, flag = False):
+        """
+        投递事件，可以在中断和定时器回调中调用，队列已满时返回 False。
+        设备上通过 micropython.schedule 安排主线程分批处理，没有 micropython 模块时立即同步处理
+        """
+        okay = self.__events.put(kind, arg, flag, time.ticks_ms())
+
+        if micropython is None:
+            self.drain_events()
+        elif not self.__drain_scheduled:
+            try:
+                micropython.schedule(self.__drain_ref, 0)
+                self.__drain_scheduled = True
+            except RuntimeError:
+                # 调度队列已满，留给下一次投递
+                pass
+
+        return okay
+
+    def drain_events(self, limit = 0):
+        """ 分发队列中的事件，limit 为 0 时处理全部事件，返回剩余事件数 """
+        events = self.__events
+        count = 0
+
+        if limit <= 0:
+            limit = events.mask + 1
+
+        while count < limit and not events.is_empty():
+            head = events.head
+            kind, arg = events.kinds[head], events.args[head]
+            flag, stamp = events.flags[head], events.stamps[head]
+            events.head = (head + 1) & events.mask
+            events.dispatched += 1
+            count += 1
+
+            if kind == _EVENT_TICK:
+                self.__tick_pending = False
+                self.__on_tick_event()
+            elif self._profiler is None:
+                self.__dispatch_input(kind, arg, flag, stamp)
+            else:
+                t0 = time.ticks_us()
+                self.__dispatch_input(kind, arg, flag, stamp)
+                self._profiler.record(ProfilePhase.EVENTS, t0)
+
+        if count > 0:
+            events.batches += 1
+
+        return events.size()
+
+    def set_event_batch_size(self, size):
+        """ 设置每次调度最多分发的事件数，剩余的事件留给下一次调度，避免长时间占用主线程 """
+        self.__event_batch = max(1, size)
+
+    def get_event_stats(self):
+        """ 返回 (投递数, 分发数, 因队列满被丢弃数, 分批次数, 当前积压数) """
+        events = self.__events
+        return events.posted, events.dispatched, events.overflowed, events.batches, events.size()
+
+    def get_input_latency(self):
+        """ 返回输入事件从投递到屏幕刷新的 (最大延迟毫秒, 平均延迟毫秒, 样本数) """
+        average = 0.0
+
+        if self.__latency_count > 0:
+            average = self.__latency_sum / self.__latency_count
+
+        return self.__latency_max, average, self.__latency_count
+
+# private
+    def __on_tick_event(self):
         if self.__uptime0 >= 0:
-            self.__count += 1
-            self.__uptime = time.ticks_ms() - self.__uptime0
-            self._on_elapse(self.__interval, self.__count, self.__uptime)
+            if self.__fixed_timestep:
+                self.__run_fixed_steps()
+            else:
+                self.__count += 1
+                self.__uptime = time.ticks_diff(time.ticks_ms(), self.__uptime0)
+                self._on_elapse(self.__interval, self.__count, self.__uptime)
+                self.flush()
+
+    def set_touchpad_options(self, interval = 50, press_drop = 30, release_drop = 15, debounce = 2):
+        """
+        设置触摸键的采样间隔(毫秒)、按下和松开的判定幅度(相对于基线下降的百分比)以及消抖的采样次数。
+        触摸键只在按下和松开时各触发一次 on_touchpad_key
+        """
+        self.__touchpad_options = (interval, press_drop, release_drop, debounce)
+
+        if self.__touchpad_watcher:
+            self.__touchpad_watcher.configure(*self.__touchpad_options)
+
+    def schedule_task(self, callback, delay, period = 0, phase = None):
+        """
+        在共享的时间轮上安排任务，delay 毫秒后调用 callback(task)，period 大于 0 时周期执行，
+        返回的任务可以传给 cancel_task 取消。所有任务共用一个硬件定时器
+        """
+        return _shared_timer_wheel().schedule(callback, delay, period, phase)
+
+    def cancel_task(self, task):
+        _shared_timer_wheel().cancel(task)
+
+    def get_timer_stats(self):
+        """ 返回 (活动任务数, 累计触发次数, 硬件定时器迟到的轮次) """
+        return _shared_timer_wheel().stats()
+
+    def enable_fixed_timestep(self, yes_or_no, render_fps = None, max_catchup_steps = 4, max_skipped_renders = 2):
+        """
+        固定步长主循环：游戏世界总是以构造时的帧率、固定的时间间隔更新，与绘制频率无关。
+        落后时每次最多补跑 max_catchup_steps 步，补跑期间最多连续跳过 max_skipped_renders 次绘制，
+        此时传给 update 的 uptime 是模拟时间，保证物理运动与绘制快慢无关。
+        固定步长总是合并帧，关闭时恢复开启之前的合并设置
+        """
+        # 重复开启时不覆盖记下的设置
+        was_fixed = self.__fixed_timestep
+
+        if yes_or_no and not was_fixed:
+            self.__coalescing_unfixed = self.__coalescing
+
+        self.__fixed_timestep = yes_or_no
+        self.__max_catchup_steps = max(1, max_catchup_steps)
+        self.__max_skipped_renders = max_skipped_renders
+        self.__lag, self.__skipping = 0, 0
+        self.__last_tick = self.__next_render = time.ticks_ms()
+
+        if render_fps:
+            self.__render_interval = 1000 // render_fps
+        else:
+            self.__render_interval = self.__interval
+
+        if yes_or_no:
+            self.enable_frame_coalescing(True)
+            self.set_timer_interval(min(self.__interval, self.__render_interval))
+        else:
+            if was_fixed:
+                self.enable_frame_coalescing(self.__coalescing_unfixed)
+
+            self.set_timer_interval(self.__interval)
+
+    def get_loop_stats(self):
+        """ 返回 (模拟步数, 丢弃的步数, 跳过的绘制次数, 最大延迟毫秒, 平均延迟毫秒) """
+        average = 0.0
+
+        if self.__lateness_count > 0:
+            average = self.__lateness_sum / self.__lateness_count
+
+        return self.__steps, self.__dropped_steps, self.__skipped_renders, self.__lateness_max, average
+
+    def enable_frame_coalescing(self, yes_or_no):
+        """ 合并帧：notify_updated 只标记需要刷新，每次定时器到期最多刷新一次屏幕 """
+        self.__coalescing = yes_or_no
+
+        if not yes_or_no:
+            self.flush()
+
+    def flush(self):
+        """ 立即刷新被合并而尚未绘制的帧，供确实需要同步输出的代码调用 """
+        if self.__frame_pending:
+            self.__frame_pending = False
+            self.__rendered_frames += 1
+            self.refresh()
+            self.__record_input_latency()
+
+    def get_frame_stats(self):
+        """ 返回 (已绘制的帧数, 被合并掉的刷新请求数) """
+        return self.__rendered_frames, self.__frame_requests - self.__rendered_frames
 
 # public
     def get_acceleration(self):
-        return accelerometer.get_x(), accelerometer.get_y(), accelerometer.get_z()
+        """ 返回最近一次采样的 (x, y, z)，游戏开始之前直接读取加速度计 """
+        if self.__physics_watcher:
+            xyz = self.__physics_watcher.xyz
+        else:
+            xyz = accelerometer.get_x(), accelerometer.get_y(), accelerometer.get_z()
+
+        return xyz
 
     def get_roll_pitch_angle(self):
-        return accelerometer.roll_pitch_angle()
+        """ 返回最近一次采样的 (roll, pitch)，游戏开始之前直接读取加速度计 """
+        if self.__physics_watcher:
+            angles = self.__physics_watcher.roll_pitch
+        else:
+            angles = accelerometer.roll_pitch_angle()
+
+        return angles
+
+    def get_average_acceleration(self):
+        """ 返回采样窗口内的平均 (x, y, z)，游戏开始之前直接读取加速度计 """
+        if self.__physics_watcher:
+            x, y, z = self.__physics_watcher.acceleration
+            xyz = x.average, y.average, z.average
+        else:
+            xyz = accelerometer.get_x(), accelerometer.get_y(), accelerometer.get_z()
+
+        return xyz
+
+    def get_light_level(self):
+        """ 返回光线的 (最新读数, 滑动平均值, 窗口内峰值)，游戏开始之前三者都是直接读取的值 """
+        if self.__physics_watcher:
+            channel = self.__physics_watcher.light
+            level = channel.latest, channel.average, channel.peak
+        else:
+            datum = light.read()
+            level = datum, datum, datum
+
+        return level
+
+    def get_sound_level(self):
+        """ 返回声音的 (最新读数, 滑动平均值, 窗口内峰值)，游戏开始之前三者都是直接读取的值 """
+        if self.__physics_watcher:
+            channel = self.__physics_watcher.sound
+            level = channel.latest, channel.average, channel.peak
+        else:
+            datum = sound.read()
+            level = datum, datum, datum
+
+        return level
+
+    def set_sensor_options(self, which, interval, window = 8, threshold = 2048, hysteresis = 200):
+        """
+        设置传感器的采样间隔(毫秒)和滑动窗口大小，which 可以是 'light'、'sound' 或 'accelerometer'。
+        光线和声音的滑动平均值升到 threshold + hysteresis 以上或降到 threshold - hysteresis 以下时
+        才触发 on_light/on_sound，参数是当时的平均值
+        """
+        self.__sensor_options[which] = (interval, window, threshold, hysteresis)
+
+        if self.__physics_watcher:
+            self.__physics_watcher.configure(which, interval, window, threshold, hysteresis)
 
 # public
     def begin_update_sequence(self):
@@ -189,8 +854,8 @@ class Universe(_Timer):
             self.__update_sequence_depth = 0
 
             if self.should_update():
-                self.refresh()
                 self.__update_is_needed = False
+                self.__request_frame()
 
     def should_update(self):
         return self.__update_is_needed
@@ -199,8 +864,8 @@ class Universe(_Timer):
         if self.is_in_update_sequence():
             self.__update_is_needed = True
         else:
-            self.refresh()
             self.__update_is_needed = False
+            self.__request_frame()
 
 # public
     # 响应按钮事件，并按需触发按下、松开事件
@@ -211,25 +876,150 @@ class Universe(_Timer):
     def on_touchpad_key(self, which, index, pressed):
         pass
 
-    # 响应亮度变化事件
+    # 响应亮度变化事件，光线的滑动平均值越过阈值时触发
     def on_light(self, value, percentage):
         pass
     
-    # 响应音量变化事件
+    # 响应音量变化事件，声音的滑动平均值越过阈值时触发
     def on_sound(self, value, percentage):
         pass
 
+# private
+    def __run_fixed_steps(self):
+        now = time.ticks_ms()
+        interval = self.__interval
+        self.__lag += time.ticks_diff(now, self.__last_tick)
+        self.__last_tick = now
+        steps = 0
+
+        if self.__lag >= interval:
+            lateness = self.__lag - interval
+            self.__lateness_max = max(self.__lateness_max, lateness)
+            self.__lateness_sum += lateness
+            self.__lateness_count += 1
+
+        while self.__lag >= interval and steps < self.__max_catchup_steps:
+            self.__count += 1
+            self.__uptime += interval
+            self._on_elapse(interval, self.__count, self.__uptime)
+            self.__lag -= interval
+            steps += 1
+
+        if self.__lag >= interval:
+            # too far behind to catch up, the simulation slows down instead of spiraling
+            dropped = self.__lag // interval
+            self.__dropped_steps += dropped
+            self.__lag -= dropped * interval
+
+        self.__steps += steps
+
+        # 定时器按时间轮的精度到期，提前一点点的也算赶上了绘制时刻
+        if time.ticks_diff(now, self.__next_render) > -_TIMER_RESOLUTION:
+            if steps > 1 and self.__skipping < self.__max_skipped_renders:
+                self.__skipping += 1
+                self.__skipped_renders += 1
+            else:
+                self.__skipping = 0
+                # 从上一个绘制时刻往后排，定时器的抖动不会累积成掉帧；落后超过一个间隔时重新对齐
+                next_render = time.ticks_add(self.__next_render, self.__render_interval)
+
+                if time.ticks_diff(now, next_render) >= 0:
+                    next_render = time.ticks_add(now, self.__render_interval)
+
+                self.__next_render = next_render
+                self.flush()
+
+    def __request_frame(self):
+        self.__frame_requests += 1
+        self.__frame_pending = True
+
+        if not self.__coalescing:
+            self.flush()
+
+    def __drain_scheduled_events(self, _):
+        self.__drain_scheduled = False
+
+        if self.drain_events(self.__event_batch) > 0:
+            try:
+                micropython.schedule(self.__drain_ref, 0)
+                self.__drain_scheduled = True
+            except RuntimeError:
+                pass
+
+    def __dispatch_input(self, kind, arg, flag, stamp):
+        if kind <= _EVENT_TOUCHPAD and self.__unrendered_count < len(self.__unrendered_stamps):
+            self.__unrendered_stamps[self.__unrendered_count] = stamp
+            self.__unrendered_count += 1
+
+        if kind == _EVENT_BUTTON:
+            self.on_button_key(_BUTTON_NAMES[arg], bool(flag))
+        elif kind == _EVENT_TOUCHPAD:
+            self.on_touchpad_key(_TOUCHPAD_NAMES[arg], arg, bool(flag))
+        elif kind == _EVENT_LIGHT:
+            self.on_light(arg, arg / 4095)
+        elif kind == _EVENT_SOUND:
+            self.on_sound(arg, arg / 4095)
+
+    def __record_input_latency(self):
+        if self.__unrendered_count > 0:
+            now = time.ticks_ms()
+
+            for i in range(self.__unrendered_count):
+                latency = time.ticks_diff(now, self.__unrendered_stamps[i])
+                self.__latency_max = max(self.__latency_max, latency)
+                self.__latency_sum += latency
+                self.__latency_count += 1
+
+            self.__unrendered_count = 0
+
+    def __decode_background(self, ledscr, background, width, height):
+        # 交给屏幕自己的 Bitmap 画一次，再保存显存，保证与直接绘制的像素完全一致
+        ledscr.fill(0)
+        ledscr.Bitmap(0, 0, background, width, height, 0)
+        pages = bytearray(ledscr.buffer)
+        self.__backgrounds[id(background)] = (background, pages)
+
+        if background is self.__background:
+            self.__background_pages = pages
+
 # protected
     # 大爆炸之前最后的初始化宇宙机会，默认什么都不做
     def _on_big_bang(self, width, height): pass
 
     # 响应定时器事件，刷新游戏世界
     def _on_elapse(self, interval, count, uptime):
-        self.update(interval, count, uptime)
+        if self._profiler is None:
+            self.update(interval, count, uptime)
+        else:
+            t0 = time.ticks_us()
+            self.update(interval, count, uptime)
+            self._profiler.record(ProfilePhase.UPDATE, t0)
+
         self.notify_updated()
 
-    # 每次刷新屏幕之前调用，默认清屏
+    # 每次刷新屏幕之前调用，默认清屏；背景只在第一次用到时解码，之后整块复制显存
     def _on_refresh(self, ledscr, width, height):
-        ledscr.fill(0)
-        if self.__background:
-            ledscr.Bitmap(0, 0, self.__background, width, height, 0)
+        if not self.__background:
+            ledscr.fill(0)
+        elif self.__background_pages is None:
+            self.__decode_background(ledscr, self.__background, width, height)
+        else:
+            ledscr.buffer[:] = self.__background_pages
+
+    # 局部刷新之前调用，默认只恢复该区域的背景，y 和 height 按页(8 行)对齐；返回 False 表示需要全屏刷新
+    def _on_refresh_region(self, ledscr, x, y, width, height):
+        restored = True
+
+        if not self.__background:
+            ledscr.fill_rect(x, y, width, height, 0)
+        elif self.__background_pages is None:
+            restored = False
+        else:
+            buffer, pages = ledscr.buffer, self.__background_pages
+            stride = self.__screen_width
+
+            for page in range(y >> 3, (y + height + 7) >> 3):
+                base = page * stride
+                buffer[base + x:base + x + width] = pages[base + x:base + x + width]
+
+        return restored